@@ -1,9 +1,17 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 
+from . import transitions
 from .models import (
     ChatMessage,
+    ChatThread,
+    CodeSequence,
+    DailyPharmacyFact,
     DeliveryTask,
     DistributorStatus,
+    HourlyPharmacyFact,
+    IdempotencyKey,
+    InboxState,
+    KpiRollup,
     Notification,
     Order,
     Patient,
@@ -13,6 +21,9 @@ from .models import (
     PharmacyApplication,
     PrescriptionRequest,
     Profile,
+    RollupWatermark,
+    SeedState,
+    StatusOption,
     StockItem,
     TimelineEvent,
 )
@@ -27,8 +38,9 @@ class ProfileAdmin(admin.ModelAdmin):
 
 @admin.register(Pharmacy)
 class PharmacyAdmin(admin.ModelAdmin):
-    list_display = ("name", "distance_km", "rating", "address")
+    list_display = ("name", "distance_km", "rating", "address", "latitude", "longitude")
     search_fields = ("name", "address")
+    readonly_fields = ("geo_cell",)
 
 
 @admin.register(PharmacyApplication)
@@ -43,6 +55,34 @@ class OrderAdmin(admin.ModelAdmin):
     list_display = ("code", "customer_name", "pharmacy", "status", "eta_text", "created_at")
     list_filter = ("status",)
     search_fields = ("code", "customer_name")
+    actions = ("mark_out_for_delivery", "mark_delivered", "cancel_orders")
+    # Status only moves through the actions, which check the source state and bump ``version``.
+    readonly_fields = ("status",)
+
+    def _apply_transition(self, request, queryset, action):
+        # "Select all" can cover every order; keep each guarded UPDATE within SQLite's variable limit.
+        pks = list(queryset.values_list("pk", flat=True))
+        limit = transitions.BULK_ORDER_LIMIT
+        results = []
+        for start in range(0, len(pks), limit):
+            results += transitions.ORDER_STATES.apply_many(pks[start : start + limit], action)
+        updated = sum(result.ok for result in results)
+        self.message_user(request, f"{updated} of {len(results)} orders updated.", messages.SUCCESS)
+        skipped = [f"{result.code}: {result.reason}" for result in results if not result.ok]
+        if skipped:
+            self.message_user(request, "Skipped " + "; ".join(skipped), messages.WARNING)
+
+    @admin.action(description="Mark selected orders out for delivery")
+    def mark_out_for_delivery(self, request, queryset):
+        self._apply_transition(request, queryset, "out")
+
+    @admin.action(description="Mark selected orders delivered")
+    def mark_delivered(self, request, queryset):
+        self._apply_transition(request, queryset, "deliver")
+
+    @admin.action(description="Cancel selected orders")
+    def cancel_orders(self, request, queryset):
+        self._apply_transition(request, queryset, "cancel")
 
 
 @admin.register(PrescriptionRequest)
@@ -58,11 +98,19 @@ class PatientAdmin(admin.ModelAdmin):
     search_fields = ("name", "condition")
 
 
+@admin.register(ChatThread)
+class ChatThreadAdmin(admin.ModelAdmin):
+    list_display = ("subject", "customer", "updated_at")
+    search_fields = ("subject", "customer__username")
+    raw_id_fields = ("customer",)
+
+
 @admin.register(ChatMessage)
 class ChatMessageAdmin(admin.ModelAdmin):
-    list_display = ("author", "sender", "body", "sent_at")
+    list_display = ("author", "sender", "thread", "body", "created_at")
     list_filter = ("sender",)
     search_fields = ("author", "body")
+    raw_id_fields = ("thread", "user")
 
 
 @admin.register(PaymentProvider)
@@ -77,13 +125,51 @@ class PaymentCardAdmin(admin.ModelAdmin):
 
 @admin.register(Notification)
 class NotificationAdmin(admin.ModelAdmin):
-    list_display = ("message", "audience", "type", "created_at")
+    list_display = ("message", "audience", "type", "created_at", "fanned_out_at")
     list_filter = ("audience", "type")
+    readonly_fields = ("fanout_cursor", "fanned_out_at")
+
+
+@admin.register(KpiRollup)
+class KpiRollupAdmin(admin.ModelAdmin):
+    list_display = ("day", "metric", "value")
+    list_filter = ("metric",)
+    date_hierarchy = "day"
+    readonly_fields = ("day", "metric", "value")
+
+
+@admin.register(DailyPharmacyFact)
+class DailyPharmacyFactAdmin(admin.ModelAdmin):
+    list_display = ("day", "pharmacy", "orders", "cancelled", "delivered", "tasks", "tasks_done")
+    date_hierarchy = "day"
+    list_select_related = ("pharmacy",)
+    readonly_fields = [field.name for field in DailyPharmacyFact._meta.fields]
+
+
+@admin.register(HourlyPharmacyFact)
+class HourlyPharmacyFactAdmin(admin.ModelAdmin):
+    list_display = ("hour", "pharmacy", "orders", "cancelled", "delivered", "tasks", "tasks_done")
+    date_hierarchy = "hour"
+    list_select_related = ("pharmacy",)
+    readonly_fields = [field.name for field in HourlyPharmacyFact._meta.fields]
+
+
+@admin.register(RollupWatermark)
+class RollupWatermarkAdmin(admin.ModelAdmin):
+    list_display = ("name", "updated_at", "last_id")
+
+
+@admin.register(InboxState)
+class InboxStateAdmin(admin.ModelAdmin):
+    list_display = ("user", "unread_count", "read_through")
+    search_fields = ("user__username",)
+    raw_id_fields = ("user",)
 
 
 @admin.register(StockItem)
 class StockItemAdmin(admin.ModelAdmin):
-    list_display = ("sku", "name", "quantity", "status", "expires_in_days")
+    list_display = ("sku", "name", "quantity", "status", "expires_on")
+    date_hierarchy = "expires_on"
     search_fields = ("sku", "name")
 
 
@@ -101,3 +187,30 @@ class TimelineEventAdmin(admin.ModelAdmin):
 @admin.register(DistributorStatus)
 class DistributorStatusAdmin(admin.ModelAdmin):
     list_display = ("order_code", "pharmacy", "status")
+
+
+@admin.register(StatusOption)
+class StatusOptionAdmin(admin.ModelAdmin):
+    list_display = ("label", "position", "created_at")
+    list_editable = ("position",)
+    search_fields = ("label",)
+
+
+@admin.register(CodeSequence)
+class CodeSequenceAdmin(admin.ModelAdmin):
+    list_display = ("name", "next_value")
+    readonly_fields = ("name", "next_value")
+
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    list_display = ("key", "scope", "user", "created_at", "expires_at")
+    list_filter = ("scope",)
+    search_fields = ("key", "user__username")
+    readonly_fields = ("key", "scope", "user", "fingerprint", "response", "created_at", "expires_at")
+
+
+@admin.register(SeedState)
+class SeedStateAdmin(admin.ModelAdmin):
+    list_display = ("key", "version", "seeded_at")
+    readonly_fields = ("seeded_at",)
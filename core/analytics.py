@@ -0,0 +1,223 @@
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Min, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import DailyPharmacyFact, DeliveryTask, HourlyPharmacyFact, Order, RollupWatermark
+
+HOUR = timedelta(hours=1)
+FACT_FIELDS = ("orders", "cancelled", "delivered", "delivery_seconds", "tasks", "tasks_done")
+# Every fact is filed under the hour its order or task was created, so a changed row only ever
+# touches the bucket it was created in.
+SOURCES = {
+    "orders": Order,
+    "delivery_tasks": DeliveryTask,
+}
+
+
+def _settings():
+    return {
+        "chunk_size": getattr(settings, "ANALYTICS_CHUNK_SIZE", 2000),
+        # Rows are stamped before their transaction commits; staying this far behind "now" keeps the
+        # watermark from passing a row that is still invisible to us.
+        "settle": timedelta(seconds=getattr(settings, "ANALYTICS_SETTLE_SECONDS", 60)),
+    }
+
+
+def floor_hour(moment):
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _accumulate(start, end, chunk_size):
+    """Fact totals for ``[start, end)``, streamed from the ``created_at`` indexes with ``iterator()``."""
+    totals = defaultdict(lambda: dict.fromkeys(FACT_FIELDS, 0))
+    orders = Order.objects.filter(created_at__gte=start, created_at__lt=end).order_by()
+    for pharmacy_id, created_at, status, delivered_at in orders.values_list(
+        "pharmacy_id", "created_at", "status", "delivered_at"
+    ).iterator(chunk_size=chunk_size):
+        fact = totals[(floor_hour(created_at), pharmacy_id)]
+        fact["orders"] += 1
+        if status == Order.Status.CANCELLED:
+            fact["cancelled"] += 1
+        if delivered_at:
+            fact["delivered"] += 1
+            fact["delivery_seconds"] += max(0, int((delivered_at - created_at).total_seconds()))
+    tasks = DeliveryTask.objects.filter(created_at__gte=start, created_at__lt=end).order_by()
+    for pharmacy_id, created_at, status in tasks.values_list("pharmacy_id", "created_at", "status").iterator(
+        chunk_size=chunk_size
+    ):
+        fact = totals[(floor_hour(created_at), pharmacy_id)]
+        fact["tasks"] += 1
+        if status == DeliveryTask.Status.DONE:
+            fact["tasks_done"] += 1
+    return totals
+
+
+def _rebuild_days(days):
+    """Re-derive the daily facts for ``days`` (local dates) from the hourly ones."""
+    if not days:
+        return
+    hourly = (
+        HourlyPharmacyFact.objects.filter(
+            hour__gte=_day_start(min(days)), hour__lt=_day_start(max(days) + timedelta(days=1))
+        )
+        .annotate(day=TruncDate("hour"))
+        .filter(day__in=days)
+        .values("day", "pharmacy_id")
+        .annotate(**{field: Sum(field) for field in FACT_FIELDS})
+        .order_by()
+    )
+    DailyPharmacyFact.objects.filter(day__in=days).delete()
+    DailyPharmacyFact.objects.bulk_create([DailyPharmacyFact(**row) for row in hourly], batch_size=5000)
+
+
+def recompute(start, end, chunk_size=None):
+    """
+    Replace the hourly facts for the hours in ``[start, end)`` and the daily facts of the days they
+    fall on. Idempotent, so overlapping calls (backfill and refresh) are harmless.
+    """
+    start, end = floor_hour(start), floor_hour(end - timedelta(microseconds=1)) + HOUR
+    totals = _accumulate(start, end, chunk_size or _settings()["chunk_size"])
+    days = {timezone.localdate(start)}
+    hour = start
+    while hour < end:
+        days.add(timezone.localdate(hour))
+        hour += HOUR
+    with transaction.atomic():
+        HourlyPharmacyFact.objects.filter(hour__gte=start, hour__lt=end).delete()
+        HourlyPharmacyFact.objects.bulk_create(
+            [
+                HourlyPharmacyFact(hour=hour, pharmacy_id=pharmacy_id, **fact)
+                for (hour, pharmacy_id), fact in totals.items()
+            ],
+            batch_size=5000,
+        )
+        _rebuild_days(days)
+    return len(totals)
+
+
+def _spans(hours):
+    """Merge bucket starts into contiguous ``(start, end)`` ranges."""
+    spans = []
+    for hour in sorted(hours):
+        if spans and spans[-1][1] == hour:
+            spans[-1][1] = hour + HOUR
+        else:
+            spans.append([hour, hour + HOUR])
+    return spans
+
+
+def _changed(model, watermark, cutoff):
+    rows = model.objects.filter(updated_at__lte=cutoff)
+    if watermark.updated_at is not None:
+        rows = rows.filter(
+            Q(updated_at__gt=watermark.updated_at) | Q(updated_at=watermark.updated_at, id__gt=watermark.last_id)
+        )
+    return rows.order_by("updated_at", "id").values_list("updated_at", "id", "created_at")
+
+
+def refresh(batch_size=None, chunk_size=None):
+    """
+    Bring the facts up to date with rows changed since each source's high-water mark, reading at
+    most ``batch_size`` changed rows per transaction. Deleted rows are not seen; run ``backfill``
+    over their period to drop them. Returns the number of changed rows processed.
+    """
+    options = _settings()
+    batch_size = batch_size or options["chunk_size"]
+    cutoff = timezone.now() - options["settle"]
+    processed = 0
+    for name, model in SOURCES.items():
+        watermark, _ = RollupWatermark.objects.get_or_create(name=name)
+        while True:
+            batch = list(_changed(model, watermark, cutoff)[:batch_size])
+            if not batch:
+                break
+            with transaction.atomic():
+                for start, end in _spans({floor_hour(created_at) for _, _, created_at in batch}):
+                    recompute(start, end, chunk_size)
+                watermark.updated_at, watermark.last_id, _ = batch[-1]
+                watermark.save(update_fields=["updated_at", "last_id"])
+            processed += len(batch)
+    return processed
+
+
+def backfill(since=None, batch_hours=24, chunk_size=None, progress=None):
+    """
+    Recompute the facts from ``since`` (default: the first order or task) to now, ``batch_hours``
+    hours per transaction. A full backfill also moves the refresh watermarks to its start time.
+    """
+    cutoff = timezone.now() - _settings()["settle"]
+    if since is None:
+        earliest = [model.objects.aggregate(first=Min("created_at"))["first"] for model in SOURCES.values()]
+        earliest = [moment for moment in earliest if moment is not None]
+        if not earliest:
+            return 0
+        start = floor_hour(min(earliest))
+    else:
+        start = floor_hour(since)
+    end = floor_hour(timezone.now()) + HOUR
+    written = 0
+    while start < end:
+        stop = min(start + timedelta(hours=batch_hours), end)
+        written += recompute(start, stop, chunk_size)
+        if progress:
+            progress(stop, written)
+        start = stop
+    if since is None:
+        # Rows changed after the cutoff are seen again by refresh; recomputing them twice is harmless.
+        for name in SOURCES:
+            RollupWatermark.objects.update_or_create(name=name, defaults={"updated_at": cutoff, "last_id": 0})
+    return written
+
+
+def _with_rates(rows):
+    for row in rows:
+        row["cancellation_percent"] = round(100 * row["cancelled"] / row["orders"], 1) if row["orders"] else 0
+        row["average_delivery_minutes"] = (
+            round(row["delivery_seconds"] / row["delivered"] / 60) if row["delivered"] else None
+        )
+    return rows
+
+
+def daily_totals(days=14, today=None):
+    """All pharmacies together for each of the last ``days`` days, newest first."""
+    today = today or timezone.localdate()
+    rows = (
+        DailyPharmacyFact.objects.filter(day__gt=today - timedelta(days=days), day__lte=today)
+        .values("day")
+        .annotate(**{field: Sum(field) for field in FACT_FIELDS})
+        .order_by("-day")
+    )
+    return _with_rates(list(rows))
+
+
+def top_pharmacies(days=7, limit=10, today=None):
+    """The busiest pharmacies by orders over the last ``days`` days."""
+    today = today or timezone.localdate()
+    rows = (
+        DailyPharmacyFact.objects.filter(day__gt=today - timedelta(days=days), day__lte=today)
+        .values("pharmacy_id", "pharmacy__name")
+        .annotate(**{field: Sum(field) for field in FACT_FIELDS})
+        .order_by("-orders", "pharmacy_id")[:limit]
+    )
+    return _with_rates(list(rows))
+
+
+def hourly_totals(day=None):
+    """All pharmacies together for each hour of ``day`` that had activity."""
+    day = day or timezone.localdate()
+    rows = (
+        HourlyPharmacyFact.objects.filter(hour__gte=_day_start(day), hour__lt=_day_start(day + timedelta(days=1)))
+        .values("hour")
+        .annotate(**{field: Sum(field) for field in FACT_FIELDS})
+        .order_by("hour")
+    )
+    return _with_rates(list(rows))
@@ -4,3 +4,22 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from django.db.models import CharField
+        from django.db.models.functions import Lower
+        from django.db.models.signals import post_migrate
+
+        from .bootstrap import seed_after_migrate
+        from . import chat, checks, fragments, inbox, kpis, search
+
+        # `email__lower=value.lower()` compiles to LOWER(email) = ..., which the functional indexes
+        # serve; `__iexact` becomes LIKE on SQLite and UPPER() on Postgres and uses neither.
+        CharField.register_lookup(Lower)
+        post_migrate.connect(seed_after_migrate, sender=self)
+        checks.register_checks()
+        chat.connect_signals()
+        fragments.connect_signals()
+        inbox.connect_signals()
+        kpis.connect_signals()
+        search.connect_signals()
@@ -0,0 +1,50 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.db.models import IntegerField, Value
+
+from .models import Profile
+
+# What people type for a phone number: digits with optional "+", spaces, dashes, dots or brackets.
+PHONE_PATTERN = re.compile(r"^\+?[\d\s().-]+$")
+
+
+class IdentifierBackend(ModelBackend):
+    """
+    Sign in with a username, an email address or a phone number. One query resolves the identifier
+    to an account and the password is hashed exactly once, for unknown identifiers too, so a miss
+    costs as much as a wrong password.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        User = get_user_model()
+        if username is None:
+            username = kwargs.get(User.USERNAME_FIELD)
+        if not username or password is None:
+            return None
+        user = self.resolve(username.strip())
+        if user is None:
+            # Run the hasher anyway so response time does not reveal whether the account exists.
+            User().set_password(password)
+            return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
+
+    def resolve(self, identifier):
+        """
+        The account for ``identifier``: an exact username first, then a case-insensitive email, then
+        a phone number compared by its digits. Each branch of the UNION has its own index.
+        """
+        # The sign-in form checks the profile's role next, so it comes along.
+        users = get_user_model().objects.select_related("profile")
+        branches = [users.filter(username=identifier), users.filter(email__lower=identifier.lower())]
+        phone = Profile.normalize_phone(identifier)
+        if phone and PHONE_PATTERN.match(identifier):
+            branches.append(users.filter(profile__phone_normalized=phone))
+        ranked = [
+            branch.annotate(rank=Value(rank, output_field=IntegerField())) for rank, branch in enumerate(branches)
+        ]
+        candidates = ranked[0].union(*ranked[1:], all=True)
+        return min(candidates, key=lambda user: (user.rank, user.pk), default=None)
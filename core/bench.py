@@ -0,0 +1,504 @@
+import asyncio
+import math
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.messages.middleware import MessageMiddleware
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, transaction
+from django.test import AsyncRequestFactory, override_settings
+from django.test.client import Client
+from django.urls import reverse
+
+from . import chat, inbox, views
+from .fragments import WATCHED_MODELS, bump_generation
+from .models import ChatMessage, DeliveryTask, DistributorStatus, Order, Pharmacy, PharmacyApplication, Profile
+from .synthetic import SyntheticDataset
+
+DASHBOARDS = {
+    Profile.Role.ADMIN: ("admin_dashboard", "/dashboard/admin/"),
+    Profile.Role.CUSTOMER: ("customer_dashboard", "/dashboard/customer/"),
+    Profile.Role.PHARMACY: ("pharmacy_store_dashboard", "/dashboard/pharmacy-store/"),
+    Profile.Role.DISTRIBUTOR: ("distributor_dashboard", "/dashboard/distributor/"),
+}
+# Only the request-scoped parts of the middleware stack the dashboards depend on.
+REQUEST_MIDDLEWARE = (SessionMiddleware, AuthenticationMiddleware, MessageMiddleware)
+
+
+BENCH_PASSWORD = "pharmacygo-bench"
+
+
+def bench_username(role):
+    return f"bench-{role}@pharmacygo.local"
+
+
+@contextmanager
+def bench_user(role):
+    """A throwaway signed-in user with ``role``; yields its session key."""
+    user = get_user_model().objects.create_user(username=bench_username(role), password=BENCH_PASSWORD)
+    try:
+        Profile.objects.filter(user=user).update(role=role)
+        client = Client()
+        client.force_login(user)
+        yield client.session.session_key
+    finally:
+        user.delete()
+
+
+def invalidate_fragments():
+    """Make every cached fragment stale, the bench users' own inbox sections included."""
+    users = get_user_model().objects.filter(username__in=[bench_username(role) for role in Profile.Role.values])
+    bump_generation(*WATCHED_MODELS, *(inbox.generation(pk) for pk in users.values_list("pk", flat=True)))
+
+
+def _request(factory, path, session_key):
+    request = factory.get(path)
+    request.COOKIES["sessionid"] = session_key
+    for middleware in REQUEST_MIDDLEWARE:
+        middleware(lambda request: None).process_request(request)
+    return request
+
+
+def _percentile(ordered, fraction):
+    # Nearest rank, so small samples report a latency that was actually observed.
+    return ordered[max(0, math.ceil(len(ordered) * fraction) - 1)]
+
+
+def summarize(timings, elapsed):
+    ordered = sorted(timings)
+    return {
+        "requests": len(ordered),
+        "p50_ms": round(statistics.median(ordered) * 1000, 2),
+        "p95_ms": round(_percentile(ordered, 0.95) * 1000, 2),
+        "p99_ms": round(_percentile(ordered, 0.99) * 1000, 2),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 2),
+        "rps": round(len(ordered) / elapsed, 1),
+    }
+
+
+async def _drive(view, path, session_key, requests, concurrency, cold):
+    factory = AsyncRequestFactory()
+    slots = asyncio.Semaphore(concurrency)
+    timings = []
+
+    async def one():
+        async with slots:
+            if cold:
+                await sync_to_async(invalidate_fragments)()
+            request = _request(factory, path, session_key)
+            started = time.perf_counter()
+            response = await view(request)
+            timings.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                raise RuntimeError(f"{path} answered {response.status_code}")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return summarize(timings, time.perf_counter() - started)
+
+
+def bench_dashboard(role, requests=50, concurrency=8, cold=False):
+    """
+    Serve one dashboard ``requests`` times, ``concurrency`` at a time, through the sync view (run on
+    the shared thread, as ASGI runs sync views) and through its async variant.
+    """
+    name, path = DASHBOARDS[role]
+    variants = {
+        "sync": sync_to_async(getattr(views, name), thread_sensitive=True),
+        "async": getattr(views, f"{name}_async"),
+    }
+    with bench_user(role) as session_key:
+        return {
+            label: asyncio.run(_drive(view, path, session_key, requests, concurrency, cold))
+            for label, view in variants.items()
+        }
+
+
+# "default" is what a bare ENGINE/NAME entry gets: rollback journal, DEFERRED transactions and a
+# new connection per request (CONN_MAX_AGE = 0). "tuned" is settings.SQLITE_OPTIONS, kept open.
+WRITE_PROFILES = {
+    "default": ({}, False),
+    "tuned": (settings.SQLITE_OPTIONS, True),
+}
+_BENCH_SCHEMA = (
+    "CREATE TABLE bench_counter (id INTEGER PRIMARY KEY, value INTEGER NOT NULL)",
+    "INSERT INTO bench_counter (id, value) VALUES (1, 0)",
+    "CREATE TABLE bench_order (id INTEGER PRIMARY KEY, code TEXT NOT NULL, created_at REAL NOT NULL)",
+)
+
+
+@contextmanager
+def scratch_sqlite(alias, options):
+    """A throwaway SQLite file registered as database ``alias`` with ``options``."""
+    directory = tempfile.mkdtemp(prefix="pharmacygo-bench-")
+    config = {"ENGINE": "django.db.backends.sqlite3", "NAME": str(Path(directory) / "bench.sqlite3"), "OPTIONS": options}
+    connections.settings[alias] = connections.configure_settings(
+        {DEFAULT_DB_ALIAS: connections.settings[DEFAULT_DB_ALIAS], alias: config}
+    )[alias]
+    try:
+        with connections[alias].cursor() as cursor:
+            for statement in _BENCH_SCHEMA:
+                cursor.execute(statement)
+        yield alias
+    finally:
+        connections[alias].close()
+        del connections.settings[alias]
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def _write(alias, worker, sequence):
+    # Read-then-write, like reserving a code block or checking an order's version before moving it.
+    with transaction.atomic(using=alias), connections[alias].cursor() as cursor:
+        cursor.execute("SELECT value FROM bench_counter WHERE id = 1")
+        cursor.fetchone()
+        cursor.execute("UPDATE bench_counter SET value = value + 1 WHERE id = 1")
+        cursor.execute(
+            "INSERT INTO bench_order (code, created_at) VALUES (%s, %s)", [f"{worker}-{sequence}", time.time()]
+        )
+
+
+def _read(alias):
+    with connections[alias].cursor() as cursor:
+        cursor.execute("SELECT id, code FROM bench_order ORDER BY id DESC LIMIT 20")
+        cursor.fetchall()
+
+
+def bench_writes(profile, writers=8, readers=4, transactions=100):
+    """
+    ``writers`` threads each commit ``transactions`` small read-then-write transactions while
+    ``readers`` threads poll the newest rows, against a scratch database set up per ``profile``.
+    A "database is locked" error counts as a failed request; it is not retried.
+    """
+    options, persistent = WRITE_PROFILES[profile]
+    alias = f"bench_{profile}"
+    timings, failures, reads = [], [], []
+    done = threading.Event()
+    start = threading.Barrier(writers + readers + 1)
+
+    def writer(worker):
+        start.wait()
+        try:
+            for sequence in range(transactions):
+                started = time.perf_counter()
+                try:
+                    _write(alias, worker, sequence)
+                    timings.append(time.perf_counter() - started)
+                except OperationalError:
+                    failures.append(time.perf_counter() - started)
+                if not persistent:
+                    connections[alias].close()
+        finally:
+            connections[alias].close()
+
+    def reader():
+        start.wait()
+        count = 0
+        try:
+            while not done.is_set():
+                try:
+                    _read(alias)
+                    count += 1
+                except OperationalError:
+                    pass
+                if not persistent:
+                    connections[alias].close()
+        finally:
+            reads.append(count)
+            connections[alias].close()
+
+    with scratch_sqlite(alias, options):
+        threads = [threading.Thread(target=writer, args=(index,)) for index in range(writers)]
+        threads += [threading.Thread(target=reader) for _ in range(readers)]
+        for thread in threads:
+            thread.start()
+        start.wait()
+        started = time.perf_counter()
+        for thread in threads[:writers]:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        done.set()
+        for thread in threads[writers:]:
+            thread.join()
+    stats = summarize(timings, elapsed) if timings else {"requests": 0, "rps": 0}
+    stats["failed"] = len(failures)
+    stats["reads_per_s"] = round(sum(reads) / elapsed, 1)
+    return stats
+
+
+DATASET_SIZES = (1_000, 100_000, 1_000_000)
+JSON = {"Accept": "application/json"}
+
+
+@dataclass
+class ViewCase:
+    """One kind of request to a URL in ``core/urls.py``; ``path`` and ``data`` may take the repetition."""
+
+    name: str
+    role: str | None
+    path: object
+    method: str = "get"
+    data: object = None
+    headers: dict = field(default_factory=dict)
+    label: str = ""
+    fresh_login: bool = False
+
+    def __post_init__(self):
+        self.label = self.label or self.name
+
+    def send(self, client, index):
+        path = self.path(index) if callable(self.path) else self.path
+        data = self.data(index) if callable(self.data) else self.data
+        return getattr(client, self.method)(path, data, headers=self.headers)
+
+
+def dataset_shape(orders):
+    """Row counts for a generated dataset, scaled with the number of orders."""
+    return {
+        "users": max(50, orders // 200),
+        "pharmacies": min(5_000, max(50, orders // 500)),
+        "orders": orders,
+        "stock": max(500, orders // 20),
+        "tasks": max(200, orders // 10),
+        "notifications": max(10, orders // 1_000),
+        "messages": max(100, orders // 50),
+    }
+
+
+@contextmanager
+def database_file(path):
+    """Point the default SQLite connection at ``path`` for the duration."""
+    connection = connections[DEFAULT_DB_ALIAS]
+    original = connection.settings_dict["NAME"]
+    connection.close()
+    connection.settings_dict["NAME"] = str(path)
+    try:
+        yield
+    finally:
+        connection.close()
+        connection.settings_dict["NAME"] = original
+
+
+def prepare_dataset(orders, directory, progress=None):
+    """A migrated SQLite file with a generated dataset of ``orders`` orders; built once, then reused."""
+    path = Path(directory) / f"orders-{orders}.sqlite3"
+    if path.exists():
+        return path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    building = path.with_name(f"{path.name}.building")
+    building.unlink(missing_ok=True)
+    with database_file(building):
+        call_command("migrate", verbosity=0)
+        SyntheticDataset(progress=progress).generate(**dataset_shape(orders))
+        with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+            cursor.execute("ANALYZE")
+    building.rename(path)
+    return path
+
+
+def _ids(queryset, limit):
+    return list(queryset.values_list("pk", flat=True)[:limit])
+
+
+def _pick(ids, index):
+    return ids[index % len(ids)] if ids else 0
+
+
+def view_cases(requests):
+    """
+    Requests covering every URL name in ``core/urls.py`` against the current database. Actions take
+    a different row on each repetition so they keep doing real work instead of being refused.
+    """
+    admin, customer = Profile.Role.ADMIN, Profile.Role.CUSTOMER
+    store, distributor = Profile.Role.PHARMACY, Profile.Role.DISTRIBUTOR
+    batch = 10
+    bulk = _ids(Order.objects.filter(status=Order.Status.PENDING).order_by("-id"), (requests + 1) * batch)
+    cancellable = _ids(
+        Order.objects.filter(status__in=[Order.Status.PACKED, Order.Status.OUT]).order_by("-id"), requests + 1
+    )
+    awaiting = _ids(DeliveryTask.objects.filter(status=DeliveryTask.Status.AWAITING).order_by("-id"), requests + 1)
+    applications = _ids(PharmacyApplication.objects.order_by("id"), requests + 1)
+    statuses = _ids(DistributorStatus.objects.order_by("id"), requests + 1)
+    pharmacy = Pharmacy.objects.order_by("id").first()
+    task = DeliveryTask.objects.order_by("id").first()
+    user = get_user_model().objects.get(username=bench_username(customer))
+    thread = chat.start_thread(user, "Benchmark")
+    for number in range(chat.PAGE_SIZE + 10):
+        chat.post_message(thread, user, ChatMessage.Sender.CUSTOMER, f"Benchmark message {number}")
+    run = uuid.uuid4().hex[:8]
+    return [
+        ViewCase("login", None, reverse("login")),
+        ViewCase(
+            "login",
+            None,
+            reverse("login"),
+            "post",
+            {"username": bench_username(customer), "password": BENCH_PASSWORD, "role_hint": customer},
+            label="login:post",
+        ),
+        ViewCase("signup", None, reverse("signup")),
+        ViewCase("forgot_password", None, reverse("forgot_password")),
+        ViewCase("logout", customer, reverse("logout"), fresh_login=True),
+        ViewCase("admin_dashboard", admin, reverse("admin_dashboard")),
+        ViewCase("admin_user_segment", admin, reverse("admin_user_segment", args=["customers"])),
+        ViewCase("admin_analytics", admin, reverse("admin_analytics")),
+        ViewCase(
+            "bulk_order_action",
+            admin,
+            reverse("bulk_order_action"),
+            "post",
+            lambda index: {"action": "pack", "orders": bulk[index * batch : (index + 1) * batch] or bulk[:batch]},
+            headers=JSON,
+        ),
+        ViewCase(
+            "order_action", admin, lambda index: reverse("order_action", args=[_pick(cancellable, index), "cancel"]), "post"
+        ),
+        ViewCase(
+            "application_action",
+            admin,
+            lambda index: reverse("application_action", args=[_pick(applications, index), "approve"]),
+            "post",
+        ),
+        ViewCase("customer_dashboard", customer, reverse("customer_dashboard")),
+        ViewCase(
+            "create_customer_order",
+            customer,
+            reverse("create_customer_order"),
+            "post",
+            lambda index: {"pharmacy": pharmacy.pk, "items": "Benchmark", "idempotency_key": f"bench-{run}-{index}"},
+            headers=JSON,
+        ),
+        ViewCase("order_stream", customer, reverse("order_stream")),
+        ViewCase("start_chat", customer, reverse("start_chat"), "post", {"body": "Benchmark question"}, headers=JSON),
+        ViewCase("chat_messages", customer, reverse("chat_messages", args=[thread.pk])),
+        ViewCase(
+            "chat_messages",
+            customer,
+            reverse("chat_messages", args=[thread.pk]),
+            "post",
+            {"body": "Benchmark reply"},
+            headers=JSON,
+            label="chat_messages:post",
+        ),
+        ViewCase(
+            "nearby_pharmacies",
+            customer,
+            f"{reverse('nearby_pharmacies')}?lat={pharmacy.latitude}&lng={pharmacy.longitude}",
+        ),
+        ViewCase("search_pharmacies", customer, f"{reverse('search_pharmacies')}?q=pharm"),
+        ViewCase("pharmacy_detail", customer, reverse("pharmacy_detail", args=[pharmacy.pk])),
+        ViewCase("pharmacy_store_dashboard", store, reverse("pharmacy_store_dashboard")),
+        ViewCase("distributor_dashboard", distributor, reverse("distributor_dashboard")),
+        ViewCase(
+            "delivery_task_action",
+            distributor,
+            lambda index: reverse("delivery_task_action", args=[_pick(awaiting, index), "accept"]),
+            "post",
+        ),
+        ViewCase(
+            "distributor_status_action",
+            distributor,
+            lambda index: reverse("distributor_status_action", args=[_pick(statuses, index)]),
+            "post",
+        ),
+        ViewCase(
+            "distributor_status_update",
+            distributor,
+            lambda index: reverse("distributor_status_update", args=[_pick(statuses, index)]),
+            "post",
+            {"status": "On the way"},
+        ),
+        ViewCase("delivery_detail", distributor, reverse("delivery_detail", args=[task.pk])),
+    ]
+
+
+def uncovered(cases):
+    from .urls import urlpatterns
+
+    return sorted({pattern.name for pattern in urlpatterns} - {case.name for case in cases})
+
+
+def _run_case(case, clients, requests, cold):
+    timings, queries, sizes, statuses = [], [], [], set()
+    user = get_user_model().objects.get(username=bench_username(case.role)) if case.fresh_login else None
+    # The first request warms caches and connections and is not counted.
+    for index in range(requests + 1):
+        if case.role is None or case.fresh_login:
+            client = Client()
+            if user is not None:
+                client.force_login(user)
+        else:
+            client = clients[case.role]
+        if cold:
+            invalidate_fragments()
+        started = time.perf_counter()
+        response = case.send(client, index)
+        body = b"".join(response.streaming_content) if response.streaming else response.content
+        elapsed = time.perf_counter() - started
+        if index:
+            timings.append(elapsed)
+            queries.append(response.wsgi_request.metrics.queries)
+            sizes.append(len(body))
+            statuses.add(response.status_code)
+    stats = summarize(timings, sum(timings))
+    stats.update(queries=max(queries), bytes=round(statistics.median(sizes)), status=sorted(statuses))
+    return stats
+
+
+def bench_views(database, requests=20, cold=False, only=None):
+    """
+    Drive every case of ``view_cases`` ``requests`` times through the test client against a copy of
+    the SQLite file ``database`` (actions write to the copy). Returns stats keyed by case label.
+    """
+    directory = Path(tempfile.mkdtemp(prefix="pharmacygo-bench-"))
+    work = directory / "work.sqlite3"
+    shutil.copyfile(database, work)
+    metrics = {**getattr(settings, "REQUEST_METRICS", {}), "LOG": False, "BUDGET_MODE": "off"}
+    try:
+        with database_file(work), override_settings(REQUEST_METRICS=metrics, DATABASE_REPLICAS=[]), ExitStack() as stack:
+            cache.clear()
+            clients = {}
+            for role in Profile.Role.values:
+                clients[role] = Client()
+                clients[role].cookies[settings.SESSION_COOKIE_NAME] = stack.enter_context(bench_user(role))
+            cases = view_cases(requests)
+            missing = uncovered(cases)
+            if missing:
+                raise ValueError(f"No benchmark case for: {', '.join(missing)}")
+            return {
+                case.label: _run_case(case, clients, requests, cold)
+                for case in cases
+                if not only or case.name in only or case.label in only
+            }
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def compare(results, baseline, tolerance=0.25, floor_ms=2.0):
+    """
+    Regressions of ``results`` against ``baseline`` (both as written by ``bench_views``): any extra
+    query, or a p95 more than ``tolerance`` (plus ``floor_ms`` of noise) slower.
+    """
+    regressions = []
+    for size, cases in results["sizes"].items():
+        for label, stats in cases.items():
+            before = baseline.get("sizes", {}).get(size, {}).get(label)
+            if before is None:
+                continue
+            if stats["queries"] > before["queries"]:
+                regressions.append(f"{label} @ {size} orders: {before['queries']} -> {stats['queries']} queries")
+            if stats["p95_ms"] > before["p95_ms"] * (1 + tolerance) + floor_ms:
+                regressions.append(f"{label} @ {size} orders: p95 {before['p95_ms']} -> {stats['p95_ms']} ms")
+    return regressions
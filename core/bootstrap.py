@@ -1,9 +1,15 @@
-from datetime import datetime
+import threading
+from datetime import timedelta
 from decimal import Decimal
 
+from django.db import DEFAULT_DB_ALIAS, connections, router, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.utils import timezone
+
 from . import data
 from .models import (
     ChatMessage,
+    ChatThread,
     DeliveryTask,
     DistributorStatus,
     Notification,
@@ -15,10 +21,18 @@ from .models import (
     PharmacyApplication,
     PrescriptionRequest,
     Profile,
+    SeedState,
+    StatusOption,
     StockItem,
     TimelineEvent,
 )
 
+SEED_KEY = "core"
+
+# Version already confirmed for this process; lets the request path skip the DB entirely.
+_seeded_version = None
+_seed_lock = threading.Lock()
+
 
 def _parse_distance(raw):
     raw = str(raw).replace('km', '').replace(' ', '').replace(',', '.')
@@ -28,19 +42,15 @@ def _parse_distance(raw):
         return Decimal("0")
 
 
-def _parse_time(raw):
-    try:
-        return datetime.strptime(raw, "%H:%M").time()
-    except ValueError:
-        return datetime.strptime("00:00", "%H:%M").time()
-
-
 def _get_or_create_pharmacy(name):
+    latitude, longitude = data.PHARMACY_LOCATIONS.get(name, (None, None))
     defaults = {
         "distance_km": Decimal("1.2"),
         "rating": Decimal("4.7"),
         "pin_top": "40%",
         "pin_left": "40%",
+        "latitude": latitude,
+        "longitude": longitude,
     }
     pharmacy, _ = Pharmacy.objects.get_or_create(name=name, defaults=defaults)
     return pharmacy
@@ -49,14 +59,23 @@ def _get_or_create_pharmacy(name):
 def ensure_seed_records():
     if not Pharmacy.objects.exists():
         for item in data.CUSTOMER_PHARMACIES:
+            latitude, longitude = data.PHARMACY_LOCATIONS.get(item["name"], (None, None))
             Pharmacy.objects.create(
                 name=item["name"],
                 distance_km=_parse_distance(item["distance"].replace(" km", "")),
                 rating=Decimal(str(item["rating"])),
                 pin_top=item["pin"]["top"],
                 pin_left=item["pin"]["left"],
+                latitude=latitude,
+                longitude=longitude,
             )
 
+    for name, (latitude, longitude) in data.PHARMACY_LOCATIONS.items():
+        for pharmacy in Pharmacy.objects.filter(name=name, latitude__isnull=True):
+            pharmacy.latitude = latitude
+            pharmacy.longitude = longitude
+            pharmacy.save(update_fields=["latitude", "longitude", "updated_at"])
+
     if not PharmacyApplication.objects.exists():
         for application in data.PHARMACY_APPROVALS:
             PharmacyApplication.objects.create(
@@ -110,13 +129,14 @@ def ensure_seed_records():
                 status=status_map.get(item["status"], PrescriptionRequest.Status.AWAITING),
             )
 
-    if not ChatMessage.objects.exists():
+    if not ChatThread.objects.exists():
+        thread = ChatThread.objects.create(subject=data.DOCTOR_CHAT_SUBJECT)
         for message in data.DOCTOR_CHAT:
             ChatMessage.objects.create(
+                thread=thread,
                 sender=message["sender"],
                 author=message["name"],
                 body=message["message"],
-                sent_at=_parse_time(message["time"]),
             )
 
     if not Patient.objects.exists():
@@ -157,7 +177,7 @@ def ensure_seed_records():
                 name=stock["name"],
                 quantity=stock["qty"],
                 status=stock["status"],
-                expires_in_days=stock.get("expires_in_days", 30),
+                expires_on=timezone.localdate() + timedelta(days=stock.get("expires_in_days", 30)),
             )
 
     if not DeliveryTask.objects.exists():
@@ -183,6 +203,15 @@ def ensure_seed_records():
                 is_active=(idx == 2),
             )
 
+    if not StatusOption.objects.exists():
+        StatusOption.objects.bulk_create(
+            [
+                StatusOption(label=label, position=position)
+                for position, label in enumerate(data.DISTRIBUTOR_STATUS_PRESETS)
+            ],
+            ignore_conflicts=True,
+        )
+
     if not DistributorStatus.objects.exists():
         for status in data.DISTRIBUTOR_STATUS_BOARD:
             DistributorStatus.objects.create(
@@ -190,3 +219,45 @@ def ensure_seed_records():
                 pharmacy=status["pharmacy"],
                 status=status["status"],
             )
+
+
+def ensure_seeded(force=False, recheck=False):
+    """Seed once per ``data.SEED_VERSION``; returns True when fixtures were applied."""
+    global _seeded_version
+    if _seeded_version == data.SEED_VERSION and not (force or recheck):
+        return False
+    with _seed_lock:
+        with transaction.atomic():
+            state, _ = SeedState.objects.select_for_update().get_or_create(key=SEED_KEY)
+            applied = force or state.version != data.SEED_VERSION
+            if applied:
+                ensure_seed_records()
+                state.version = data.SEED_VERSION
+                state.save(update_fields=["version", "seeded_at"])
+        _seeded_version = data.SEED_VERSION
+    return applied
+
+
+def reset_seed_flag():
+    global _seeded_version
+    _seeded_version = None
+
+
+def _fully_migrated(using):
+    executor = MigrationExecutor(connections[using])
+    return not executor.migration_plan(executor.loader.graph.leaf_nodes())
+
+
+def seed_after_migrate(sender, using=DEFAULT_DB_ALIAS, **kwargs):
+    from django.conf import settings
+
+    if not getattr(settings, "SEED_ON_MIGRATE", True):
+        return
+    if using != router.db_for_write(SeedState):
+        # Migrating or flushing another database, such as a replica; the seed lives on the primary.
+        return
+    if not _fully_migrated(using):
+        # The seed is written through the current models, so it needs the current schema; a partial
+        # or backwards migrate leaves seeding to the next full one.
+        return
+    ensure_seeded(recheck=True)
@@ -0,0 +1,103 @@
+from django.db import transaction
+from django.db.models.signals import post_save
+
+from . import streams
+from .models import ChatMessage, ChatThread
+from .pagination import NEWEST_FIRST, OLDEST_FIRST, decode_cursor, encode_cursor, paginate_keyset
+
+PAGE_SIZE = 50
+MAX_MESSAGE_LENGTH = 2000
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def topic(thread_id):
+    return f"chat:{thread_id}"
+
+
+def message_payload(message):
+    return {
+        "id": message.pk,
+        "sender": message.sender,
+        "author": message.author,
+        "body": message.body,
+        "created_at": message.created_at.isoformat(),
+    }
+
+
+def _position(message):
+    return encode_cursor([message.created_at, message.pk])
+
+
+def messages_since(thread, cursor, limit=PAGE_SIZE):
+    """
+    Messages after ``cursor`` oldest first, as one seek on the ``(thread, created_at, id)`` index.
+    The returned ``cursor`` is where the next call should resume; it stays put when nothing is new.
+    An empty ``cursor`` starts from the first message of the thread.
+    """
+    if cursor and decode_cursor(ChatMessage, OLDEST_FIRST, cursor) is None:
+        raise InvalidCursor(cursor)
+    page = paginate_keyset(thread.messages.all(), OLDEST_FIRST, cursor, limit)
+    return {
+        "messages": [message_payload(message) for message in page],
+        "cursor": _position(page.items[-1]) if page else cursor,
+        "has_more": page.has_next,
+    }
+
+
+def recent_messages(thread, before=None, limit=PAGE_SIZE):
+    """The newest messages (or those older than ``before``) oldest first, plus the cursor for older ones."""
+    page = paginate_keyset(thread.messages.all(), NEWEST_FIRST, before, limit)
+    return page.items[::-1], page.next_cursor
+
+
+def resume_cursor(messages):
+    """Cursor for ``messages_since`` that continues after the last of ``messages``."""
+    return _position(messages[-1]) if messages else ""
+
+
+def history(thread, before=None, limit=PAGE_SIZE):
+    """
+    A page of history for display. ``before`` pages further back; ``cursor`` is only set for the
+    newest page and feeds ``messages_since``.
+    """
+    if before and decode_cursor(ChatMessage, NEWEST_FIRST, before) is None:
+        raise InvalidCursor(before)
+    messages, older = recent_messages(thread, before, limit)
+    payload = {"messages": [message_payload(message) for message in messages], "before": older}
+    if not before:
+        payload["cursor"] = resume_cursor(messages)
+    return payload
+
+
+def latest_thread(user):
+    return ChatThread.objects.filter(customer=user).order_by("-updated_at", "-id").first()
+
+
+def start_thread(user, subject):
+    return ChatThread.objects.create(customer=user, subject=subject)
+
+
+def post_message(thread, user, sender, body):
+    return ChatMessage.objects.create(
+        thread=thread,
+        user=user,
+        sender=sender,
+        author=user.get_full_name() or user.get_username(),
+        body=body,
+    )
+
+
+def _message_saved(sender, instance, created=False, raw=False, **kwargs):
+    if not created or raw:
+        return
+    # .update() keeps the thread write to one column; admin replies take this path too.
+    ChatThread.objects.filter(pk=instance.thread_id).update(updated_at=instance.created_at)
+    # Long-polling readers only need a wake-up; they re-read from their own cursor.
+    transaction.on_commit(lambda: streams.publish(topic(instance.thread_id), {"id": instance.pk}))
+
+
+def connect_signals():
+    post_save.connect(_message_saved, sender=ChatMessage, dispatch_uid="chat:message")
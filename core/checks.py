@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+
+# Backends whose entries are invisible to other processes.
+PROCESS_LOCAL_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+def check_fragment_generations(app_configs, **kwargs):
+    alias = getattr(settings, "FRAGMENT_GENERATION_CACHE", "default")
+    backend = settings.CACHES.get(alias, {}).get("BACKEND", "")
+    if backend not in PROCESS_LOCAL_CACHES:
+        return []
+    return [
+        Warning(
+            f"Dashboard fragment generations are kept in the process-local {alias!r} cache.",
+            hint=(
+                "A write handled by one worker will not invalidate fragments cached by the others; "
+                "point FRAGMENT_GENERATION_CACHE at a file-based, Redis or Memcached cache."
+            ),
+            id="core.W001",
+        )
+    ]
+
+
+def register_checks():
+    register(check_fragment_generations)
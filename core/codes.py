@@ -0,0 +1,116 @@
+import os
+import threading
+from itertools import chain
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from .models import CodeSequence
+
+# Crockford base32: no I, L, O or U, and case-insensitive, so codes survive being read out loud.
+ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+CHECK_ALPHABET = ALPHABET + "*~$=U"
+DECODE = {char: value for value, char in enumerate(CHECK_ALPHABET)}
+DECODE.update({"O": 0, "I": 1, "L": 1})
+
+ORDER_PREFIX = "#PG-"
+MIN_WIDTH = 6
+# Odd, so multiplying modulo a power of two is a bijection: consecutive sequence values map to
+# unrelated-looking codes without ever colliding.
+SCRAMBLE = 387420489
+
+
+def encode(number, width=MIN_WIDTH):
+    chars = []
+    for _ in range(width):
+        number, digit = divmod(number, 32)
+        chars.append(ALPHABET[digit])
+    return "".join(reversed(chars))
+
+
+def check_symbol(number):
+    return CHECK_ALPHABET[number % 37]
+
+
+def format_code(value, prefix=ORDER_PREFIX):
+    """Render sequence ``value`` as a fixed-width scrambled base32 code plus a mod-37 check symbol."""
+    width = MIN_WIDTH
+    while value >= 32 ** width:
+        width += 2
+    scrambled = value * SCRAMBLE % 32 ** width
+    return f"{prefix}{encode(scrambled, width)}{check_symbol(scrambled)}"
+
+
+def is_valid(code, prefix=ORDER_PREFIX):
+    """True when ``code`` is well formed and its check symbol matches (catches typos and swaps)."""
+    body = (code or "").strip().upper().replace("-", "")
+    prefix = prefix.upper().replace("-", "")
+    payload = body[len(prefix):]
+    if not body.startswith(prefix) or len(payload) < MIN_WIDTH + 1:
+        return False
+    number = 0
+    for char in payload[:-1]:
+        value = DECODE.get(char)
+        if value is None or value >= 32:
+            return False
+        number = number * 32 + value
+    return DECODE.get(payload[-1]) == number % 37
+
+
+def reserve_block(name, size):
+    """Claim ``size`` consecutive values from the named sequence; returns ``range`` over them."""
+    with transaction.atomic():
+        CodeSequence.objects.bulk_create([CodeSequence(name=name)], ignore_conflicts=True)
+        # The UPDATE takes the row (Postgres) or database (SQLite) write lock, so the read that
+        # follows sees exactly the block this worker claimed.
+        CodeSequence.objects.filter(name=name).update(next_value=F("next_value") + size)
+        end = CodeSequence.objects.filter(name=name).values_list("next_value", flat=True).get()
+    return range(end - size, end)
+
+
+class BlockAllocator:
+    """Hands out sequence values from blocks reserved per worker process, one DB round trip per block."""
+
+    def __init__(self, name, block_size=None):
+        self.name = name
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._block = iter(())
+        self._pid = None
+
+    def _size(self):
+        return self.block_size or getattr(settings, "ORDER_CODE_BLOCK_SIZE", 50)
+
+    def next_value(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                # A forked worker must not reuse the parent's half-spent block.
+                self._block, self._pid = iter(()), os.getpid()
+            value = next(self._block, None)
+            if value is None:
+                block = iter(reserve_block(self.name, self._size()))
+                value = next(block)
+                if transaction.get_connection().in_atomic_block:
+                    # The claim is undone if the caller's transaction rolls back, so only keep the rest of
+                    # the block once it commits; otherwise another worker may be handed the same values.
+                    transaction.on_commit(lambda: self._adopt(block))
+                else:
+                    self._block = block
+            return value
+
+    def _adopt(self, block):
+        with self._lock:
+            if self._pid == os.getpid():
+                self._block = chain(self._block, block)
+
+    def reset(self):
+        with self._lock:
+            self._block = iter(())
+
+
+order_codes = BlockAllocator("order")
+
+
+def next_order_code():
+    return format_code(order_codes.next_value())
@@ -1,10 +1,7 @@
 from datetime import datetime
 
-ADMIN_KPIS = [
-    {"label": "Orders today", "value": "1,248", "delta": "+12% vs yesterday"},
-    {"label": "Avg. delivery", "value": "24 min", "delta": "-3 min faster"},
-    {"label": "Active pharmacies", "value": "86", "delta": "+4 new"},
-]
+# Bump whenever the fixtures below change so every database reseeds exactly once.
+SEED_VERSION = 2
 
 ADMIN_RECENT_ORDERS = [
     {"order_id": "#PG-2148", "customer": "Laylo Karimova", "pharmacy": "PharmaLife Downtown", "status": "Out for delivery", "eta": "12 min"},
@@ -39,10 +36,11 @@ DOCTOR_PRESCRIPTIONS = [
     {"patient": "Nodira Jura", "condition": "Hypertension", "requested": "Losartan 50mg", "status": "Awaiting"},
 ]
 
+DOCTOR_CHAT_SUBJECT = "Allergy medication"
 DOCTOR_CHAT = [
-    {"sender": "customer", "name": "Laylo", "time": "09:18", "message": "Doctor, can I take Xyzal twice today?"},
-    {"sender": "doctor", "name": "Dr. Saodat", "time": "09:19", "message": "Keep it to one dose every 24 hours."},
-    {"sender": "customer", "name": "Laylo", "time": "09:20", "message": "Noted, thank you!"},
+    {"sender": "customer", "name": "Laylo", "message": "Doctor, can I take Xyzal twice today?"},
+    {"sender": "doctor", "name": "Dr. Saodat", "message": "Keep it to one dose every 24 hours."},
+    {"sender": "customer", "name": "Laylo", "message": "Noted, thank you!"},
 ]
 
 DOCTOR_PATIENTS = [
@@ -57,6 +55,15 @@ CUSTOMER_PHARMACIES = [
     {"name": "CarePoint Sergeli", "distance": "1.6 km", "rating": 4.8, "pin": {"top": "18%", "left": "72%"}},
 ]
 
+# Approximate Tashkent coordinates (lat, lng) for every seeded pharmacy.
+PHARMACY_LOCATIONS = {
+    "PharmaLife Downtown": (41.3111, 69.2797),
+    "UzMed Express": (41.2856, 69.2044),
+    "CarePoint Sergeli": (41.2250, 69.2200),
+    "CityMeds Park": (41.3265, 69.2284),
+    "UzPharma Green": (41.3380, 69.3350),
+}
+
 CUSTOMER_ORDERS = [
     {"order_id": "#PG-2148", "items": "Xyzal 5mg", "status": "Courier assigned", "progress": "In progress"},
     {"order_id": "#PG-2091", "items": "Amoxil 500mg", "status": "Delivered", "progress": "Delivered"},
@@ -79,6 +86,8 @@ CUSTOMER_NOTIFICATIONS = [
     {"title": "New promo: 15% off immunity boosters", "type": "warning"},
 ]
 
+DISTRIBUTOR_STATUS_PRESETS = ["Awaiting pickup", "In progress", "Delivered", "Delayed"]
+
 DISTRIBUTOR_STOCK = [
     {"sku": "AMX-500", "name": "Amoxil 500mg", "qty": 320, "status": "Healthy", "expires_in_days": 45},
     {"sku": "GLC-20", "name": "Glucophage XR", "qty": 110, "status": "Watch", "expires_in_days": 18},
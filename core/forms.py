@@ -1,5 +1,5 @@
 from django import forms
-from django.contrib.auth import get_user_model
+from django.contrib.auth import authenticate, get_user_model
 from django.contrib.auth.forms import AuthenticationForm
 from django.contrib.auth.password_validation import validate_password
 
@@ -69,7 +69,7 @@ class SignUpForm(StyledFormMixin, forms.Form):
 
         identifier = phone if role == Profile.Role.CUSTOMER else email
         if identifier:
-            if User.objects.filter(username__iexact=identifier).exists():
+            if User.objects.filter(username__lower=identifier.lower()).exists():
                 self.add_error("email" if role != Profile.Role.CUSTOMER else "phone", "Account already exists for this identifier.")
 
         if password1 and password2 and password1 != password2:
@@ -129,20 +129,20 @@ class PaymentCardForm(StyledFormMixin, forms.ModelForm):
 class StockItemForm(StyledFormMixin, forms.ModelForm):
     class Meta:
         model = StockItem
-        fields = ["sku", "name", "quantity", "status", "expires_in_days"]
+        fields = ["sku", "name", "quantity", "status", "expires_on"]
         labels = {
             "sku": "SKU",
             "name": "Medicine",
             "quantity": "Qty",
             "status": "Status",
-            "expires_in_days": "Days till expiry",
+            "expires_on": "Expiry date",
         }
         widgets = {
             "sku": forms.TextInput(attrs={"placeholder": "AMX-500"}),
             "name": forms.TextInput(attrs={"placeholder": "Amoxil 500mg"}),
             "quantity": forms.NumberInput(attrs={"min": 0}),
             "status": forms.TextInput(attrs={"placeholder": "Healthy"}),
-            "expires_in_days": forms.NumberInput(attrs={"min": 1, "placeholder": "45"}),
+            "expires_on": forms.DateInput(attrs={"type": "date"}),
         }
 
     def __init__(self, *args, **kwargs):
@@ -181,26 +181,5 @@ class IdentifierAuthenticationForm(StyledFormMixin, AuthenticationForm):
         return self.cleaned_data
 
     def _attempt_auth(self, identifier, password):
-        from django.contrib.auth import authenticate
-
-        user = authenticate(self.request, username=identifier, password=password)
-        if user:
-            return user
-
-        email_matches = User.objects.filter(email__iexact=identifier).order_by("id")
-        if email_matches.exists():
-            email_match = email_matches.first()
-            user = authenticate(self.request, username=email_match.username, password=password)
-            if user:
-                return user
-
-        from .models import Profile
-
-        try:
-            profile = Profile.objects.select_related("user").get(phone=identifier)
-            user = authenticate(self.request, username=profile.user.username, password=password)
-            if user:
-                return user
-        except Profile.DoesNotExist:
-            pass
-        return None
+        # ``core.backends.IdentifierBackend`` resolves usernames, emails and phone numbers.
+        return authenticate(self.request, username=identifier, password=password)
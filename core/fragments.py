@@ -0,0 +1,113 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models.signals import post_delete, post_save
+
+from . import routers
+from .models import (
+    ChatMessage,
+    ChatThread,
+    DeliveryTask,
+    DistributorStatus,
+    Notification,
+    Order,
+    PaymentCard,
+    PaymentProvider,
+    Pharmacy,
+    PharmacyApplication,
+    Profile,
+    StatusOption,
+    StockItem,
+    TimelineEvent,
+)
+
+GENERATION_PREFIX = "fragments:gen:"
+FRAGMENT_PREFIX = "fragments:html:"
+
+# Writes to any of these bump a per-model generation; cached sections that depend on the
+# model stop matching and are re-rendered on the next request.
+WATCHED_MODELS = (
+    Order,
+    Pharmacy,
+    StockItem,
+    DeliveryTask,
+    DistributorStatus,
+    Notification,
+    Profile,
+    PharmacyApplication,
+    PaymentProvider,
+    PaymentCard,
+    TimelineEvent,
+    StatusOption,
+    ChatThread,
+    ChatMessage,
+)
+
+
+def generation_cache():
+    """Where the counters live; shared by every worker, unlike the per-process cache holding the HTML."""
+    return caches[getattr(settings, "FRAGMENT_GENERATION_CACHE", "default")]
+
+
+def _label(model_or_label):
+    if isinstance(model_or_label, str):
+        return model_or_label.lower()
+    return model_or_label._meta.label_lower
+
+
+def _generation_key(model_or_label):
+    return GENERATION_PREFIX + _label(model_or_label)
+
+
+def bump_generation(*models):
+    generations = generation_cache()
+    for model in models:
+        key = _generation_key(model)
+        try:
+            generations.incr(key)
+        except ValueError:
+            # Seed from the clock so an evicted counter never repeats an old generation.
+            generations.set(key, time.time_ns(), None)
+
+
+def reset_generations(*models):
+    """``bump_generation`` for many counters in one round trip; each is reseeded from the clock when next read."""
+    generation_cache().delete_many([_generation_key(model) for model in models])
+
+
+def get_generations(models):
+    generations = generation_cache()
+    keys = [_generation_key(model) for model in models]
+    found = generations.get_many(keys)
+    for key in keys:
+        if key not in found:
+            generations.add(key, time.time_ns(), None)
+            found[key] = generations.get(key)
+    return [found[key] for key in keys]
+
+
+def fragment_key(name, role, models, vary=()):
+    parts = [name, role or "guest", *get_generations(models), *vary]
+    digest = hashlib.md5(":".join(str(part) for part in parts).encode()).hexdigest()
+    return f"{FRAGMENT_PREFIX}{name}:{digest}"
+
+
+def fragment_timeout():
+    timeout = getattr(settings, "DASHBOARD_FRAGMENT_TIMEOUT", 300)
+    if routers.current_replica():
+        # A lagging replica can hand us pre-write rows under a post-write generation; keep them briefly.
+        return min(timeout, getattr(settings, "REPLICA_FRAGMENT_TIMEOUT", 30))
+    return timeout
+
+
+def _bump_sender(sender, **kwargs):
+    bump_generation(sender)
+
+
+def connect_signals():
+    for model in WATCHED_MODELS:
+        uid = f"fragments:{_label(model)}"
+        post_save.connect(_bump_sender, sender=model, dispatch_uid=f"{uid}:save")
+        post_delete.connect(_bump_sender, sender=model, dispatch_uid=f"{uid}:delete")
@@ -0,0 +1,62 @@
+import math
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Grid buckets of 0.01° (~1.1 km north-south). Cells are numbered row-major so every row of a
+# search square is one contiguous range on the indexed ``Pharmacy.geo_cell`` column.
+CELL_DEGREES = 0.01
+CELL_COLUMNS = int(round(360 / CELL_DEGREES))
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def cell_coords(latitude, longitude):
+    row = math.floor((latitude + 90) / CELL_DEGREES)
+    column = math.floor((longitude + 180) / CELL_DEGREES) % CELL_COLUMNS
+    return row, column
+
+
+def cell_for(latitude, longitude):
+    if latitude is None or longitude is None:
+        return None
+    row, column = cell_coords(float(latitude), float(longitude))
+    return row * CELL_COLUMNS + column
+
+
+def cell_ranges(latitude, longitude, radius):
+    """Inclusive ``(low, high)`` cell ranges covering the square of ``radius`` cells around a point."""
+    row, column = cell_coords(latitude, longitude)
+    low, high = column - radius, column + radius
+    ranges = []
+    for current in range(max(row - radius, 0), row + radius + 1):
+        base = current * CELL_COLUMNS
+        if low < 0 or high >= CELL_COLUMNS:
+            # Square straddles the antimeridian; split it into two runs.
+            ranges.append((base + low % CELL_COLUMNS, base + CELL_COLUMNS - 1))
+            ranges.append((base, base + high % CELL_COLUMNS))
+        else:
+            ranges.append((base + low, base + high))
+    return ranges
+
+
+def covered_radius_km(latitude, radius):
+    """Distance that a square of ``radius`` cells is guaranteed to cover in every direction."""
+    cell_height = CELL_DEGREES * KM_PER_DEGREE
+    cell_width = cell_height * max(math.cos(math.radians(min(abs(latitude) + radius * CELL_DEGREES, 90))), 0)
+    return radius * min(cell_height, cell_width)
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = map(math.radians, (float(lat1), float(lng1), float(lat2), float(lng2)))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def parse_point(latitude, longitude):
+    """Return a validated ``(lat, lng)`` float pair or None."""
+    try:
+        latitude, longitude = float(latitude), float(longitude)
+    except (TypeError, ValueError):
+        return None
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return None
+    return latitude, longitude
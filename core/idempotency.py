@@ -0,0 +1,91 @@
+import hashlib
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import IdempotencyKey
+
+HEADER = "Idempotency-Key"
+FORM_FIELD = "idempotency_key"
+_VALID_KEY = re.compile(r"^[A-Za-z0-9_.:-]{8,64}$")
+
+
+class IdempotencyConflict(Exception):
+    """The key was already used for a request with a different payload."""
+
+
+class InvalidIdempotencyKey(ValueError):
+    pass
+
+
+def key_ttl():
+    return timedelta(seconds=getattr(settings, "IDEMPOTENCY_KEY_TTL", 60 * 60 * 24))
+
+
+def key_from_request(request):
+    """Read the key from the ``Idempotency-Key`` header or the form field; None when absent."""
+    key = (request.headers.get(HEADER) or request.POST.get(FORM_FIELD) or "").strip()
+    if not key:
+        return None
+    if not _VALID_KEY.match(key):
+        raise InvalidIdempotencyKey("Idempotency keys are 8-64 letters, digits, '_', '-', '.' or ':'.")
+    return key
+
+
+def fingerprint(*parts):
+    return hashlib.sha256("\x1f".join(str(part) for part in parts).encode()).hexdigest()
+
+
+def run_once(user, scope, key, request_fingerprint, action):
+    """
+    Run ``action`` (returning a JSON-serialisable response) at most once per ``(user, scope, key)``.
+
+    Returns ``(response, replayed)``. A retry is answered from the stored response after one lookup on
+    the unique index; the action and the key row commit together, so a lost race rolls the action back.
+    """
+    if key is None:
+        with transaction.atomic():
+            return action(), False
+    record = IdempotencyKey.objects.filter(user=user, scope=scope, key=key).first()
+    if record is not None and not record.is_expired:
+        return _replay(record, request_fingerprint), True
+    try:
+        with transaction.atomic():
+            if record is not None:
+                record.delete()
+            response = action()
+            IdempotencyKey.objects.create(
+                user=user,
+                scope=scope,
+                key=key,
+                fingerprint=request_fingerprint,
+                response=response,
+                expires_at=timezone.now() + key_ttl(),
+            )
+    except IntegrityError:
+        # A concurrent retry with the same key committed first; answer with its response.
+        record = IdempotencyKey.objects.filter(user=user, scope=scope, key=key).first()
+        if record is None:
+            raise
+        return _replay(record, request_fingerprint), True
+    return response, False
+
+
+def _replay(record, request_fingerprint):
+    if record.fingerprint != request_fingerprint:
+        raise IdempotencyConflict("This idempotency key was already used for a different request.")
+    return record.response
+
+
+def purge_expired(batch_size=5000):
+    """Delete expired keys in index-ordered batches; returns the number removed."""
+    removed = 0
+    now = timezone.now()
+    while True:
+        ids = list(IdempotencyKey.objects.filter(expires_at__lte=now).values_list("pk", flat=True)[:batch_size])
+        if not ids:
+            return removed
+        removed += IdempotencyKey.objects.filter(pk__in=ids).delete()[0]
@@ -0,0 +1,131 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from .fragments import bump_generation, reset_generations
+from .models import InboxItem, InboxState, Notification, Profile
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def _batch_size():
+    return getattr(settings, "INBOX_FANOUT_BATCH_SIZE", 1000)
+
+
+def generation(user_id):
+    """Fragment generation label for one user's inbox; reads and deliveries re-render only that user's section."""
+    return f"core.inbox:{user_id}"
+
+
+def inbox_state(user):
+    """Read cursor and unread badge count: one primary-key lookup, never a COUNT(*)."""
+    return InboxState.objects.filter(user=user).first() or InboxState(user=user)
+
+
+def mark_read(user):
+    """Move the read cursor to now and clear the counter with a single UPDATE."""
+    now = timezone.now()
+    updated = InboxState.objects.filter(user=user).update(unread_count=0, read_through=now)
+    if not updated:
+        InboxState.objects.bulk_create([InboxState(user=user, read_through=now)], ignore_conflicts=True)
+    transaction.on_commit(lambda: bump_generation(generation(user.pk)))
+    return now
+
+
+def _deliver(notification, cursor, user_ids):
+    with transaction.atomic():
+        # Claim the batch by advancing the cursor; a second worker on the same notification gets 0 rows.
+        claimed = Notification.objects.filter(pk=notification.pk, fanout_cursor=cursor).update(
+            fanout_cursor=user_ids[-1]
+        )
+        if not claimed:
+            return False
+        InboxItem.objects.bulk_create(
+            [
+                InboxItem(user_id=user_id, notification=notification, created_at=notification.created_at)
+                for user_id in user_ids
+            ]
+        )
+        InboxState.objects.bulk_create([InboxState(user_id=user_id) for user_id in user_ids], ignore_conflicts=True)
+        # Readers who already moved their cursor past this notification have seen it.
+        InboxState.objects.filter(
+            Q(read_through__isnull=True) | Q(read_through__lt=notification.created_at), user_id__in=user_ids
+        ).update(unread_count=F("unread_count") + 1)
+        transaction.on_commit(lambda: reset_generations(*(generation(user_id) for user_id in user_ids)))
+    return True
+
+
+def fan_out(notification, batch_size=None):
+    """
+    Copy ``notification`` into the inbox of every user in its audience, ``batch_size`` users per
+    transaction. Progress is stored on the notification, so an interrupted run resumes where it stopped.
+    """
+    batch_size = batch_size or _batch_size()
+    recipients = Profile.objects.filter(role=notification.audience).order_by("user_id")
+    cursor = notification.fanout_cursor
+    delivered = 0
+    while True:
+        user_ids = list(recipients.filter(user_id__gt=cursor).values_list("user_id", flat=True)[:batch_size])
+        if not user_ids:
+            break
+        if not _deliver(notification, cursor, user_ids):
+            logger.info("Notification %s is being fanned out elsewhere; stopping.", notification.pk)
+            return delivered
+        cursor = user_ids[-1]
+        delivered += len(user_ids)
+    Notification.objects.filter(pk=notification.pk, fanout_cursor=cursor, fanned_out_at__isnull=True).update(
+        fanned_out_at=timezone.now()
+    )
+    notification.fanout_cursor = cursor
+    return delivered
+
+
+def fan_out_pending(batch_size=None):
+    """Fan out every notification that has not finished yet, oldest first; returns inboxes written."""
+    delivered = 0
+    for notification in list(Notification.objects.filter(fanned_out_at__isnull=True).order_by("id")):
+        delivered += fan_out(notification, batch_size)
+    return delivered
+
+
+def _fan_out_in_worker(pk):
+    try:
+        notification = Notification.objects.filter(pk=pk, fanned_out_at__isnull=True).first()
+        if notification is not None:
+            fan_out(notification)
+    except Exception:
+        # The notification stays pending; `manage.py fanout_notifications` picks it up.
+        logger.exception("Fan-out of notification %s failed.", pk)
+    finally:
+        close_old_connections()
+
+
+def schedule_fan_out(notification):
+    """Hand ``notification`` to the in-process worker once the creating transaction commits."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="inbox-fanout")
+    transaction.on_commit(lambda: _executor.submit(_fan_out_in_worker, notification.pk))
+
+
+def _schedule_on_create(sender, instance, created=False, raw=False, **kwargs):
+    if created and not raw and getattr(settings, "INBOX_FANOUT_IN_PROCESS", True):
+        schedule_fan_out(instance)
+
+
+def _inbox_changed(sender, instance, **kwargs):
+    bump_generation(generation(instance.user_id))
+
+
+def connect_signals():
+    post_save.connect(_schedule_on_create, sender=Notification, dispatch_uid="inbox:notification")
+    for model in (InboxItem, InboxState):
+        post_save.connect(_inbox_changed, sender=model, dispatch_uid=f"inbox:{model._meta.model_name}:save")
+        post_delete.connect(_inbox_changed, sender=model, dispatch_uid=f"inbox:{model._meta.model_name}:delete")
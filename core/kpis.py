@@ -0,0 +1,151 @@
+from datetime import datetime, time, timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Sum
+from django.db.models.functions import TruncDate
+from django.db.models.signals import post_save
+from django.utils import timezone
+
+from .models import KpiPharmacyDay, KpiRollup, Order
+
+ORDERS = "orders"
+DELIVERIES = "deliveries"
+DELIVERY_SECONDS = "delivery_seconds"
+ACTIVE_PHARMACIES = "active_pharmacies"
+
+_DELIVERY_TIME = ExpressionWrapper(F("delivered_at") - F("created_at"), output_field=DurationField())
+
+
+def _add(day, metric, amount):
+    if not amount:
+        return
+    if not KpiRollup.objects.filter(day=day, metric=metric).update(value=F("value") + amount):
+        KpiRollup.objects.bulk_create([KpiRollup(day=day, metric=metric)], ignore_conflicts=True)
+        KpiRollup.objects.filter(day=day, metric=metric).update(value=F("value") + amount)
+
+
+def _mark_pharmacy_active(day, pharmacy_id):
+    try:
+        # The unique (day, pharmacy) row decides who counts the pharmacy; losers of a race skip it.
+        with transaction.atomic():
+            KpiPharmacyDay.objects.create(day=day, pharmacy_id=pharmacy_id)
+    except IntegrityError:
+        return
+    _add(day, ACTIVE_PHARMACIES, 1)
+
+
+def record_order_created(order):
+    day = timezone.localdate(order.created_at)
+    with transaction.atomic():
+        _add(day, ORDERS, 1)
+        _mark_pharmacy_active(day, order.pharmacy_id)
+        if order.delivered_at:
+            delivered_on = timezone.localdate(order.delivered_at)
+            _add(delivered_on, DELIVERIES, 1)
+            _add(delivered_on, DELIVERY_SECONDS, int((order.delivered_at - order.created_at).total_seconds()))
+
+
+def record_transition(transition, pks):
+    """``StateMachine`` hook; runs inside the transition's transaction, so counters never drift from rows."""
+    if transition.target != Order.Status.DELIVERED or not pks:
+        return
+    totals = Order.objects.filter(pk__in=pks).aggregate(count=Count("id"), time=Sum(_DELIVERY_TIME))
+    day = timezone.localdate()
+    _add(day, DELIVERIES, totals["count"])
+    _add(day, DELIVERY_SECONDS, int(totals["time"].total_seconds()) if totals["time"] else 0)
+
+
+def rebuild(days=None):
+    """
+    Recompute the rollups from ``Order`` in a few grouped passes (the last ``days`` days, or all
+    history). Needed after bulk loads, which skip the incremental hooks.
+    """
+    created = Order.objects.all()
+    delivered = Order.objects.filter(delivered_at__isnull=False)
+    rollups = KpiRollup.objects.all()
+    pharmacy_days = KpiPharmacyDay.objects.all()
+    if days is not None:
+        since = timezone.localdate() - timedelta(days=days - 1)
+        start = timezone.make_aware(datetime.combine(since, time.min))
+        created = created.filter(created_at__gte=start)
+        delivered = delivered.filter(delivered_at__gte=start)
+        rollups = rollups.filter(day__gte=since)
+        pharmacy_days = pharmacy_days.filter(day__gte=since)
+    created = created.annotate(day=TruncDate("created_at")).order_by()
+    delivered = delivered.annotate(day=TruncDate("delivered_at")).order_by()
+    with transaction.atomic():
+        totals = {}
+        for row in created.values("day").annotate(count=Count("id")):
+            totals[(row["day"], ORDERS)] = row["count"]
+        active = list(created.values_list("day", "pharmacy_id").distinct())
+        for day, _ in active:
+            totals[(day, ACTIVE_PHARMACIES)] = totals.get((day, ACTIVE_PHARMACIES), 0) + 1
+        for row in delivered.values("day").annotate(count=Count("id"), time=Sum(_DELIVERY_TIME)):
+            totals[(row["day"], DELIVERIES)] = row["count"]
+            totals[(row["day"], DELIVERY_SECONDS)] = int(row["time"].total_seconds()) if row["time"] else 0
+        rollups.delete()
+        pharmacy_days.delete()
+        # Like ``_add``, leave zero counters out; readers treat a missing row as 0.
+        KpiRollup.objects.bulk_create(
+            [KpiRollup(day=day, metric=metric, value=value) for (day, metric), value in totals.items() if value],
+            batch_size=5000,
+        )
+        KpiPharmacyDay.objects.bulk_create(
+            [KpiPharmacyDay(day=day, pharmacy_id=pharmacy_id) for day, pharmacy_id in active], batch_size=5000
+        )
+    return len(totals)
+
+
+def _change(today, yesterday, unit=""):
+    delta = today - yesterday
+    return f"{delta:+,}{unit} vs yesterday" if delta else "Same as yesterday"
+
+
+def admin_kpis(today=None):
+    """Orders today, average delivery time and active pharmacies, with yesterday for contrast; one query."""
+    today = today or timezone.localdate()
+    yesterday = today - timedelta(days=1)
+    values = {
+        (day, metric): value
+        for day, metric, value in KpiRollup.objects.filter(day__in=[today, yesterday]).values_list(
+            "day", "metric", "value"
+        )
+    }
+
+    def get(day, metric):
+        return values.get((day, metric), 0)
+
+    def average_minutes(day):
+        deliveries = get(day, DELIVERIES)
+        return round(get(day, DELIVERY_SECONDS) / deliveries / 60) if deliveries else None
+
+    orders_today, orders_yesterday = get(today, ORDERS), get(yesterday, ORDERS)
+    if orders_yesterday:
+        orders_delta = f"{(orders_today - orders_yesterday) / orders_yesterday:+.0%} vs yesterday"
+    else:
+        orders_delta = _change(orders_today, orders_yesterday)
+    average, previous_average = average_minutes(today), average_minutes(yesterday)
+    if average is None:
+        delivery_value, delivery_delta = "—", "No deliveries yet today"
+    elif previous_average is None:
+        delivery_value, delivery_delta = f"{average} min", f"{get(today, DELIVERIES):,} delivered"
+    else:
+        delivery_value, delivery_delta = f"{average} min", _change(average, previous_average, " min")
+    return [
+        {"label": "Orders today", "value": f"{orders_today:,}", "delta": orders_delta},
+        {"label": "Avg. delivery", "value": delivery_value, "delta": delivery_delta},
+        {
+            "label": "Active pharmacies",
+            "value": f"{get(today, ACTIVE_PHARMACIES):,}",
+            "delta": _change(get(today, ACTIVE_PHARMACIES), get(yesterday, ACTIVE_PHARMACIES)),
+        },
+    ]
+
+
+def _order_saved(sender, instance, created=False, raw=False, **kwargs):
+    if created and not raw:
+        record_order_created(instance)
+
+
+def connect_signals():
+    post_save.connect(_order_saved, sender=Order, dispatch_uid="kpis:order")
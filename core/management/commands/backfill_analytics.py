@@ -0,0 +1,29 @@
+from datetime import datetime, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from core.analytics import backfill
+
+
+class Command(BaseCommand):
+    help = "Recompute the hourly and daily order analytics from orders and delivery tasks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--since", help="First day to recompute (YYYY-MM-DD); default all history.")
+        parser.add_argument("--batch-hours", type=int, default=24, help="Hours recomputed per transaction.")
+        parser.add_argument("--chunk-size", type=int, default=None, help="Rows fetched per round trip.")
+
+    def handle(self, *args, since=None, batch_hours=24, chunk_size=None, **options):
+        if since is not None:
+            day = parse_date(since)
+            if day is None:
+                raise CommandError("--since must be a date like 2024-01-31.")
+            since = timezone.make_aware(datetime.combine(day, time.min))
+
+        def progress(reached, written):
+            self.stdout.write(f"  up to {timezone.localtime(reached):%Y-%m-%d %H:%M}: {written:,} hourly facts")
+
+        written = backfill(since=since, batch_hours=batch_hours, chunk_size=chunk_size, progress=progress)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written:,} hourly facts."))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from core.bench import DASHBOARDS, bench_dashboard
+
+
+class Command(BaseCommand):
+    help = "Compare sync and async dashboard latency under concurrent load."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--role", choices=list(DASHBOARDS), action="append")
+        parser.add_argument("--requests", type=int, default=50)
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument("--cold", action="store_true", help="Invalidate every cached fragment before each request.")
+
+    def handle(self, *args, role=None, requests=50, concurrency=8, cold=False, **options):
+        cache_state = "cold" if cold else "warm"
+        for dashboard in role or DASHBOARDS:
+            results = bench_dashboard(dashboard, requests=requests, concurrency=concurrency, cold=cold)
+            for variant, stats in results.items():
+                self.stdout.write(
+                    f"{dashboard:<12} {variant:<5} {cache_state}  p50 {stats['p50_ms']:>8} ms  "
+                    f"p95 {stats['p95_ms']:>8} ms  mean {stats['mean_ms']:>8} ms  {stats['rps']:>7} req/s"
+                )
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from core.bench import WRITE_PROFILES, bench_writes
+
+
+class Command(BaseCommand):
+    help = "Compare SQLite connection settings under concurrent writers and readers."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--profile", choices=list(WRITE_PROFILES), action="append")
+        parser.add_argument("--writers", type=int, default=8)
+        parser.add_argument("--readers", type=int, default=4)
+        parser.add_argument("--transactions", type=int, default=100, help="Transactions per writer.")
+
+    def handle(self, *args, profile=None, writers=8, readers=4, transactions=100, **options):
+        for name in profile or WRITE_PROFILES:
+            stats = bench_writes(name, writers=writers, readers=readers, transactions=transactions)
+            if not stats["requests"]:
+                self.stdout.write(f"{name:<8} every write failed ({stats['failed']:,} locked)")
+                continue
+            self.stdout.write(
+                f"{name:<8} {stats['rps']:>8} writes/s  p50 {stats['p50_ms']:>8} ms  p95 {stats['p95_ms']:>8} ms  "
+                f"{stats['failed']:>5} locked  {stats['reads_per_s']:>9} reads/s"
+            )
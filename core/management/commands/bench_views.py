@@ -0,0 +1,97 @@
+import json
+import platform
+import tempfile
+from pathlib import Path
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from core.bench import DATASET_SIZES, bench_views, compare, prepare_dataset
+
+
+def _sizes(value):
+    try:
+        sizes = [int(part) for part in value.split(",") if part.strip()]
+    except ValueError as exc:
+        raise CommandError("--sizes must be comma-separated order counts.") from exc
+    if not sizes or min(sizes) < 1:
+        raise CommandError("--sizes must be comma-separated positive order counts.")
+    return sizes
+
+
+class Command(BaseCommand):
+    help = "Benchmark every view end to end at several dataset sizes and compare against a stored baseline."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            default=",".join(str(size) for size in DATASET_SIZES),
+            help="Comma-separated order counts; one generated dataset per size.",
+        )
+        parser.add_argument("--requests", type=int, default=20, help="Measured requests per view and size.")
+        parser.add_argument("--cold", action="store_true", help="Invalidate every cached fragment before each request.")
+        parser.add_argument("--only", action="append", help="URL name or case label to run; repeatable.")
+        parser.add_argument(
+            "--data-dir",
+            default=str(Path(tempfile.gettempdir()) / "pharmacygo-bench"),
+            help="Where generated datasets are kept and reused between runs.",
+        )
+        parser.add_argument("--output", help="Write the results as JSON to this file.")
+        parser.add_argument("--baseline", help="Fail if the results regress against this JSON file.")
+        parser.add_argument("--save-baseline", action="store_true", help="Write the results to --baseline instead.")
+        parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative p95 slowdown.")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("bench_views generates its datasets as SQLite files; run it with the SQLite engine.")
+        if options["requests"] < 1:
+            raise CommandError("--requests must be positive.")
+        if options["save_baseline"] and not options["baseline"]:
+            raise CommandError("--save-baseline needs --baseline.")
+
+        def progress(label, done, total, rate):
+            self.stdout.write(f"  {label}: {done:,}/{total:,} ({rate:,.0f} rows/s)")
+            self.stdout.flush()
+
+        results = {
+            "meta": {
+                "created_at": timezone.now().isoformat(),
+                "requests": options["requests"],
+                "cold": options["cold"],
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "machine": platform.platform(),
+            },
+            "sizes": {},
+        }
+        for size in _sizes(options["sizes"]):
+            self.stdout.write(f"Dataset with {size:,} orders")
+            database = prepare_dataset(size, options["data_dir"], progress=progress)
+            cases = bench_views(database, requests=options["requests"], cold=options["cold"], only=options["only"])
+            results["sizes"][str(size)] = cases
+            for label, stats in cases.items():
+                self.stdout.write(
+                    f"  {label:<26} p50 {stats['p50_ms']:>8} ms  p95 {stats['p95_ms']:>8} ms  "
+                    f"p99 {stats['p99_ms']:>8} ms  {stats['queries']:>3} queries  {stats['bytes']:>8,} B  "
+                    f"{'/'.join(str(status) for status in stats['status'])}"
+                )
+
+        if options["output"]:
+            Path(options["output"]).write_text(json.dumps(results, indent=2) + "\n")
+        if not options["baseline"]:
+            return
+        baseline_path = Path(options["baseline"])
+        if options["save_baseline"]:
+            baseline_path.write_text(json.dumps(results, indent=2) + "\n")
+            self.stdout.write(self.style.SUCCESS(f"Baseline saved to {baseline_path}."))
+            return
+        try:
+            baseline = json.loads(baseline_path.read_text())
+        except (OSError, ValueError) as exc:
+            raise CommandError(f"Cannot read baseline {baseline_path}: {exc}") from exc
+        regressions = compare(results, baseline, tolerance=options["tolerance"])
+        if regressions:
+            raise CommandError("Regressions against the baseline:\n" + "\n".join(regressions))
+        self.stdout.write(self.style.SUCCESS("No regressions against the baseline."))
@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.inbox import fan_out_pending
+
+
+class Command(BaseCommand):
+    help = "Copy pending notifications into their audience's inboxes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument("--loop", action="store_true", help="Keep polling for new notifications.")
+        parser.add_argument("--interval", type=float, default=5.0)
+
+    def handle(self, *args, batch_size=None, loop=False, interval=5.0, **options):
+        while True:
+            delivered = fan_out_pending(batch_size=batch_size)
+            if delivered or not loop:
+                self.stdout.write(self.style.SUCCESS(f"Delivered {delivered:,} inbox items."))
+            if not loop:
+                return
+            time.sleep(interval)
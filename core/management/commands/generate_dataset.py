@@ -0,0 +1,66 @@
+from datetime import datetime, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date, parse_datetime
+
+from core.synthetic import DEFAULT_NOW, DEFAULT_PASSWORD, SyntheticDataset
+
+
+def _moment(value):
+    try:
+        moment = parse_datetime(value) or parse_date(value)
+    except ValueError:
+        moment = None
+    if moment is None:
+        raise CommandError("--now must be a date like 2024-01-31 or a datetime like 2024-01-31T18:00.")
+    return moment if isinstance(moment, datetime) else datetime.combine(moment, time.min)
+
+
+class Command(BaseCommand):
+    help = "Bulk-generate a deterministic synthetic dataset for load testing the dashboards."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000, help="Users (with profiles) to create per role.")
+        parser.add_argument("--pharmacies", type=int, default=500)
+        parser.add_argument("--orders", type=int, default=100_000)
+        parser.add_argument("--stock", type=int, default=20_000, help="Stock items (SKUs).")
+        parser.add_argument("--tasks", type=int, default=20_000, help="Delivery tasks.")
+        parser.add_argument("--notifications", type=int, default=5_000)
+        parser.add_argument("--messages", type=int, default=20_000, help="Chat messages.")
+        parser.add_argument("--days", type=int, default=90, help="Spread timestamps over this many days of history.")
+        parser.add_argument(
+            "--now",
+            default=DEFAULT_NOW.isoformat(),
+            help="When the generated history ends (date or datetime); fixed so a seed gives the same rows on any day.",
+        )
+        parser.add_argument("--seed", type=int, default=42, help="Random seed; identical seeds produce identical rows.")
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be positive.")
+
+        def progress(label, done, total, rate):
+            self.stdout.write(f"{label}: {done:,}/{total:,} ({rate:,.0f} rows/s)")
+            self.stdout.flush()
+
+        dataset = SyntheticDataset(
+            seed=options["seed"],
+            batch_size=options["batch_size"],
+            days=options["days"],
+            now=_moment(options["now"]),
+            progress=progress,
+        )
+        try:
+            dataset.generate(
+                users=options["users"],
+                pharmacies=options["pharmacies"],
+                orders=options["orders"],
+                stock=options["stock"],
+                tasks=options["tasks"],
+                notifications=options["notifications"],
+                messages=options["messages"],
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc)) from exc
+        self.stdout.write(self.style.SUCCESS(f"Synthetic dataset ready. Generated users sign in with password {DEFAULT_PASSWORD!r}."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.idempotency import purge_expired
+
+
+class Command(BaseCommand):
+    help = "Delete expired idempotency keys."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, batch_size=5000, **options):
+        removed = purge_expired(batch_size=batch_size)
+        self.stdout.write(self.style.SUCCESS(f"Removed {removed:,} expired idempotency keys."))
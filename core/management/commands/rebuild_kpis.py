@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.kpis import rebuild
+
+
+class Command(BaseCommand):
+    help = "Recompute the KPI rollups from orders (after bulk loads or to repair drift)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=None, help="Only the most recent N days; default all history.")
+
+    def handle(self, *args, days=None, **options):
+        written = rebuild(days=days)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written:,} KPI rollup rows."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the pharmacy trigram search index from scratch."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, batch_size=2000, **options):
+        indexed = rebuild_index(batch_size=batch_size)
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed:,} pharmacies."))
@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.analytics import refresh
+
+
+class Command(BaseCommand):
+    help = "Fold orders and delivery tasks changed since the last run into the analytics rollups."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument("--loop", action="store_true", help="Keep polling for changes.")
+        parser.add_argument("--interval", type=float, default=60.0)
+
+    def handle(self, *args, batch_size=None, loop=False, interval=60.0, **options):
+        while True:
+            processed = refresh(batch_size=batch_size)
+            if processed or not loop:
+                self.stdout.write(self.style.SUCCESS(f"Processed {processed:,} changed rows."))
+            if not loop:
+                return
+            time.sleep(interval)
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from core import data
+from core.bootstrap import ensure_seeded
+
+
+class Command(BaseCommand):
+    help = "Load the PharmacyGo demo fixtures once per seed data version."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Re-run the seeders even if the stored version already matches.",
+        )
+
+    def handle(self, *args, force=False, **options):
+        if ensure_seeded(force=force, recheck=True):
+            self.stdout.write(self.style.SUCCESS(f"Seed data v{data.SEED_VERSION} applied."))
+        else:
+            self.stdout.write(f"Seed data already at v{data.SEED_VERSION}; nothing to do.")
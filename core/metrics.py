@@ -0,0 +1,101 @@
+import threading
+import time
+from contextlib import ExitStack
+
+from django import shortcuts
+from django.conf import settings
+from django.db import connections
+
+DEFAULTS = {
+    "SERVER_TIMING": True,
+    "LOG": True,
+    "BUDGET_MODE": "warn",
+    "BUDGETS": {},
+}
+# Not counted as queries: SQLite's BEGIN IMMEDIATE is sent as a statement while COMMIT is not, and
+# savepoints only mark nested atomic blocks.
+TRANSACTION_CONTROL = ("BEGIN", "SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT")
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def get_config():
+    config = dict(DEFAULTS)
+    config.update(getattr(settings, "REQUEST_METRICS", {}))
+    return config
+
+
+class RequestMetrics:
+    """Per-request counters fed by a DB execute wrapper and the render helper below."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.started = time.perf_counter()
+        self.finished = None
+        # Async views load sections from several threads at once.
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                if not sql.startswith(TRANSACTION_CONTROL):
+                    self.queries += 1
+                self.db_time += elapsed
+
+    def capture(self):
+        stack = ExitStack()
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(self))
+        return stack
+
+    def finish(self):
+        self.finished = time.perf_counter()
+
+    @property
+    def wall_time(self):
+        return (self.finished or time.perf_counter()) - self.started
+
+    def as_dict(self):
+        return {
+            "queries": self.queries,
+            "db_ms": round(self.db_time * 1000, 2),
+            "template_ms": round(self.template_time * 1000, 2),
+            "total_ms": round(self.wall_time * 1000, 2),
+        }
+
+    def server_timing(self):
+        values = self.as_dict()
+        return ", ".join(
+            [
+                f'db;dur={values["db_ms"]};desc="{self.queries} queries"',
+                f'tpl;dur={values["template_ms"]};desc="templates"',
+                f'total;dur={values["total_ms"]};desc="wall"',
+            ]
+        )
+
+    def over_budget(self, budget):
+        values = self.as_dict()
+        return {
+            key: (values[key], limit)
+            for key, limit in budget.items()
+            if key in values and values[key] > limit
+        }
+
+
+def render(request, template_name, context=None, *args, **kwargs):
+    """Drop-in for ``django.shortcuts.render`` that books render time on the request metrics."""
+    started = time.perf_counter()
+    try:
+        return shortcuts.render(request, template_name, context, *args, **kwargs)
+    finally:
+        metrics = getattr(request, "metrics", None)
+        if metrics is not None:
+            metrics.template_time += time.perf_counter() - started
@@ -0,0 +1,70 @@
+import json
+import logging
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from .metrics import QueryBudgetExceeded, RequestMetrics, get_config
+
+logger = logging.getLogger("core.metrics")
+
+
+class RequestMetricsMiddleware:
+    """Record query count, DB/template/wall time per request and enforce URL-name budgets."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            # Under ASGI, async views (order_stream, chat_messages, *_async) then run without a thread hop here.
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        metrics = self._start(request)
+        with metrics.capture():
+            response = self.get_response(request)
+        return self._finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics = self._start(request)
+        with metrics.capture():
+            response = await self.get_response(request)
+        return self._finish(request, response, metrics)
+
+    def _start(self, request):
+        metrics = RequestMetrics()
+        request.metrics = metrics
+        return metrics
+
+    def _finish(self, request, response, metrics):
+        config = get_config()
+        metrics.finish()
+
+        match = getattr(request, "resolver_match", None)
+        url_name = match.view_name if match else None
+        payload = {
+            "method": request.method,
+            "path": request.path,
+            "url_name": url_name,
+            "status": response.status_code,
+            **metrics.as_dict(),
+        }
+        if config["SERVER_TIMING"]:
+            response["Server-Timing"] = metrics.server_timing()
+        if config["LOG"]:
+            logger.info(json.dumps(payload, sort_keys=True), extra={"metrics": payload})
+
+        budget = config["BUDGETS"].get(url_name)
+        if budget and config["BUDGET_MODE"] != "off":
+            exceeded = metrics.over_budget(budget)
+            if exceeded:
+                detail = ", ".join(f"{key}={value} > {limit}" for key, (value, limit) in exceeded.items())
+                message = f"{url_name} over budget: {detail}"
+                if config["BUDGET_MODE"] == "raise":
+                    raise QueryBudgetExceeded(message)
+                logger.warning(message, extra={"metrics": payload})
+        return response
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.8 on 2026-10-17 11:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_pharmacy_role_stockitem_expiry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeedState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=32, unique=True)),
+                ('version', models.PositiveIntegerField(default=0)),
+                ('seeded_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
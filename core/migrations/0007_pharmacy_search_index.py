@@ -0,0 +1,39 @@
+# Generated by Django 5.2.8 on 2026-10-17 11:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_index(apps, schema_editor):
+    from core.search import document_trigrams
+
+    Pharmacy = apps.get_model("core", "Pharmacy")
+    PharmacySearchTerm = apps.get_model("core", "PharmacySearchTerm")
+    terms = [
+        PharmacySearchTerm(pharmacy_id=pharmacy.pk, trigram=gram)
+        for pharmacy in Pharmacy.objects.only("name", "address").iterator()
+        for gram in document_trigrams(pharmacy.name, pharmacy.address)
+    ]
+    PharmacySearchTerm.objects.bulk_create(terms, batch_size=5000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_pharmacy_location'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PharmacySearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trigram', models.CharField(max_length=3)),
+                ('pharmacy', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='core.pharmacy')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['trigram', 'pharmacy'], name='core_search_trigram_idx')],
+            },
+        ),
+        migrations.RunPython(build_index, migrations.RunPython.noop),
+    ]
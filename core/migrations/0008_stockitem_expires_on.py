@@ -0,0 +1,67 @@
+from datetime import timedelta
+
+from django.db import migrations, models
+
+
+BATCH_SIZE = 2000
+
+
+def _backfill(StockItem, fields, field, compute):
+    items = []
+    for item in StockItem.objects.only(*fields).iterator(chunk_size=BATCH_SIZE):
+        setattr(item, field, compute(item))
+        items.append(item)
+        if len(items) == BATCH_SIZE:
+            StockItem.objects.bulk_update(items, [field])
+            items = []
+    StockItem.objects.bulk_update(items, [field])
+
+
+def forwards(apps, schema_editor):
+    StockItem = apps.get_model("core", "StockItem")
+    # The old counter was entered relative to the last edit, so anchor it there.
+    _backfill(
+        StockItem,
+        ("updated_at", "expires_in_days"),
+        "expires_on",
+        lambda item: item.updated_at.date() + timedelta(days=item.expires_in_days),
+    )
+
+
+def backwards(apps, schema_editor):
+    StockItem = apps.get_model("core", "StockItem")
+    _backfill(
+        StockItem,
+        ("updated_at", "expires_on"),
+        "expires_in_days",
+        lambda item: max((item.expires_on - item.updated_at.date()).days, 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0007_pharmacy_search_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="stockitem",
+            name="expires_on",
+            field=models.DateField(null=True),
+        ),
+        migrations.RunPython(forwards, backwards),
+        migrations.AlterField(
+            model_name="stockitem",
+            name="expires_on",
+            field=models.DateField(),
+        ),
+        migrations.RemoveField(
+            model_name="stockitem",
+            name="expires_in_days",
+        ),
+        migrations.AddIndex(
+            model_name="stockitem",
+            index=models.Index(fields=["expires_on", "id"], name="core_stock_expiry_idx"),
+        ),
+    ]
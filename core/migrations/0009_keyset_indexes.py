@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-17 11:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_stockitem_expires_on'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='deliverytask',
+            index=models.Index(fields=['created_at', 'id'], name='core_task_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='distributorstatus',
+            index=models.Index(fields=['updated_at', 'id'], name='core_status_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='paymentcard',
+            index=models.Index(fields=['created_at', 'id'], name='core_card_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='timelineevent',
+            index=models.Index(fields=['created_at', 'id'], name='core_timeline_created_idx'),
+        ),
+    ]
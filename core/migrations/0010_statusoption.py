@@ -0,0 +1,41 @@
+# Generated by Django 5.2.8 on 2026-10-17 11:25
+
+from django.db import migrations, models
+
+PRESETS = ["Awaiting pickup", "In progress", "Delivered", "Delayed"]
+
+
+def populate_options(apps, schema_editor):
+    DistributorStatus = apps.get_model("core", "DistributorStatus")
+    StatusOption = apps.get_model("core", "StatusOption")
+    options = [StatusOption(label=label, position=position) for position, label in enumerate(PRESETS)]
+    seen = set(PRESETS)
+    for label in DistributorStatus.objects.order_by("status").values_list("status", flat=True).distinct():
+        label = (label or "").strip()
+        if label and label not in seen:
+            seen.add(label)
+            options.append(StatusOption(label=label))
+    StatusOption.objects.bulk_create(options, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatusOption',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('label', models.CharField(max_length=64, unique=True)),
+                ('position', models.PositiveIntegerField(default=1000)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['position', 'id'],
+            },
+        ),
+        migrations.RunPython(populate_options, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-17 11:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_statusoption'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='deliverytask',
+            name='version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,108 @@
+# Generated by Django 5.2.8 on 2026-10-17 11:38
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+from django.utils import timezone
+
+BATCH_SIZE = 2000
+
+
+def backfill_inboxes(apps, schema_editor):
+    # Same copy core.inbox.fan_out() makes, so notifications sent before the upgrade reach their audience.
+    Notification = apps.get_model("core", "Notification")
+    Profile = apps.get_model("core", "Profile")
+    InboxItem = apps.get_model("core", "InboxItem")
+    InboxState = apps.get_model("core", "InboxState")
+    now = timezone.now()
+    for notification in Notification.objects.order_by("id").iterator():
+        recipients = Profile.objects.filter(role=notification.audience).order_by("user_id")
+        cursor = 0
+        while True:
+            user_ids = list(recipients.filter(user_id__gt=cursor).values_list("user_id", flat=True)[:BATCH_SIZE])
+            if not user_ids:
+                break
+            InboxItem.objects.bulk_create(
+                [
+                    InboxItem(user_id=user_id, notification_id=notification.pk, created_at=notification.created_at)
+                    for user_id in user_ids
+                ]
+            )
+            cursor = user_ids[-1]
+        Notification.objects.filter(pk=notification.pk).update(fanout_cursor=cursor, fanned_out_at=now)
+    # Nobody has a read cursor yet, so every copied item starts unread.
+    cursor = 0
+    users = InboxItem.objects.order_by("user_id").values("user_id").annotate(unread=Count("id"))
+    while True:
+        batch = list(users.filter(user_id__gt=cursor)[:BATCH_SIZE])
+        if not batch:
+            break
+        InboxState.objects.bulk_create(
+            [InboxState(user_id=row["user_id"], unread_count=row["unread"]) for row in batch]
+        )
+        cursor = batch[-1]["user_id"]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('core', '0013_idempotencykey'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InboxItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='InboxState',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='inbox_state', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('unread_count', models.PositiveIntegerField(default=0)),
+                ('read_through', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='fanned_out_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='fanout_cursor',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['fanned_out_at', 'id'], name='core_notification_fanout_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(fields=['role', 'user'], name='core_profile_role_user_idx'),
+        ),
+        migrations.AddField(
+            model_name='inboxitem',
+            name='notification',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inbox_items', to='core.notification'),
+        ),
+        migrations.AddField(
+            model_name='inboxitem',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inbox_items', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='inboxitem',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='core_inbox_user_created_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='inboxitem',
+            constraint=models.UniqueConstraint(fields=('user', 'notification'), name='core_inbox_item_unique'),
+        ),
+        migrations.RunPython(backfill_inboxes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 5.2.8 on 2026-10-17 11:52
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import TruncTime
+
+
+def assign_threads(apps, schema_editor):
+    # Messages predate threads; keep them together in one conversation.
+    ChatMessage = apps.get_model("core", "ChatMessage")
+    ChatThread = apps.get_model("core", "ChatThread")
+    if ChatMessage.objects.exists():
+        thread = ChatThread.objects.create(subject="Doctor chat")
+        ChatMessage.objects.update(thread=thread)
+
+
+def restore_sent_at(apps, schema_editor):
+    # Runs when unapplying: refill the restored column before it becomes NOT NULL again.
+    ChatMessage = apps.get_model("core", "ChatMessage")
+    ChatMessage.objects.update(sent_at=TruncTime("created_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_inbox'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChatThread',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('subject', models.CharField(max_length=255)),
+                ('customer', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='chat_threads', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['customer', 'updated_at', 'id'], name='core_chat_thread_recent_idx')],
+            },
+        ),
+        migrations.AddField(
+            model_name='chatmessage',
+            name='thread',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='messages', to='core.chatthread'),
+        ),
+        migrations.AddField(
+            model_name='chatmessage',
+            name='user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='chat_messages', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(assign_threads, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='chatmessage',
+            name='thread',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='messages', to='core.chatthread'),
+        ),
+        migrations.AlterField(
+            model_name='chatmessage',
+            name='sent_at',
+            field=models.TimeField(null=True),
+        ),
+        migrations.RunPython(migrations.RunPython.noop, restore_sent_at),
+        migrations.RemoveField(
+            model_name='chatmessage',
+            name='sent_at',
+        ),
+        migrations.AddIndex(
+            model_name='chatmessage',
+            index=models.Index(fields=['thread', 'created_at', 'id'], name='core_chat_message_thread_idx'),
+        ),
+    ]
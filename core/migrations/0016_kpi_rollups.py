@@ -0,0 +1,78 @@
+# Generated by Django 5.2.8 on 2026-10-17 11:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_delivered_at(apps, schema_editor):
+    # The last write to a delivered order is the best record of when it was delivered.
+    Order = apps.get_model("core", "Order")
+    Order.objects.filter(status="delivered", delivered_at__isnull=True).update(delivered_at=F("updated_at"))
+
+
+def build_rollups(apps, schema_editor):
+    # Same grouped passes as core.kpis.rebuild(), so the KPIs include the orders placed before the upgrade.
+    Order = apps.get_model("core", "Order")
+    KpiRollup = apps.get_model("core", "KpiRollup")
+    KpiPharmacyDay = apps.get_model("core", "KpiPharmacyDay")
+    created = Order.objects.annotate(day=TruncDate("created_at")).order_by()
+    delivered = Order.objects.filter(delivered_at__isnull=False).annotate(day=TruncDate("delivered_at")).order_by()
+    delivery_time = ExpressionWrapper(F("delivered_at") - F("created_at"), output_field=DurationField())
+    totals = {}
+    for row in created.values("day").annotate(count=Count("id")):
+        totals[(row["day"], "orders")] = row["count"]
+    active = list(created.values_list("day", "pharmacy_id").distinct())
+    for day, _ in active:
+        totals[(day, "active_pharmacies")] = totals.get((day, "active_pharmacies"), 0) + 1
+    for row in delivered.values("day").annotate(count=Count("id"), time=Sum(delivery_time)):
+        totals[(row["day"], "deliveries")] = row["count"]
+        totals[(row["day"], "delivery_seconds")] = int(row["time"].total_seconds()) if row["time"] else 0
+    KpiRollup.objects.bulk_create(
+        [KpiRollup(day=day, metric=metric, value=value) for (day, metric), value in totals.items() if value],
+        batch_size=5000,
+    )
+    KpiPharmacyDay.objects.bulk_create(
+        [KpiPharmacyDay(day=day, pharmacy_id=pharmacy_id) for day, pharmacy_id in active], batch_size=5000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_chat_threads'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='delivered_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_delivered_at, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='KpiRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('metric', models.CharField(max_length=32)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('day', 'metric'), name='core_kpi_rollup_unique')],
+            },
+        ),
+        migrations.CreateModel(
+            name='KpiPharmacyDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('pharmacy', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.pharmacy')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('day', 'pharmacy'), name='core_kpi_pharmacy_day_unique')],
+            },
+        ),
+        migrations.RunPython(build_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,87 @@
+# Generated by Django 5.2.8 on 2026-10-17 11:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_kpi_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyPharmacyFact',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('orders', models.PositiveIntegerField(default=0)),
+                ('cancelled', models.PositiveIntegerField(default=0)),
+                ('delivered', models.PositiveIntegerField(default=0)),
+                ('delivery_seconds', models.PositiveBigIntegerField(default=0)),
+                ('tasks', models.PositiveIntegerField(default=0)),
+                ('tasks_done', models.PositiveIntegerField(default=0)),
+                ('day', models.DateField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='HourlyPharmacyFact',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('orders', models.PositiveIntegerField(default=0)),
+                ('cancelled', models.PositiveIntegerField(default=0)),
+                ('delivered', models.PositiveIntegerField(default=0)),
+                ('delivery_seconds', models.PositiveBigIntegerField(default=0)),
+                ('tasks', models.PositiveIntegerField(default=0)),
+                ('tasks_done', models.PositiveIntegerField(default=0)),
+                ('hour', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=32, unique=True)),
+                ('updated_at', models.DateTimeField(blank=True, null=True)),
+                ('last_id', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='deliverytask',
+            index=models.Index(fields=['updated_at', 'id'], name='core_task_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['created_at', 'id'], name='core_order_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['updated_at', 'id'], name='core_order_updated_idx'),
+        ),
+        migrations.AddField(
+            model_name='dailypharmacyfact',
+            name='pharmacy',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.pharmacy'),
+        ),
+        migrations.AddField(
+            model_name='hourlypharmacyfact',
+            name='pharmacy',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.pharmacy'),
+        ),
+        migrations.AddIndex(
+            model_name='dailypharmacyfact',
+            index=models.Index(fields=['pharmacy', 'day'], name='core_daily_fact_pharmacy_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailypharmacyfact',
+            constraint=models.UniqueConstraint(fields=('day', 'pharmacy'), name='core_daily_fact_unique'),
+        ),
+        migrations.AddIndex(
+            model_name='hourlypharmacyfact',
+            index=models.Index(fields=['pharmacy', 'hour'], name='core_hourly_fact_pharmacy_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='hourlypharmacyfact',
+            constraint=models.UniqueConstraint(fields=('hour', 'pharmacy'), name='core_hourly_fact_unique'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.8 on 2026-10-17 11:53
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_analytics_rollups'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['pharmacy', 'created_at', 'id'], name='core_order_pharmacy_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pharmacyapplication',
+            index=models.Index(fields=['created_at', 'id'], name='core_application_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(fields=['role', 'created_at', 'id'], name='core_profile_role_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='statusoption',
+            index=models.Index(fields=['position', 'id'], name='core_status_option_order_idx'),
+        ),
+        # Sign-in and sign-up match emails and usernames case-insensitively via the registered
+        # `__lower` lookup; auth.User is not ours to add Meta.indexes to.
+        migrations.RunSQL(
+            'CREATE INDEX core_user_email_lower_idx ON auth_user (LOWER(email))',
+            'DROP INDEX core_user_email_lower_idx',
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX core_user_username_lower_idx ON auth_user (LOWER(username))',
+            'DROP INDEX core_user_username_lower_idx',
+        ),
+    ]
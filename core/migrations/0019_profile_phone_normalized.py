@@ -0,0 +1,37 @@
+# Generated by Django 5.2.8 on 2026-10-17 12:04
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def normalize_phones(apps, schema_editor):
+    Profile = apps.get_model("core", "Profile")
+    profiles = []
+    for profile in Profile.objects.exclude(phone="").only("id", "phone").iterator(chunk_size=2000):
+        profile.phone_normalized = "".join(character for character in profile.phone if character.isdigit())
+        profiles.append(profile)
+        if len(profiles) == 2000:
+            Profile.objects.bulk_update(profiles, ["phone_normalized"])
+            profiles = []
+    Profile.objects.bulk_update(profiles, ["phone_normalized"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_dashboard_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='phone_normalized',
+            field=models.CharField(blank=True, editable=False, max_length=32),
+        ),
+        migrations.RunPython(normalize_phones, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(fields=['phone_normalized'], name='core_profile_phone_norm_idx'),
+        ),
+    ]
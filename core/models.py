@@ -3,6 +3,9 @@ from django.db import models
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.urls import reverse
+from django.utils import timezone
+
+from . import geo
 
 
 class Profile(models.Model):
@@ -15,12 +18,35 @@ class Profile(models.Model):
     user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="profile")
     role = models.CharField(max_length=20, choices=Role.choices, default=Role.CUSTOMER)
     phone = models.CharField(max_length=32, blank=True)
+    # Digits of ``phone``, so sign-in matches "+998 90 123 45 67" however it is typed.
+    phone_normalized = models.CharField(max_length=32, blank=True, editable=False)
     organization = models.CharField(max_length=255, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Notification fan-out walks one audience in user order.
+            models.Index(fields=["role", "user"], name="core_profile_role_user_idx"),
+            # Admin user segments list one role newest first.
+            models.Index(fields=["role", "created_at", "id"], name="core_profile_role_created_idx"),
+            # Sign-in by phone.
+            models.Index(fields=["phone_normalized"], name="core_profile_phone_norm_idx"),
+        ]
+
     def __str__(self):
         return f"{self.user.get_full_name() or self.user.username} · {self.get_role_display()}"
 
+    @staticmethod
+    def normalize_phone(phone):
+        return "".join(character for character in phone if character.isdigit())
+
+    def save(self, *args, **kwargs):
+        self.phone_normalized = self.normalize_phone(self.phone)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "phone" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "phone_normalized"}
+        super().save(*args, **kwargs)
+
 
 class TimeStampedModel(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
@@ -35,6 +61,30 @@ class TimeStampedModel(models.Model):
         return reverse(f"admin:{opts.app_label}_{opts.model_name}_change", args=[self.pk])
 
 
+class PharmacyQuerySet(models.QuerySet):
+    def nearest(self, latitude, longitude, limit=10, max_radius_km=50):
+        """Closest ``limit`` pharmacies to a point, each annotated with ``distance`` in km.
+
+        Scans expanding squares of ``geo_cell`` buckets (one indexed range per grid row)
+        until the ``limit``-th hit is provably closer than anything outside the square.
+        """
+        radius = 1
+        while True:
+            condition = models.Q()
+            for low, high in geo.cell_ranges(latitude, longitude, radius):
+                condition |= models.Q(geo_cell__range=(low, high))
+            candidates = list(self.filter(condition))
+            for pharmacy in candidates:
+                pharmacy.distance = geo.haversine_km(latitude, longitude, pharmacy.latitude, pharmacy.longitude)
+            candidates.sort(key=lambda pharmacy: (pharmacy.distance, pharmacy.pk))
+            covered = geo.covered_radius_km(latitude, radius)
+            settled = len(candidates) >= limit and candidates[limit - 1].distance <= covered
+            if settled or covered >= max_radius_km:
+                return [pharmacy for pharmacy in candidates[:limit] if pharmacy.distance <= max_radius_km]
+            # Sparse areas widen faster so rural lookups still finish in a handful of queries.
+            radius *= 2 if len(candidates) >= limit else 4
+
+
 class Pharmacy(TimeStampedModel):
     name = models.CharField(max_length=255)
     distance_km = models.DecimalField(max_digits=4, decimal_places=1, default=0)
@@ -42,10 +92,33 @@ class Pharmacy(TimeStampedModel):
     address = models.CharField(max_length=255, blank=True)
     pin_top = models.CharField(max_length=8, default="50%")
     pin_left = models.CharField(max_length=8, default="50%")
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    geo_cell = models.BigIntegerField(null=True, blank=True, db_index=True, editable=False)
+
+    objects = PharmacyQuerySet.as_manager()
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        self.geo_cell = geo.cell_for(self.latitude, self.longitude)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"latitude", "longitude"} & set(update_fields):
+            kwargs["update_fields"] = {*update_fields, "geo_cell"}
+        super().save(*args, **kwargs)
+
+
+class PharmacySearchTerm(models.Model):
+    pharmacy = models.ForeignKey(Pharmacy, on_delete=models.CASCADE, related_name="search_terms")
+    trigram = models.CharField(max_length=3)
+
+    class Meta:
+        indexes = [models.Index(fields=["trigram", "pharmacy"], name="core_search_trigram_idx")]
+
+    def __str__(self):
+        return f"{self.trigram!r} → {self.pharmacy_id}"
+
 
 class PharmacyApplication(TimeStampedModel):
     class Status(models.TextChoices):
@@ -58,6 +131,9 @@ class PharmacyApplication(TimeStampedModel):
     documents = models.CharField(max_length=255)
     status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
 
+    class Meta:
+        indexes = [models.Index(fields=["created_at", "id"], name="core_application_created_idx")]
+
     def __str__(self):
         return f"{self.pharmacy_name} ({self.get_status_display()})"
 
@@ -77,6 +153,16 @@ class Order(TimeStampedModel):
     items = models.CharField(max_length=255, blank=True)
     progress = models.CharField(max_length=64, blank=True)
     eta_text = models.CharField(max_length=64, blank=True)
+    version = models.PositiveIntegerField(default=0, editable=False)
+    delivered_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="core_order_created_idx"),
+            models.Index(fields=["pharmacy", "created_at", "id"], name="core_order_pharmacy_idx"),
+            # Analytics rollups follow changed rows from a high-water mark on (updated_at, id).
+            models.Index(fields=["updated_at", "id"], name="core_order_updated_idx"),
+        ]
 
     def __str__(self):
         return self.code
@@ -107,15 +193,36 @@ class Patient(TimeStampedModel):
         return self.name
 
 
+class ChatThread(TimeStampedModel):
+    """A conversation between a customer and the pharmacy's doctors; ``updated_at`` moves with each message."""
+
+    customer = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, blank=True, related_name="chat_threads"
+    )
+    subject = models.CharField(max_length=255)
+
+    class Meta:
+        indexes = [models.Index(fields=["customer", "updated_at", "id"], name="core_chat_thread_recent_idx")]
+
+    def __str__(self):
+        return self.subject
+
+
 class ChatMessage(TimeStampedModel):
     class Sender(models.TextChoices):
         CUSTOMER = "customer", "Customer"
         DOCTOR = "doctor", "Doctor"
 
+    thread = models.ForeignKey(ChatThread, on_delete=models.CASCADE, related_name="messages")
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="chat_messages"
+    )
     sender = models.CharField(max_length=20, choices=Sender.choices)
     author = models.CharField(max_length=255)
     body = models.TextField()
-    sent_at = models.TimeField()
+
+    class Meta:
+        indexes = [models.Index(fields=["thread", "created_at", "id"], name="core_chat_message_thread_idx")]
 
     def __str__(self):
         return f"{self.author}: {self.body[:40]}"
@@ -137,6 +244,9 @@ class PaymentCard(TimeStampedModel):
     theme = models.CharField(max_length=32, default="ocean")
     spending_limit = models.CharField(max_length=64, blank=True)
 
+    class Meta:
+        indexes = [models.Index(fields=["created_at", "id"], name="core_card_created_idx")]
+
     def __str__(self):
         return f"{self.provider.name} · ••{self.last4}"
 
@@ -150,21 +260,67 @@ class Notification(TimeStampedModel):
     audience = models.CharField(max_length=20, choices=Profile.Role.choices, default=Profile.Role.CUSTOMER)
     message = models.CharField(max_length=255)
     type = models.CharField(max_length=20, choices=Type.choices, default=Type.INFO)
+    # Highest recipient user id already copied into inboxes; fan-out resumes after it.
+    fanout_cursor = models.PositiveBigIntegerField(default=0)
+    fanned_out_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["fanned_out_at", "id"], name="core_notification_fanout_idx")]
 
     def __str__(self):
         return self.message
 
 
+class InboxItem(models.Model):
+    """One user's copy of a broadcast ``Notification``."""
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="inbox_items")
+    notification = models.ForeignKey(Notification, on_delete=models.CASCADE, related_name="inbox_items")
+    # Copied from the notification so reading an inbox is a range scan that never joins.
+    created_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["user", "notification"], name="core_inbox_item_unique")]
+        indexes = [models.Index(fields=["user", "created_at", "id"], name="core_inbox_user_created_idx")]
+
+    def __str__(self):
+        return f"{self.user} · {self.notification}"
+
+
+class InboxState(models.Model):
+    """Per-user read cursor and materialized unread count, so the badge never runs COUNT(*)."""
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name="inbox_state"
+    )
+    unread_count = models.PositiveIntegerField(default=0)
+    # Items created at or before this instant count as read.
+    read_through = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.user} · {self.unread_count} unread"
+
+    def is_unread(self, item):
+        return self.read_through is None or item.created_at > self.read_through
+
+
 class StockItem(TimeStampedModel):
     sku = models.CharField(max_length=32)
     name = models.CharField(max_length=255)
     quantity = models.PositiveIntegerField(default=0)
     status = models.CharField(max_length=64, default="Healthy")
-    expires_in_days = models.PositiveIntegerField(default=30)
+    expires_on = models.DateField()
+
+    class Meta:
+        indexes = [models.Index(fields=["expires_on", "id"], name="core_stock_expiry_idx")]
 
     def __str__(self):
         return self.name
 
+    @property
+    def expires_in_days(self):
+        return (self.expires_on - timezone.localdate()).days
+
 
 class DeliveryTask(TimeStampedModel):
     class Status(models.TextChoices):
@@ -177,6 +333,13 @@ class DeliveryTask(TimeStampedModel):
     address = models.CharField(max_length=255)
     eta_text = models.CharField(max_length=64)
     status = models.CharField(max_length=20, choices=Status.choices, default=Status.AWAITING)
+    version = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="core_task_created_idx"),
+            models.Index(fields=["updated_at", "id"], name="core_task_updated_idx"),
+        ]
 
     def __str__(self):
         return self.code
@@ -187,6 +350,9 @@ class TimelineEvent(TimeStampedModel):
     time_text = models.CharField(max_length=32)
     is_active = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [models.Index(fields=["created_at", "id"], name="core_timeline_created_idx")]
+
     def __str__(self):
         return self.label
 
@@ -196,11 +362,151 @@ class DistributorStatus(TimeStampedModel):
     pharmacy = models.CharField(max_length=255)
     status = models.CharField(max_length=64)
 
+    class Meta:
+        indexes = [models.Index(fields=["updated_at", "id"], name="core_status_updated_idx")]
+
     def __str__(self):
         return f"{self.order_code} · {self.status}"
 
 
+class StatusOption(models.Model):
+    """Vocabulary for the distributor status dropdown; presets first, then labels as they appear."""
+
+    DISCOVERED_POSITION = 1000
+
+    label = models.CharField(max_length=64, unique=True)
+    position = models.PositiveIntegerField(default=DISCOVERED_POSITION)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["position", "id"]
+        indexes = [models.Index(fields=["position", "id"], name="core_status_option_order_idx")]
+
+    def __str__(self):
+        return self.label
+
+    @classmethod
+    def register(cls, *labels):
+        labels = {label.strip() for label in labels if label and label.strip()}
+        if labels:
+            cls.objects.bulk_create([cls(label=label) for label in sorted(labels)], ignore_conflicts=True)
+
+
+class CodeSequence(models.Model):
+    name = models.CharField(max_length=32, unique=True)
+    next_value = models.BigIntegerField(default=1)
+
+    def __str__(self):
+        return f"{self.name} · next {self.next_value}"
+
+
+class IdempotencyKey(models.Model):
+    """Response of a non-repeatable request, replayed when a client retries with the same key."""
+
+    key = models.CharField(max_length=64)
+    scope = models.CharField(max_length=32)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="idempotency_keys")
+    fingerprint = models.CharField(max_length=64)
+    response = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "scope", "key"], name="core_idempotency_key_unique"),
+        ]
+        indexes = [models.Index(fields=["expires_at"], name="core_idempotency_expiry_idx")]
+
+    def __str__(self):
+        return f"{self.scope} · {self.key}"
+
+    @property
+    def is_expired(self):
+        return self.expires_at <= timezone.now()
+
+
+class KpiRollup(models.Model):
+    """Per-day KPI counter maintained incrementally by ``core.kpis``; one row per (day, metric)."""
+
+    day = models.DateField()
+    metric = models.CharField(max_length=32)
+    value = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["day", "metric"], name="core_kpi_rollup_unique")]
+
+    def __str__(self):
+        return f"{self.day} · {self.metric} = {self.value}"
+
+
+class KpiPharmacyDay(models.Model):
+    """Marks a pharmacy as active on ``day``, so it is counted once however many orders it takes."""
+
+    day = models.DateField()
+    pharmacy = models.ForeignKey(Pharmacy, on_delete=models.CASCADE, related_name="+")
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["day", "pharmacy"], name="core_kpi_pharmacy_day_unique")]
+
+
+class PharmacyFact(models.Model):
+    """Order and delivery-task totals for one pharmacy over one time bucket (see ``core.analytics``)."""
+
+    pharmacy = models.ForeignKey(Pharmacy, on_delete=models.CASCADE, related_name="+")
+    orders = models.PositiveIntegerField(default=0)
+    cancelled = models.PositiveIntegerField(default=0)
+    delivered = models.PositiveIntegerField(default=0)
+    delivery_seconds = models.PositiveBigIntegerField(default=0)
+    tasks = models.PositiveIntegerField(default=0)
+    tasks_done = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+
+class HourlyPharmacyFact(PharmacyFact):
+    hour = models.DateTimeField()
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["hour", "pharmacy"], name="core_hourly_fact_unique")]
+        indexes = [models.Index(fields=["pharmacy", "hour"], name="core_hourly_fact_pharmacy_idx")]
+
+
+class DailyPharmacyFact(PharmacyFact):
+    day = models.DateField()
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["day", "pharmacy"], name="core_daily_fact_unique")]
+        indexes = [models.Index(fields=["pharmacy", "day"], name="core_daily_fact_pharmacy_idx")]
+
+
+class RollupWatermark(models.Model):
+    """How far a rollup has read a source table, as the last ``(updated_at, id)`` it processed."""
+
+    name = models.CharField(max_length=32, unique=True)
+    updated_at = models.DateTimeField(null=True, blank=True)
+    last_id = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name} @ {self.updated_at} #{self.last_id}"
+
+
+class SeedState(models.Model):
+    key = models.CharField(max_length=32, unique=True)
+    version = models.PositiveIntegerField(default=0)
+    seeded_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.key} · v{self.version}"
+
+
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
 def ensure_profile(sender, instance, created, **kwargs):
     if created:
         Profile.objects.create(user=instance)
+
+
+@receiver(post_save, sender=DistributorStatus)
+def register_status_option(sender, instance, raw=False, **kwargs):
+    if not raw:
+        StatusOption.register(instance.status)
@@ -0,0 +1,110 @@
+from dataclasses import dataclass
+
+from django.core import signing
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.http import QueryDict
+
+CURSOR_SALT = "core.pagination"
+
+# Orderings end in the primary key so every row has a unique, stable position.
+NEWEST_FIRST = ("-created_at", "-id")
+OLDEST_FIRST = ("created_at", "id")
+RECENTLY_UPDATED = ("-updated_at", "-id")
+
+
+@dataclass
+class KeysetPage:
+    items: list
+    next_cursor: str | None = None
+    cursor: str | None = None
+    param: str = "after"
+    next_url: str | None = None
+    first_url: str | None = None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __bool__(self):
+        return bool(self.items)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+def _split(ordering):
+    return [(name.lstrip("-"), name.startswith("-")) for name in ordering]
+
+
+def encode_cursor(values):
+    return signing.dumps([None if value is None else str(value) for value in values], salt=CURSOR_SALT, compress=True)
+
+
+def decode_cursor(model, ordering, cursor):
+    """Return typed key values for ``cursor`` or None when it is missing, stale or tampered with."""
+    if not cursor:
+        return None
+    try:
+        raw = signing.loads(cursor, salt=CURSOR_SALT)
+    except signing.BadSignature:
+        return None
+    keys = _split(ordering)
+    if not isinstance(raw, list) or len(raw) != len(keys):
+        return None
+    try:
+        return [model._meta.get_field(name).to_python(value) for (name, _), value in zip(keys, raw)]
+    except (ValidationError, LookupError):
+        return None
+
+
+def _after(ordering, values):
+    # (a, b, c) > (va, vb, vc) expanded so each branch can use the composite index.
+    condition = Q()
+    prefix = {}
+    for (name, descending), value in zip(_split(ordering), values):
+        lookup = "lt" if descending else "gt"
+        condition |= Q(**prefix, **{f"{name}__{lookup}": value})
+        prefix[name] = value
+    return condition
+
+
+def paginate_keyset(queryset, ordering, cursor=None, per_page=25):
+    """Seek-paginate ``queryset`` by ``ordering``; never issues OFFSET or COUNT(*)."""
+    queryset = queryset.order_by(*ordering)
+    values = decode_cursor(queryset.model, ordering, cursor)
+    if values is not None:
+        queryset = queryset.filter(_after(ordering, values))
+    else:
+        cursor = None
+    rows = list(queryset[: per_page + 1])
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, name) for name, _ in _split(ordering)])
+    return KeysetPage(items=rows, next_cursor=next_cursor, cursor=cursor)
+
+
+def page_from_request(request, queryset, ordering, param="after", per_page=25, keep=()):
+    """
+    A page of ``queryset`` positioned by the ``param`` cursor. The next/first links carry only that
+    cursor and the query parameters named in ``keep``: lists are rendered inside cached fragments,
+    so a link must not pick up anything the fragment's cache key does not vary on.
+    """
+    page = paginate_keyset(queryset, ordering, request.GET.get(param), per_page)
+    page.param = param
+    query = QueryDict(mutable=True)
+    for name in keep:
+        if name in request.GET:
+            query.setlist(name, request.GET.getlist(name))
+    if page.next_cursor:
+        query[param] = page.next_cursor
+        page.next_url = f"{request.path}?{query.urlencode()}"
+    if page.cursor:
+        query.pop(param, None)
+        page.first_url = f"{request.path}?{query.urlencode()}" if query else request.path
+    return page
@@ -0,0 +1,118 @@
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+STICKY_COOKIE = "pg_primary"
+# A session missing on a lagging replica would look expired, and SessionMiddleware deletes the
+# cookie of an empty session, logging the user out.
+PRIMARY_ONLY_APPS = {"sessions"}
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# Replica alias serving reads for the current request, or None to read from the primary.
+_replica = ContextVar("replica", default=None)
+
+
+def replicas():
+    return getattr(settings, "DATABASE_REPLICAS", [])
+
+
+def _sticky_seconds():
+    return getattr(settings, "REPLICA_STICKY_SECONDS", 5)
+
+
+def current_replica():
+    return _replica.get()
+
+
+@contextmanager
+def read_from(alias):
+    """Send ORM reads in this context to ``alias`` (None means the primary)."""
+    token = _replica.set(alias)
+    try:
+        yield
+    finally:
+        _replica.reset(token)
+
+
+class PrimaryReplicaRouter:
+    """
+    Writes always go to the primary. Reads go to the replica chosen for the current request by
+    ``ReplicaRoutingMiddleware``; everywhere else (commands, background threads, writes' own
+    reads) they stay on the primary, so only request-scoped dashboard reads ever see replica lag.
+    """
+
+    def db_for_read(self, model, **hints):
+        alias = _replica.get()
+        if alias is None or model._meta.app_label in PRIMARY_ONLY_APPS:
+            return DEFAULT_DB_ALIAS
+        # Inside a transaction the primary already holds the data the transaction is about to change.
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+def _pinned(request):
+    try:
+        return float(request.COOKIES.get(STICKY_COOKIE) or 0) > time.time()
+    except ValueError:
+        return False
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Serve safe requests from one replica, picked per request so all of its reads share a snapshot.
+    Any other request reads from the primary and pins the client there for
+    ``REPLICA_STICKY_SECONDS`` so it reads its own writes even if the replicas lag behind.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def _alias(self, request):
+        safe = request.method in SAFE_METHODS
+        return random.choice(replicas()) if safe and not _pinned(request) else None
+
+    def _pin(self, request, response):
+        if request.method not in SAFE_METHODS:
+            sticky = _sticky_seconds()
+            response.set_cookie(
+                STICKY_COOKIE, f"{time.time() + sticky:.3f}", max_age=sticky, httponly=True, samesite="Lax"
+            )
+        return response
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not replicas():
+            return self.get_response(request)
+        with read_from(self._alias(request)):
+            response = self.get_response(request)
+        return self._pin(request, response)
+
+    async def __acall__(self, request):
+        if not replicas():
+            return await self.get_response(request)
+        # The context variable carries over to the threads sync_to_async runs ORM calls on.
+        with read_from(self._alias(request)):
+            response = await self.get_response(request)
+        return self._pin(request, response)
@@ -0,0 +1,110 @@
+import math
+import re
+import unicodedata
+
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.signals import post_save
+
+from .models import Pharmacy, PharmacySearchTerm
+
+MIN_QUERY_LENGTH = 2
+# Share of the query's trigrams a pharmacy must contain; low enough to absorb a typo or two.
+MATCH_THRESHOLD = 0.45
+CANDIDATE_MULTIPLIER = 4
+
+_NON_WORD = re.compile(r"[^0-9a-z]+")
+
+
+def normalize(text):
+    text = unicodedata.normalize("NFKD", text or "").encode("ascii", "ignore").decode()
+    return _NON_WORD.sub(" ", text.lower()).strip()
+
+
+def _word_trigrams(word, closed=True):
+    padded = f"  {word} " if closed else f"  {word}"
+    return {padded[index:index + 3] for index in range(len(padded) - 2)}
+
+
+def document_trigrams(*texts):
+    grams = set()
+    for text in texts:
+        for word in normalize(text).split():
+            grams |= _word_trigrams(word)
+    return grams
+
+
+def query_trigrams(query):
+    words = normalize(query).split()
+    grams = set()
+    for position, word in enumerate(words):
+        # The last word may still be typed, so don't require its word-end trigram (prefix match).
+        grams |= _word_trigrams(word, closed=position < len(words) - 1)
+    return grams
+
+
+def index_pharmacies(pharmacies):
+    pharmacies = [pharmacy for pharmacy in pharmacies if pharmacy.pk]
+    terms = [
+        PharmacySearchTerm(pharmacy_id=pharmacy.pk, trigram=gram)
+        for pharmacy in pharmacies
+        for gram in document_trigrams(pharmacy.name, pharmacy.address)
+    ]
+    with transaction.atomic():
+        PharmacySearchTerm.objects.filter(pharmacy_id__in=[pharmacy.pk for pharmacy in pharmacies]).delete()
+        PharmacySearchTerm.objects.bulk_create(terms, batch_size=5000)
+
+
+def rebuild_index(batch_size=2000):
+    PharmacySearchTerm.objects.all().delete()
+    batch = []
+    indexed = 0
+    for pharmacy in Pharmacy.objects.only("name", "address").order_by("pk").iterator(chunk_size=batch_size):
+        batch.append(pharmacy)
+        if len(batch) >= batch_size:
+            index_pharmacies(batch)
+            indexed += len(batch)
+            batch = []
+    if batch:
+        index_pharmacies(batch)
+        indexed += len(batch)
+    return indexed
+
+
+def search_pharmacies(query, limit=10):
+    """Rank pharmacies by trigram overlap with ``query`` on name and address."""
+    grams = query_trigrams(query)
+    if len(normalize(query)) < MIN_QUERY_LENGTH or not grams:
+        return []
+    needed = max(1, math.ceil(len(grams) * MATCH_THRESHOLD))
+    hits = list(
+        PharmacySearchTerm.objects.filter(trigram__in=grams)
+        .values("pharmacy_id")
+        .annotate(hits=Count("id"))
+        .filter(hits__gte=needed)
+        .order_by("-hits", "pharmacy_id")
+        .values_list("pharmacy_id", "hits")[: limit * CANDIDATE_MULTIPLIER]
+    )
+    if not hits:
+        return []
+    pharmacies = Pharmacy.objects.in_bulk([pharmacy_id for pharmacy_id, _ in hits])
+    normalized = normalize(query)
+    results = []
+    for pharmacy_id, count in hits:
+        pharmacy = pharmacies.get(pharmacy_id)
+        if pharmacy is None:
+            continue
+        pharmacy.score = count / len(grams)
+        pharmacy.prefix_match = normalize(pharmacy.name).startswith(normalized)
+        results.append(pharmacy)
+    results.sort(key=lambda pharmacy: (-pharmacy.prefix_match, -pharmacy.score, len(pharmacy.name), pharmacy.pk))
+    return results[:limit]
+
+
+def _reindex_pharmacy(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_pharmacies([instance])
+
+
+def connect_signals():
+    post_save.connect(_reindex_pharmacy, sender=Pharmacy, dispatch_uid="search:pharmacy")
@@ -0,0 +1,69 @@
+import asyncio
+from dataclasses import dataclass
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.db.models import QuerySet
+from django.utils.functional import SimpleLazyObject
+
+from .fragments import fragment_key
+
+
+@dataclass
+class Section:
+    """
+    One independently loadable part of a dashboard context.
+
+    ``fragments`` lists the ``(name, models, vary)`` of every ``{% dashboard_fragment %}`` that renders
+    the section, mirroring the template tag, so a section whose markup is already cached is skipped.
+    """
+
+    load: object
+    fragments: tuple = ()
+
+
+def _evaluate(section):
+    value = section.load()
+    return list(value) if isinstance(value, QuerySet) else value
+
+
+def lazy_sections(sections):
+    """Sync views: evaluate each section only if the template actually touches it."""
+    return {name: SimpleLazyObject(lambda section=section: _evaluate(section)) for name, section in sections.items()}
+
+
+def _cached_names(role, sections):
+    keys = {
+        name: [fragment_key(fragment, role, models, vary) for fragment, models, vary in section.fragments]
+        for name, section in sections.items()
+        if section.fragments
+    }
+    found = cache.get_many([key for section_keys in keys.values() for key in section_keys])
+    return {name for name, section_keys in keys.items() if all(key in found for key in section_keys)}
+
+
+def _load_in_worker(section, metrics):
+    try:
+        if metrics is None:
+            return _evaluate(section)
+        with metrics.capture():
+            return _evaluate(section)
+    finally:
+        # Pool threads see no request_started/finished signals, so apply CONN_MAX_AGE here instead.
+        close_old_connections()
+
+
+async def gather_sections(role, sections, metrics=None):
+    """
+    Async views: load every section whose fragment is not cached concurrently, one worker thread
+    (and DB connection) each. Cached sections stay lazy and are never queried.
+    """
+    cached = await sync_to_async(_cached_names)(role, sections)
+    pending = [name for name in sections if name not in cached]
+    values = await asyncio.gather(
+        *(sync_to_async(_load_in_worker, thread_sensitive=False)(sections[name], metrics) for name in pending)
+    )
+    context = lazy_sections({name: sections[name] for name in cached})
+    context.update(zip(pending, values))
+    return context
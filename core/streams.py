@@ -0,0 +1,92 @@
+import asyncio
+import itertools
+import json
+import threading
+from contextlib import asynccontextmanager
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+ORDER_TOPIC = "orders"
+DELIVERY_TOPIC = "deliveries"
+
+
+class LocalBroker:
+    """
+    In-process pub/sub for live status events.
+
+    ``publish`` may be called from any thread (sync views run in worker threads); events are handed
+    to each subscriber's event loop with ``call_soon_threadsafe``. Only subscribers connected to the
+    same process are reached, so multi-process deployments should point ``ORDER_STREAM_BROKER`` at a
+    shared implementation with the same two methods.
+    """
+
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self._subscribers = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def publish(self, topic, payload):
+        event = {"id": next(self._ids), "topic": topic, "data": payload}
+        with self._lock:
+            subscribers = list(self._subscribers.get(topic, ()))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._offer, queue, event)
+            except RuntimeError:
+                # The subscriber's loop already closed; its finally block removes it shortly.
+                pass
+        return event
+
+    @staticmethod
+    def _offer(queue, event):
+        if queue.full():
+            # A stalled client loses its oldest event rather than holding memory for everyone.
+            queue.get_nowait()
+        queue.put_nowait(event)
+
+    @asynccontextmanager
+    async def subscribe(self, topic):
+        entry = (asyncio.get_running_loop(), asyncio.Queue(self.queue_size))
+        with self._lock:
+            self._subscribers.setdefault(topic, set()).add(entry)
+        try:
+            yield entry[1]
+        finally:
+            with self._lock:
+                subscribers = self._subscribers.get(topic, set())
+                subscribers.discard(entry)
+                if not subscribers:
+                    self._subscribers.pop(topic, None)
+
+    def subscriber_count(self, topic):
+        with self._lock:
+            return len(self._subscribers.get(topic, ()))
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(getattr(settings, "ORDER_STREAM_BROKER", "core.streams.LocalBroker"))()
+    return _broker
+
+
+def publish(topic, payload):
+    return get_broker().publish(topic, payload)
+
+
+def sse_message(data, event=None, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event:
+        lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
@@ -0,0 +1,410 @@
+import math
+import random
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from decimal import Decimal
+from itertools import accumulate
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from . import analytics, geo, kpis, search
+from .fragments import WATCHED_MODELS, bump_generation
+from .models import (
+    ChatMessage,
+    ChatThread,
+    DeliveryTask,
+    Notification,
+    Order,
+    Pharmacy,
+    Profile,
+    StockItem,
+)
+
+User = get_user_model()
+
+DEFAULT_PASSWORD = "pharmacygo-load"
+
+FIRST_NAMES = [
+    "Laylo", "Aziz", "Mavluda", "Sardor", "Umid", "Nodira", "Azamat", "Bekzod", "Dilnoza", "Jasur",
+    "Madina", "Otabek", "Sevara", "Timur", "Zarina", "Rustam", "Kamola", "Farrukh", "Gulnora", "Sherzod",
+]
+LAST_NAMES = [
+    "Karimova", "Yuldashev", "Rustam", "Mardan", "Abdullaev", "Jura", "Jalil", "Tursunov", "Ergasheva",
+    "Nazarov", "Saidova", "Rakhimov", "Usmonova", "Khodjaev", "Ismoilova", "Aliev",
+]
+DISTRICTS = [
+    "Yunusabad", "Chilanzar", "Mirzo Ulugbek", "Sergeli", "Shaykhontohur", "Yakkasaray", "Mirabad",
+    "Almazar", "Uchtepa", "Bektemir", "Yashnobod",
+]
+BRANDS = ["PharmaLife", "CityMeds", "UzPharma", "CarePoint", "UzMed", "NovaPharm", "HealthHub", "MedLine"]
+MEDICINES = [
+    ("AMX", "Amoxil 500mg"), ("GLC", "Glucophage XR"), ("XYZ", "Xyzal 5mg"), ("LOS", "Losartan 50mg"),
+    ("IBU", "Ibuprofen 400mg"), ("PAR", "Paracetamol 500mg"), ("OME", "Omeprazole 20mg"),
+    ("CET", "Cetirizine 10mg"), ("MET", "Metformin 850mg"), ("ATO", "Atorvastatin 20mg"),
+    ("VTD", "Vitamin D3 2000IU"), ("AZI", "Azithromycin 250mg"),
+]
+NOTIFICATION_MESSAGES = [
+    ("Courier is 5 minutes away", Notification.Type.INFO),
+    ("Prescription approved", Notification.Type.SUCCESS),
+    ("New promo on immunity boosters", Notification.Type.WARNING),
+    ("Order delivered — rate your courier", Notification.Type.SUCCESS),
+    ("Pharmacy is preparing your order", Notification.Type.INFO),
+]
+CHAT_LINES = [
+    "Can I take this twice today?", "Keep it to one dose every 24 hours.", "Is the courier on the way?",
+    "Your order is packed.", "Noted, thank you!", "Do you have a generic alternative?",
+]
+CHAT_SUBJECTS = ["Dosage question", "Prescription renewal", "Order follow-up", "Allergy medication", "Generic alternatives"]
+CHAT_MESSAGES_PER_THREAD = 20
+
+# Share of orders per hour of day (Tashkent traffic peaks at lunch and after work).
+HOURLY_WEIGHTS = [1, 1, 1, 1, 1, 2, 4, 6, 8, 9, 10, 11, 12, 11, 9, 8, 9, 11, 12, 11, 8, 5, 3, 2]
+HOURLY_CUM_WEIGHTS = list(accumulate(HOURLY_WEIGHTS))
+
+SETTLED_ORDER_STATUSES = [Order.Status.DELIVERED] * 88 + [Order.Status.CANCELLED] * 12
+ACTIVE_ORDER_STATUSES = (
+    [Order.Status.PENDING] * 30 + [Order.Status.PACKED] * 25 + [Order.Status.OUT] * 30
+    + [Order.Status.DELIVERED] * 10 + [Order.Status.CANCELLED] * 5
+)
+ORDER_PROGRESS = {
+    Order.Status.PENDING: ("Requested", "TBD"),
+    Order.Status.PACKED: ("Packed", "18 min"),
+    Order.Status.OUT: ("Out for delivery", "15 min"),
+    Order.Status.DELIVERED: ("Delivered", "Completed"),
+    Order.Status.CANCELLED: ("Cancelled", "—"),
+}
+TASK_STATUSES = [DeliveryTask.Status.DONE] * 70 + [DeliveryTask.Status.IN_PROGRESS] * 18 + [DeliveryTask.Status.AWAITING] * 12
+STAFF_ROLES = [Profile.Role.PHARMACY, Profile.Role.DISTRIBUTOR, Profile.Role.ADMIN]
+# Pharmacies cluster around Tashkent's centre and thin out towards the ring road.
+CITY_CENTER = (41.2995, 69.2401)
+CITY_SPREAD_DEGREES = 0.06
+# Generated history ends here unless a caller passes ``now``, so a seed reproduces the same rows on any day.
+DEFAULT_NOW = datetime(2026, 1, 1, 12)
+
+
+@contextmanager
+def manual_timestamps(*models):
+    """
+    Let callers set ``created_at``/``updated_at`` explicitly while bulk loading. The flags live on the
+    shared model fields, so this is not thread-safe: other threads saving these models meanwhile keep
+    the values they were given too.
+    """
+    patched = []
+    for model in models:
+        for field in model._meta.concrete_fields:
+            if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False):
+                patched.append((field, field.auto_now, field.auto_now_add))
+                field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in patched:
+            field.auto_now = auto_now
+            field.auto_now_add = auto_now_add
+
+
+@contextmanager
+def fast_sqlite_writes():
+    """Relax fsync while bulk loading a throwaway SQLite database."""
+    # SQLite refuses to change the safety level inside a transaction (e.g. a test case's).
+    if connection.vendor != "sqlite" or connection.in_atomic_block:
+        yield
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA synchronous")
+        previous = cursor.fetchone()[0]
+        cursor.execute("PRAGMA synchronous = OFF")
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute(f"PRAGMA synchronous = {int(previous)}")
+
+
+class SyntheticDataset:
+    """Deterministic bulk generator for load-testing the dashboards."""
+
+    def __init__(self, seed=42, batch_size=5000, days=90, now=DEFAULT_NOW, progress=None):
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.days = days
+        self.progress = progress or (lambda label, done, total, rate: None)
+        if timezone.is_naive(now):
+            now = timezone.make_aware(now)
+        self.now = now.replace(minute=0, second=0, microsecond=0)
+        self.pharmacy_ids = []
+        self.pharmacy_cum_weights = []
+
+    def generate(self, users=0, pharmacies=0, orders=0, stock=0, tasks=0, notifications=0, messages=0):
+        with fast_sqlite_writes():
+            if users:
+                self.create_users(users)
+            if pharmacies:
+                self.create_pharmacies(pharmacies)
+            if orders or tasks:
+                self._load_pharmacies()
+            if orders:
+                self.create_orders(orders)
+            if stock:
+                self.create_stock(stock)
+            if tasks:
+                self.create_tasks(tasks)
+            if notifications:
+                self.create_notifications(notifications)
+            if messages:
+                self.create_messages(messages)
+        # bulk_create skips post_save, so invalidate cached dashboard sections and recount rollups by hand.
+        bump_generation(*WATCHED_MODELS)
+        since = self.now - timedelta(days=self.days + 1)
+        if orders:
+            # rebuild() counts back from today, which may be well past the generated history.
+            kpis.rebuild(days=max((timezone.localdate() - timezone.localdate(since)).days, 0) + 1)
+        if orders or tasks:
+            analytics.backfill(since=since)
+
+    def _batched(self, label, total, build, model):
+        started = time.monotonic()
+        done = 0
+        while done < total:
+            size = min(self.batch_size, total - done)
+            rows = [build(done + offset) for offset in range(size)]
+            with transaction.atomic():
+                model.objects.bulk_create(rows, batch_size=self.batch_size)
+            done += size
+            elapsed = max(time.monotonic() - started, 1e-6)
+            self.progress(label, done, total, done / elapsed)
+            yield rows
+
+    def _next_id(self, model):
+        return (model.objects.aggregate(top=Max("id"))["top"] or 0) + 1
+
+    def _timestamp(self, max_age_days=None):
+        max_age_days = self.days if max_age_days is None else max_age_days
+        day = int(self.rng.triangular(0, max_age_days, 0))
+        hour = self.rng.choices(range(24), cum_weights=HOURLY_CUM_WEIGHTS)[0]
+        stamp = (self.now - timedelta(days=day)).replace(hour=hour, minute=self.rng.randrange(60), second=self.rng.randrange(60))
+        return min(stamp, self.now)
+
+    def _person(self):
+        return self.rng.choice(FIRST_NAMES), self.rng.choice(LAST_NAMES)
+
+    def _phone(self):
+        return f"+998 9{self.rng.randrange(10)} {self.rng.randrange(100, 1000)} {self.rng.randrange(10, 100)} {self.rng.randrange(10, 100)}"
+
+    def create_users(self, per_role):
+        password = make_password(DEFAULT_PASSWORD)
+        start = self._next_id(User)
+        roles = [Profile.Role.CUSTOMER] + STAFF_ROLES
+        total = per_role * len(roles)
+        plan = [roles[index // per_role] for index in range(total)]
+
+        def build_user(index):
+            first, last = self._person()
+            role = plan[index]
+            username = f"load-{role}-{start + index:07d}"
+            email = "" if role == Profile.Role.CUSTOMER else f"{username}@load.pharmacygo.uz"
+            return User(
+                username=username,
+                email=email,
+                password=password,
+                first_name=first,
+                last_name=last,
+                date_joined=self._timestamp(),
+            )
+
+        for users in self._batched("users", total, build_user, User):
+            if users[0].pk is None:
+                lookup = dict(User.objects.filter(username__in=[u.username for u in users]).values_list("username", "id"))
+                for user in users:
+                    user.pk = lookup[user.username]
+            profiles = []
+            for user in users:
+                role = user.username.split("-")[1]
+                phone = self._phone() if role == Profile.Role.CUSTOMER else ""
+                profiles.append(
+                    Profile(
+                        user_id=user.pk,
+                        role=role,
+                        phone=phone,
+                        phone_normalized=Profile.normalize_phone(phone),
+                        organization=f"{self.rng.choice(BRANDS)} {self.rng.choice(DISTRICTS)}" if role == Profile.Role.PHARMACY else "",
+                        created_at=user.date_joined,
+                    )
+                )
+            with manual_timestamps(Profile), transaction.atomic():
+                Profile.objects.bulk_create(profiles, batch_size=self.batch_size)
+
+    def create_pharmacies(self, total):
+        start = self._next_id(Pharmacy)
+
+        def build(index):
+            created = self._timestamp(max_age_days=self.days * 4)
+            district = self.rng.choice(DISTRICTS)
+            latitude = round(self.rng.gauss(CITY_CENTER[0], CITY_SPREAD_DEGREES), 6)
+            longitude = round(self.rng.gauss(CITY_CENTER[1], CITY_SPREAD_DEGREES), 6)
+            return Pharmacy(
+                name=f"{self.rng.choice(BRANDS)} {district} #{start + index}",
+                distance_km=Decimal(str(round(min(self.rng.lognormvariate(0.4, 0.6), 99.0), 1))),
+                rating=Decimal(str(round(min(max(self.rng.gauss(4.6, 0.25), 3.0), 5.0), 1))),
+                address=f"{district} {self.rng.randrange(1, 40)}, {self.rng.randrange(1, 120)}",
+                pin_top=f"{self.rng.randrange(5, 95)}%",
+                pin_left=f"{self.rng.randrange(5, 95)}%",
+                latitude=latitude,
+                longitude=longitude,
+                geo_cell=geo.cell_for(latitude, longitude),
+                created_at=created,
+                updated_at=created,
+            )
+
+        with manual_timestamps(Pharmacy):
+            for pharmacies in self._batched("pharmacies", total, build, Pharmacy):
+                if pharmacies[0].pk is None:
+                    pharmacies = Pharmacy.objects.filter(name__in=[pharmacy.name for pharmacy in pharmacies])
+                search.index_pharmacies(pharmacies)
+
+    def _load_pharmacies(self):
+        self.pharmacy_ids = list(Pharmacy.objects.order_by("id").values_list("id", flat=True))
+        if not self.pharmacy_ids:
+            raise ValueError("Generate pharmacies (or run `manage.py seed`) before orders and delivery tasks.")
+        # A few flagship stores take most of the traffic.
+        weights = [1 / (rank + 1) ** 0.8 for rank in range(len(self.pharmacy_ids))]
+        self.rng.shuffle(weights)
+        self.pharmacy_cum_weights = list(accumulate(weights))
+
+    def _pick_pharmacy(self):
+        return self.rng.choices(self.pharmacy_ids, cum_weights=self.pharmacy_cum_weights)[0]
+
+    def create_orders(self, total):
+        start = self._next_id(Order)
+        recent_cutoff = self.now - timedelta(days=1)
+
+        def build(index):
+            created = self._timestamp()
+            pool = ACTIVE_ORDER_STATUSES if created >= recent_cutoff else SETTLED_ORDER_STATUSES
+            status = self.rng.choice(pool)
+            progress, eta = ORDER_PROGRESS[status]
+            first, last = self._person()
+            items = ", ".join(name for _, name in self.rng.sample(MEDICINES, self.rng.choice([1, 1, 1, 2, 2, 3])))
+            updated = created + timedelta(minutes=self.rng.randrange(5, 90)) if status in (Order.Status.DELIVERED, Order.Status.CANCELLED) else created
+            updated = min(updated, self.now)
+            return Order(
+                code=f"#LT-{start + index:07d}",
+                customer_name=f"{first} {last}",
+                pharmacy_id=self._pick_pharmacy(),
+                status=status,
+                items=items[:255],
+                progress=progress,
+                eta_text=eta,
+                delivered_at=updated if status == Order.Status.DELIVERED else None,
+                created_at=created,
+                updated_at=updated,
+            )
+
+        with manual_timestamps(Order):
+            for _ in self._batched("orders", total, build, Order):
+                pass
+
+    def create_stock(self, total):
+        start = self._next_id(StockItem)
+
+        def build(index):
+            prefix, name = self.rng.choice(MEDICINES)
+            quantity = int(self.rng.expovariate(1 / 250))
+            created = self._timestamp()
+            expires_on = created.date() + timedelta(days=int(self.rng.triangular(1, 720, 120)))
+            days_left = (expires_on - self.now.date()).days
+            return StockItem(
+                sku=f"{prefix}-{start + index}",
+                name=name,
+                quantity=quantity,
+                status="Low" if quantity < 40 else ("Watch" if days_left <= 30 else "Healthy"),
+                expires_on=expires_on,
+                created_at=created,
+                updated_at=created,
+            )
+
+        with manual_timestamps(StockItem):
+            for _ in self._batched("stock items", total, build, StockItem):
+                pass
+
+    def create_tasks(self, total):
+        start = self._next_id(DeliveryTask)
+
+        def build(index):
+            created = self._timestamp()
+            return DeliveryTask(
+                code=f"#DL-{start + index}",
+                pharmacy_id=self._pick_pharmacy(),
+                address=f"{self.rng.choice(DISTRICTS)} {self.rng.randrange(1, 40)}",
+                eta_text=f"{self.rng.randrange(8, 22):02d}:{self.rng.choice(['00', '10', '20', '30', '40', '50'])}",
+                status=self.rng.choice(TASK_STATUSES),
+                created_at=created,
+                updated_at=created,
+            )
+
+        with manual_timestamps(DeliveryTask):
+            for _ in self._batched("delivery tasks", total, build, DeliveryTask):
+                pass
+
+    def create_notifications(self, total):
+        audiences = [Profile.Role.CUSTOMER] * 7 + [Profile.Role.PHARMACY] * 1 + [Profile.Role.DISTRIBUTOR] * 1 + [Profile.Role.ADMIN] * 1
+
+        def build(index):
+            message, kind = self.rng.choice(NOTIFICATION_MESSAGES)
+            created = self._timestamp()
+            return Notification(
+                audience=self.rng.choice(audiences),
+                message=message,
+                type=kind,
+                created_at=created,
+                updated_at=created,
+            )
+
+        with manual_timestamps(Notification):
+            for _ in self._batched("notifications", total, build, Notification):
+                pass
+
+    def _create_threads(self, total):
+        start = self._next_id(ChatThread)
+        customers = list(
+            Profile.objects.filter(role=Profile.Role.CUSTOMER).order_by("user_id").values_list("user_id", flat=True)[:total]
+        )
+
+        def build(index):
+            created = self._timestamp()
+            return ChatThread(
+                customer_id=customers[index % len(customers)] if customers else None,
+                subject=self.rng.choice(CHAT_SUBJECTS),
+                created_at=created,
+                updated_at=created,
+            )
+
+        with manual_timestamps(ChatThread):
+            for _ in self._batched("chat threads", total, build, ChatThread):
+                pass
+        return list(ChatThread.objects.filter(id__gte=start).values_list("id", flat=True))
+
+    def create_messages(self, total):
+        thread_ids = self._create_threads(math.ceil(total / CHAT_MESSAGES_PER_THREAD))
+
+        def build(index):
+            sender = ChatMessage.Sender.CUSTOMER if index % 2 == 0 else ChatMessage.Sender.DOCTOR
+            first, last = self._person()
+            created = self._timestamp()
+            return ChatMessage(
+                thread_id=self.rng.choice(thread_ids),
+                sender=sender,
+                author=first if sender == ChatMessage.Sender.CUSTOMER else f"Dr. {last}",
+                body=self.rng.choice(CHAT_LINES),
+                created_at=created,
+                updated_at=created,
+            )
+
+        with manual_timestamps(ChatMessage):
+            for _ in self._batched("chat messages", total, build, ChatMessage):
+                pass
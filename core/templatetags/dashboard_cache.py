@@ -0,0 +1,75 @@
+from django import template
+from django.core.cache import cache
+from django.utils.safestring import mark_safe
+
+from ..fragments import fragment_key, fragment_timeout
+
+register = template.Library()
+
+CSRF_PLACEHOLDER = "__dashboard_fragment_csrf__"
+
+
+def _viewer_role(context):
+    request = context.get("request")
+    user = getattr(request, "user", None)
+    if not user or not user.is_authenticated:
+        return None
+    profile = getattr(user, "profile", None)
+    return profile.role if profile else None
+
+
+class DashboardFragmentNode(template.Node):
+    def __init__(self, nodelist, name, models, vary):
+        self.nodelist = nodelist
+        self.name = name
+        self.models = models
+        self.vary = vary
+
+    def render(self, context):
+        key = fragment_key(
+            self.name.resolve(context),
+            _viewer_role(context),
+            [model.resolve(context) for model in self.models],
+            [value.resolve(context) for value in self.vary],
+        )
+        content = cache.get(key)
+        if content is None:
+            # Cache the markup with a placeholder token so one viewer's CSRF token is never served to another.
+            with context.push(csrf_token=CSRF_PLACEHOLDER):
+                content = self.nodelist.render(context)
+            cache.set(key, content, fragment_timeout())
+        token = context.get("csrf_token")
+        return mark_safe(content.replace(CSRF_PLACEHOLDER, str(token) if token else ""))
+
+
+@register.tag
+def dashboard_fragment(parser, token):
+    """
+    Cache a rendered dashboard section per viewer role and model generation::
+
+        {% dashboard_fragment "admin-orders" on "core.Order" "core.Pharmacy" vary cursor %}
+            ...
+        {% enddashboard_fragment %}
+    """
+    bits = token.split_contents()
+    if len(bits) < 4 or bits[2] != "on":
+        raise template.TemplateSyntaxError(
+            f"'{bits[0]}' usage: {{% {bits[0]} \"name\" on \"app.Model\" ... [vary expr ...] %}}"
+        )
+    name = parser.compile_filter(bits[1])
+    rest = bits[3:]
+    if "vary" in rest:
+        split = rest.index("vary")
+        model_bits, vary_bits = rest[:split], rest[split + 1:]
+    else:
+        model_bits, vary_bits = rest, []
+    if not model_bits:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' needs at least one model label after 'on'.")
+    nodelist = parser.parse(("enddashboard_fragment",))
+    parser.delete_first_token()
+    return DashboardFragmentNode(
+        nodelist,
+        name,
+        [parser.compile_filter(bit) for bit in model_bits],
+        [parser.compile_filter(bit) for bit in vary_bits],
+    )
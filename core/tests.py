@@ -1,3 +1,1111 @@
-from django.test import TestCase
+import random
+import re
+import time
+from datetime import timedelta
+from unittest import skipUnless
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.auth import authenticate, get_user_model
+from django.contrib import admin
+from django.contrib.auth.hashers import MD5PasswordHasher
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connection, connections, router, transaction
+from django.db.models import Min
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import path
+from django.utils import timezone
+
+from . import analytics, bootstrap, chat, codes, data, geo, inbox, kpis, search, urls, views
+from .backends import IdentifierBackend
+from .forms import IdentifierAuthenticationForm, SignUpForm
+from .checks import check_fragment_generations
+from .fragments import get_generations
+from .metrics import QueryBudgetExceeded
+from .middleware import RequestMetricsMiddleware
+from .models import (
+    ChatMessage,
+    ChatThread,
+    DailyPharmacyFact,
+    DeliveryTask,
+    DistributorStatus,
+    HourlyPharmacyFact,
+    IdempotencyKey,
+    InboxItem,
+    InboxState,
+    KpiPharmacyDay,
+    KpiRollup,
+    Notification,
+    Order,
+    PaymentCard,
+    PaymentProvider,
+    Pharmacy,
+    Profile,
+    RollupWatermark,
+    SeedState,
+    StatusOption,
+    StockItem,
+)
+from .pagination import NEWEST_FIRST, KeysetPage, page_from_request
+from .routers import STICKY_COOKIE, ReplicaRoutingMiddleware
+from .synthetic import DEFAULT_PASSWORD, SyntheticDataset
+from .transitions import ORDER_STATES, StateMachine
+
+# A table read without any index ("SCAN core_order") or a sort the index could not provide.
+FULL_SCAN = re.compile(r"\bSCAN (?!.*\bUSING (?:COVERING )?INDEX\b)(?!.*\bVIRTUAL TABLE\b)")
+TEMP_SORT = re.compile(r"\bUSE TEMP B-TREE\b")
+# A handful of admin-managed rows that are always read whole.
+REFERENCE_TABLES = {"core_paymentprovider"}
+# Views that go over their query budget fail the test that requested them.
+STRICT_METRICS = {**settings.REQUEST_METRICS, "LOG": False, "BUDGET_MODE": "raise"}
+# A database for ReplicaReadTests, registered before the test runner sets databases up so it gets
+# its own empty test database; unlike a configured replica it does not mirror the primary. Its tables
+# are built from the models, as a replica copies its schema instead of running migrations.
+LAGGING_REPLICA = "lagging_replica"
+connections.settings[LAGGING_REPLICA] = connections.configure_settings(
+    {
+        DEFAULT_DB_ALIAS: connections.settings[DEFAULT_DB_ALIAS],
+        LAGGING_REPLICA: {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:", "TEST": {"MIGRATE": False}},
+    }
+)[LAGGING_REPLICA]
+
+# URLconf for AsyncDashboardTests: the real routes, with each dashboard served by its ``*_async`` twin.
+urlpatterns = [
+    path("admin/", admin.site.urls),
+    *(
+        path(str(route.pattern), getattr(views, f"{route.name}_async", route.callback), name=route.name)
+        for route in urls.urlpatterns
+    ),
+]
+
+
+@skipUnless(connection.vendor == "sqlite", "Query plans are checked with SQLite's EXPLAIN QUERY PLAN.")
+@override_settings(
+    PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"], REQUEST_METRICS=STRICT_METRICS
+)
+class DashboardQueryPlanTests(TestCase):
+    """Every query the dashboards and sign-in issue must be served by an index over a large dataset."""
+
+    @classmethod
+    def setUpTestData(cls):
+        SyntheticDataset(seed=7, batch_size=2000, days=30).generate(
+            users=1000, pharmacies=300, orders=20000, stock=5000, tasks=5000, notifications=20, messages=200
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        cls.users = {
+            role: get_user_model().objects.filter(profile__role=role).order_by("id").first()
+            for role, _ in Profile.Role.choices
+        }
+
+    def setUp(self):
+        cache.clear()
+
+    def _plans(self, queries):
+        problems = []
+        with connection.cursor() as cursor:
+            for query in queries:
+                sql = query["sql"]
+                if not sql.startswith("SELECT"):
+                    continue
+                cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+                for row in cursor.fetchall():
+                    detail = row[-1]
+                    if FULL_SCAN.search(detail) and detail.split()[1] in REFERENCE_TABLES:
+                        continue
+                    if FULL_SCAN.search(detail) or TEMP_SORT.search(detail):
+                        problems.append(f"{detail}\n    {sql}")
+        return problems
+
+    def _pages(self, response):
+        values = [value for context in response.context or [] for value in context.flatten().values()]
+        values += [value for item in values if isinstance(item, dict) for value in item.values()]
+        return [value for value in values if isinstance(value, KeysetPage)]
+
+    def _get(self, user, *paths):
+        self.client.force_login(user)
+        with CaptureQueriesContext(connection) as captured:
+            for path in paths:
+                response = self.client.get(path, follow=True)
+                self.assertEqual(response.status_code, 200, path)
+                # Follow "next page" links so the keyset (cursor) queries are planned too.
+                for page in self._pages(response):
+                    if page.next_url:
+                        self.client.get(page.next_url)
+        self.client.logout()
+        return captured.captured_queries
+
+    def assertIndexed(self, queries):
+        problems = self._plans(queries)
+        if problems:
+            self.fail("Queries without a supporting index:\n" + "\n".join(problems))
+
+    def test_admin_pages(self):
+        self.assertIndexed(
+            self._get(
+                self.users[Profile.Role.ADMIN],
+                "/dashboard/admin/",
+                "/dashboard/admin/users/customers/",
+                "/dashboard/admin/users/stores/",
+            )
+        )
+
+    def test_customer_pages(self):
+        pharmacy = Pharmacy.objects.order_by("id").first()
+        self.assertIndexed(
+            self._get(
+                self.users[Profile.Role.CUSTOMER],
+                "/dashboard/customer/",
+                f"/dashboard/customer/pharmacies/{pharmacy.pk}/",
+            )
+        )
+
+    def test_store_pages(self):
+        self.assertIndexed(
+            self._get(
+                self.users[Profile.Role.PHARMACY], "/dashboard/pharmacy-store/", "/dashboard/pharmacy-store/?expires=30"
+            )
+        )
+
+    def test_distributor_pages(self):
+        task = DeliveryTask.objects.order_by("id").first()
+        self.assertIndexed(
+            self._get(
+                self.users[Profile.Role.DISTRIBUTOR],
+                "/dashboard/distributor/",
+                f"/dashboard/distributor/deliveries/{task.pk}/",
+            )
+        )
+
+    def test_sign_in_lookups(self):
+        customer = self.users[Profile.Role.CUSTOMER]
+        admin = self.users[Profile.Role.ADMIN]
+        attempts = [
+            (customer.profile.phone, Profile.Role.CUSTOMER),
+            (admin.email.upper(), Profile.Role.ADMIN),
+            ("nobody@example.com", Profile.Role.ADMIN),
+        ]
+        with CaptureQueriesContext(connection) as captured:
+            for identifier, role in attempts:
+                form = IdentifierAuthenticationForm(
+                    data={"username": identifier, "password": DEFAULT_PASSWORD, "role_hint": role}
+                )
+                form.is_valid()
+            SignUpForm(data={"role": Profile.Role.ADMIN, "email": admin.email.upper()}).is_valid()
+        self.assertIndexed(captured.captured_queries)
+
+
+@override_settings(DATABASE_REPLICAS=["replica_1"], REPLICA_STICKY_SECONDS=5)
+class ReplicaRoutingTests(SimpleTestCase):
+    def _route(self, method, sticky_until=None):
+        seen = {}
+
+        def view(request):
+            seen.update(
+                read=router.db_for_read(Order),
+                session=router.db_for_read(Session),
+                write=router.db_for_write(Order),
+            )
+            return HttpResponse()
+
+        request = getattr(RequestFactory(), method)("/dashboard/customer/")
+        if sticky_until is not None:
+            request.COOKIES[STICKY_COOKIE] = str(sticky_until)
+        response = ReplicaRoutingMiddleware(view)(request)
+        return seen, response
+
+    def test_safe_requests_read_from_a_replica(self):
+        seen, response = self._route("get")
+        self.assertEqual(seen, {"read": "replica_1", "session": DEFAULT_DB_ALIAS, "write": DEFAULT_DB_ALIAS})
+        self.assertNotIn(STICKY_COOKIE, response.cookies)
+
+    def test_writes_pin_the_client_to_the_primary(self):
+        seen, response = self._route("post")
+        self.assertEqual(seen["read"], DEFAULT_DB_ALIAS)
+        self.assertEqual(response.cookies[STICKY_COOKIE]["max-age"], 5)
+        seen, _ = self._route("get", sticky_until=response.cookies[STICKY_COOKIE].value)
+        self.assertEqual(seen["read"], DEFAULT_DB_ALIAS)
+        seen, _ = self._route("get", sticky_until=time.time() - 1)
+        self.assertEqual(seen["read"], "replica_1")
+
+    def test_reads_outside_requests_use_the_primary(self):
+        self.assertEqual(router.db_for_read(Order), DEFAULT_DB_ALIAS)
+
+
+class CountingHasher(MD5PasswordHasher):
+    algorithm = "counting_md5"
+    calls = 0
+
+    def encode(self, password, salt):
+        CountingHasher.calls += 1
+        return super().encode(password, salt)
+
+
+@override_settings(PASSWORD_HASHERS=["core.tests.CountingHasher"])
+class IdentifierBackendTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = get_user_model().objects.create_user(username="+998 90 123 45 67", password="secret-pass")
+        cls.customer.profile.phone = "+998 90 123 45 67"
+        cls.customer.profile.save(update_fields=["phone"])
+        cls.admin = get_user_model().objects.create_user(
+            username="saodat@pharmacygo.uz", email="saodat@pharmacygo.uz", password="secret-pass"
+        )
+        cls.admin.profile.role = Profile.Role.ADMIN
+        cls.admin.profile.save(update_fields=["role"])
+
+    def _authenticate(self, identifier, password="secret-pass"):
+        CountingHasher.calls = 0
+        with CaptureQueriesContext(connection) as captured:
+            user = authenticate(username=identifier, password=password)
+        self.assertEqual(len(captured), 1, identifier)
+        self.assertEqual(CountingHasher.calls, 1, identifier)
+        return user
+
+    def test_each_identifier_resolves_with_one_query_and_one_hash(self):
+        user = self._authenticate("saodat@pharmacygo.uz")
+        self.assertEqual(user, self.admin)
+        with self.assertNumQueries(0):
+            self.assertEqual(user.profile.role, Profile.Role.ADMIN)
+        self.assertEqual(self._authenticate("SAODAT@PharmacyGo.uz"), self.admin)
+        self.assertEqual(self._authenticate("+998901234567"), self.customer)
+        self.assertEqual(self._authenticate("998 (90) 123-45-67"), self.customer)
+
+    def test_misses_and_wrong_passwords_still_hash_once(self):
+        self.assertIsNone(self._authenticate("nobody@example.com"))
+        self.assertIsNone(self._authenticate("+998 00 000 00 00"))
+        self.assertIsNone(self._authenticate("saodat@pharmacygo.uz", "wrong-pass"))
+
+    def test_only_phone_like_identifiers_match_phones(self):
+        self.assertIsNone(IdentifierBackend().resolve("user998901234567"))
+
+
+class NearestPharmacyTests(TestCase):
+    # Query points on a cell corner, a hair either side of a cell edge, and on the antimeridian.
+    POINTS = [(41.30, 69.24), (41.3099999, 69.2400001), (41.3100001, 69.2399999), (-16.5, 179.999), (-16.5, -180)]
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(6)
+        pharmacies = []
+        for latitude, longitude in cls.POINTS:
+            for number in range(40):
+                spread = rng.choice([0.02, 0.05, 0.3])
+                pharmacies.append(
+                    Pharmacy(
+                        name=f"Geo {number}",
+                        latitude=max(min(latitude + rng.uniform(-spread, spread), 90), -90),
+                        longitude=(longitude + rng.uniform(-spread, spread) + 180) % 360 - 180,
+                    )
+                )
+            # Neighbours sitting exactly on the edges of the query point's cell.
+            for offset in (-geo.CELL_DEGREES, 0, geo.CELL_DEGREES):
+                pharmacies.append(
+                    Pharmacy(name="Edge", latitude=latitude + offset, longitude=(longitude + 180 - offset) % 360 - 180)
+                )
+        for pharmacy in pharmacies:
+            pharmacy.geo_cell = geo.cell_for(pharmacy.latitude, pharmacy.longitude)
+        Pharmacy.objects.bulk_create(pharmacies)
+
+    def _brute_force(self, latitude, longitude, limit, max_radius_km):
+        ranked = sorted(
+            (geo.haversine_km(latitude, longitude, pharmacy.latitude, pharmacy.longitude), pharmacy.pk)
+            for pharmacy in Pharmacy.objects.exclude(latitude=None).exclude(longitude=None)
+        )
+        return [pk for distance, pk in ranked[:limit] if distance <= max_radius_km]
+
+    def test_matches_a_brute_force_ranking(self):
+        for latitude, longitude in self.POINTS:
+            for limit, max_radius_km in ((1, 50), (10, 50), (60, 50), (5, 1)):
+                with self.subTest(point=(latitude, longitude), limit=limit, max_radius_km=max_radius_km):
+                    found = Pharmacy.objects.nearest(latitude, longitude, limit=limit, max_radius_km=max_radius_km)
+                    self.assertEqual(
+                        [pharmacy.pk for pharmacy in found],
+                        self._brute_force(latitude, longitude, limit, max_radius_km),
+                    )
+                    distances = [pharmacy.distance for pharmacy in found]
+                    self.assertEqual(distances, sorted(distances))
+
+
+class PharmacySearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.yunusobod = Pharmacy.objects.create(name="Dorixona Yunusobod", address="Amir Temur ko'chasi 12")
+        cls.downtown = Pharmacy.objects.create(name="PharmaLife Downtown", address="Mustaqillik maydoni 4")
+        cls.sergeli = Pharmacy.objects.create(name="CarePoint Sergeli", address="Yangi Sergeli 7")
+
+    def _names(self, query):
+        return [pharmacy.name for pharmacy in search.search_pharmacies(query)]
+
+    def test_a_typo_still_finds_the_pharmacy(self):
+        self.assertEqual(self._names("Yunusbod")[0], "Dorixona Yunusobod")
+        self.assertEqual(self._names("pharmalife donwtown")[0], "PharmaLife Downtown")
+        self.assertEqual(self._names("Sergelli")[0], "CarePoint Sergeli")
+        self.assertEqual(self._names("qwxzv"), [])
+
+    def test_unfinished_name_ranks_prefix_matches_first(self):
+        results = search.search_pharmacies("dorix")
+        self.assertEqual(results[0], self.yunusobod)
+        self.assertTrue(results[0].prefix_match)
+
+    def test_renaming_reindexes_the_pharmacy(self):
+        self.sergeli.name = "CarePoint Chilonzor"
+        self.sergeli.save()
+        self.assertEqual(self._names("Chilonzr")[0], "CarePoint Chilonzor")
+
+
+@override_settings(REQUEST_METRICS=STRICT_METRICS)
+class StatusOptionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.distributor = make_user("status-board@example.com", Profile.Role.DISTRIBUTOR)
+        cls.entry = DistributorStatus.objects.create(order_code="PG-1", pharmacy="UzMed", status="Awaiting pickup")
+
+    def _options(self):
+        return list(StatusOption.objects.values_list("label", flat=True))
+
+    def test_new_labels_join_the_dropdown_after_the_presets(self):
+        self.client.force_login(self.distributor)
+        self.client.post(f"/dashboard/distributor/status/{self.entry.pk}/update/", {"status": "  Left at door "})
+        self.entry.refresh_from_db()
+        self.assertEqual(self.entry.status, "Left at door")
+        options = self._options()
+        self.assertEqual(options[: len(data.DISTRIBUTOR_STATUS_PRESETS)], data.DISTRIBUTOR_STATUS_PRESETS)
+        self.assertEqual(options.count("Left at door"), 1)
+        response = self.client.get("/dashboard/distributor/")
+        self.assertContains(response, '<option value="Left at door"', html=False)
+
+    def test_dropdown_is_one_query_however_large_the_board(self):
+        DistributorStatus.objects.bulk_create(
+            [DistributorStatus(order_code=f"PG-{number}", pharmacy="UzMed", status="Delayed") for number in range(500)]
+        )
+        expected = self._options()
+        with self.assertNumQueries(1):
+            self.assertEqual(views._distributor_status_options(), expected)
+
+
+def make_user(username, role):
+    user = get_user_model().objects.create_user(username=username, password="secret-pass")
+    user.profile.role = role
+    user.profile.save(update_fields=["role"])
+    return user
+
+
+def make_order(pharmacy, code, status=Order.Status.PENDING):
+    return Order.objects.create(code=code, customer_name="Test customer", pharmacy=pharmacy, status=status)
+
+
+@override_settings(REQUEST_METRICS=STRICT_METRICS)
+class OrderTransitionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.pharmacy = Pharmacy.objects.create(name="Test pharmacy")
+        cls.admin = make_user("admin@example.com", Profile.Role.ADMIN)
+
+    def test_refused_transition_changes_nothing(self):
+        order = make_order(self.pharmacy, "#T-1", Order.Status.CANCELLED)
+        result = ORDER_STATES.apply(order, "deliver")
+        self.assertFalse(result.ok)
+        self.assertEqual(result.reason, "Cannot deliver: order is cancelled.")
+        order.refresh_from_db()
+        self.assertEqual((order.status, order.version, order.delivered_at), (Order.Status.CANCELLED, 0, None))
+
+    def test_stale_version_from_post_is_rejected(self):
+        order = make_order(self.pharmacy, "#T-1")
+        self.assertTrue(ORDER_STATES.apply(Order.objects.get(pk=order.pk), "pack").ok)
+        self.client.force_login(self.admin)
+        # The form was rendered at version 0, before the order was packed.
+        self.client.post(f"/dashboard/admin/orders/{order.pk}/cancel/", {"version": "0"})
+        order.refresh_from_db()
+        self.assertEqual((order.status, order.version), (Order.Status.PACKED, 1))
+        self.client.post(f"/dashboard/admin/orders/{order.pk}/cancel/", {"version": "1"})
+        order.refresh_from_db()
+        self.assertEqual((order.status, order.version), (Order.Status.CANCELLED, 2))
+
+    def test_apply_many_reports_each_requested_row(self):
+        eligible = make_order(self.pharmacy, "#T-1")
+        ineligible = make_order(self.pharmacy, "#T-2", Order.Status.DELIVERED)
+        missing = ineligible.pk + 100
+        results = ORDER_STATES.apply_many([eligible.pk, ineligible.pk, missing, eligible.pk], "pack")
+        self.assertEqual(
+            [(result.pk, result.ok) for result in results], [(eligible.pk, True), (ineligible.pk, False), (missing, False)]
+        )
+        self.assertEqual(results[1].reason, "Cannot pack: order is delivered.")
+        self.assertEqual(results[2].reason, "Order not found.")
+        self.assertEqual(
+            dict(Order.objects.filter(code__startswith="#T-").values_list("code", "status")),
+            {"#T-1": Order.Status.PACKED, "#T-2": Order.Status.DELIVERED},
+        )
+
+    def test_apply_many_does_not_claim_rows_a_concurrent_writer_moved(self):
+        first, second = (make_order(self.pharmacy, f"#T-{n}", Order.Status.OUT) for n in (1, 2))
+
+        class InterleavedStateMachine(StateMachine):
+            def _current(self, pks):
+                current = super()._current(pks)
+                # Another request delivers the first order between this read and the bulk UPDATE.
+                ORDER_STATES.apply(Order.objects.get(pk=first.pk), "deliver")
+                return current
+
+        machine = InterleavedStateMachine(
+            Order, *ORDER_STATES.transitions.values(), topic=ORDER_STATES.topic, on_applied=ORDER_STATES.on_applied
+        )
+        with self.captureOnCommitCallbacks() as callbacks:
+            results = machine.apply_many([first.pk, second.pk], "deliver")
+        self.assertEqual([(result.pk, result.ok) for result in results], [(first.pk, False), (second.pk, True)])
+        self.assertEqual(results[0].reason, "Changed by someone else meanwhile.")
+        self.assertEqual(
+            dict(Order.objects.filter(code__startswith="#T-").values_list("code", "version")), {"#T-1": 1, "#T-2": 1}
+        )
+        # One notification from each writer, and each delivery is counted once.
+        self.assertEqual(len(callbacks), 2)
+        counted = KpiRollup.objects.get(day=timezone.localdate(), metric=kpis.DELIVERIES).value
+        kpis.rebuild()
+        self.assertEqual(KpiRollup.objects.get(day=timezone.localdate(), metric=kpis.DELIVERIES).value, counted)
+
+
+class StockExpiryTests(TestCase):
+    # Days from today, straddling every bucket edge and today itself.
+    OFFSETS = (-30, -6, -5, -4, 0, 10, 11, 30, 31, 90, 91, 400)
+
+    @classmethod
+    def setUpTestData(cls):
+        today = timezone.localdate()
+        StockItem.objects.bulk_create(
+            [
+                StockItem(sku=f"EXP{index}", name=f"Expiry {offset}", expires_on=today + timedelta(days=offset))
+                for index, offset in enumerate(cls.OFFSETS)
+            ]
+        )
+
+    def _sections(self, **params):
+        _, sections = views._store_sections(RequestFactory().get("/dashboard/pharmacy-store/", params))
+        return {name: section.load() for name, section in sections.items()}
+
+    def _expiring(self, days):
+        return sorted(
+            (item.expires_on, item.pk) for item in StockItem.objects.all() if item.expires_in_days <= days
+        )
+
+    def test_bucket_counts_come_from_one_query(self):
+        _, sections = views._store_sections(RequestFactory().get("/dashboard/pharmacy-store/"))
+        with self.assertNumQueries(1):
+            options = sections["expiry_options"].load()
+        self.assertEqual(
+            [(option["value"], option["count"]) for option in options],
+            [(days, len(self._expiring(days))) for days, _ in views.EXPIRY_BUCKETS],
+        )
+
+    def test_negative_threshold_lists_stock_expired_that_long_ago(self):
+        page = self._sections(expires="-5")["stock_page"]
+        self.assertEqual(
+            [(item.expires_on, item.pk) for item in page], self._expiring(-5)[: views.STOCK_PAGE_SIZE]
+        )
+        self.assertTrue(all(item.expires_in_days <= -5 for item in page))
+        self.assertIn("Expiry -5", {item.name for item in page})
+        self.assertNotIn("Expiry -4", {item.name for item in page})
+
+    def test_unparseable_threshold_lists_everything(self):
+        for raw in ("", "soon", "9" * 400):
+            with self.subTest(expires=raw[:10]):
+                page = self._sections(expires=raw)["stock_page"]
+                everything = StockItem.objects.order_by(*views.STOCK_ORDERING).values_list("pk", flat=True)
+                self.assertEqual([item.pk for item in page], list(everything[: views.STOCK_PAGE_SIZE]))
+
+
+class KpiRollupTests(TestCase):
+    """The counters kept up by the save and transition hooks must equal a recount from ``Order``."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.pharmacies = [Pharmacy.objects.create(name=f"Test pharmacy {n}") for n in range(2)]
+        # Start from counters that agree with whatever orders the seed left behind.
+        kpis.rebuild()
+
+    def assertMatchesRebuild(self):
+        def snapshot():
+            rollups = {(day, metric): value for day, metric, value in KpiRollup.objects.values_list("day", "metric", "value")}
+            return rollups, set(KpiPharmacyDay.objects.values_list("day", "pharmacy_id"))
+
+        maintained = snapshot()
+        kpis.rebuild()
+        self.assertEqual(maintained, snapshot())
+
+    def test_create_deliver_and_cancel_match_rebuild(self):
+        first, second = self.pharmacies
+        orders = [make_order(first, "#K-1"), make_order(first, "#K-2"), make_order(second, "#K-3")]
+        self.assertMatchesRebuild()
+        for name in ("pack", "out", "deliver"):
+            self.assertTrue(ORDER_STATES.apply(Order.objects.get(pk=orders[0].pk), name).ok)
+        self.assertTrue(ORDER_STATES.apply(Order.objects.get(pk=orders[1].pk), "cancel").ok)
+        self.assertMatchesRebuild()
+        ORDER_STATES.apply_many([orders[2].pk], "pack")
+        results = ORDER_STATES.apply_many([orders[0].pk, orders[2].pk], "deliver")
+        self.assertEqual([result.ok for result in results], [False, True])
+        self.assertMatchesRebuild()
+
+    def test_order_created_delivered_is_counted_once(self):
+        Order.objects.create(
+            code="#K-1",
+            customer_name="Test customer",
+            pharmacy=self.pharmacies[0],
+            status=Order.Status.DELIVERED,
+            delivered_at=timezone.now(),
+        )
+        self.assertMatchesRebuild()
+
+
+@override_settings(ANALYTICS_SETTLE_SECONDS=60)
+class AnalyticsRefreshTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.pharmacy = Pharmacy.objects.create(name="Test pharmacy")
+
+    def setUp(self):
+        self.now = timezone.now()
+        self.hour = analytics.floor_hour(self.now) - timedelta(hours=6)
+
+    def stamp(self, instance, created_at, updated_at):
+        type(instance).objects.filter(pk=instance.pk).update(created_at=created_at, updated_at=updated_at)
+
+    def facts(self):
+        fields = analytics.FACT_FIELDS
+        return (
+            set(HourlyPharmacyFact.objects.values_list("hour", "pharmacy_id", *fields)),
+            set(DailyPharmacyFact.objects.values_list("day", "pharmacy_id", *fields)),
+        )
+
+    def test_refresh_reads_settled_changes_since_the_watermark(self):
+        # Rows left by the seed are older than the watermark, so only this test's orders are read.
+        for model in analytics.SOURCES.values():
+            model.objects.update(updated_at=self.now - timedelta(days=1))
+        before, changed, unsettled = (make_order(self.pharmacy, f"#A-{n}") for n in range(3))
+        self.stamp(before, self.hour, self.now - timedelta(hours=2))
+        self.stamp(changed, self.hour + analytics.HOUR, self.now - timedelta(minutes=30))
+        self.stamp(unsettled, self.hour + 2 * analytics.HOUR, self.now - timedelta(seconds=10))
+        for name in analytics.SOURCES:
+            RollupWatermark.objects.update_or_create(
+                name=name, defaults={"updated_at": self.now - timedelta(hours=1), "last_id": 0}
+            )
+
+        self.assertEqual(analytics.refresh(), 1)
+        hourly = HourlyPharmacyFact.objects.filter(pharmacy=self.pharmacy)
+        self.assertEqual(dict(hourly.values_list("hour", "orders")), {self.hour + analytics.HOUR: 1})
+        watermark = RollupWatermark.objects.get(name="orders")
+        self.assertEqual((watermark.updated_at, watermark.last_id), (self.now - timedelta(minutes=30), changed.pk))
+        self.assertEqual(analytics.refresh(), 0)
+
+        with override_settings(ANALYTICS_SETTLE_SECONDS=0):
+            self.assertEqual(analytics.refresh(), 1)
+        self.assertEqual(
+            dict(hourly.values_list("hour", "orders")),
+            {self.hour + analytics.HOUR: 1, self.hour + 2 * analytics.HOUR: 1},
+        )
+
+    def test_backfill_then_refresh_matches_a_full_recompute(self):
+        orders = [make_order(self.pharmacy, f"#A-{n}") for n in range(4)]
+        for n, order in enumerate(orders):
+            self.stamp(order, self.hour - timedelta(days=n, minutes=7 * n), self.now - timedelta(hours=1))
+        task = DeliveryTask.objects.create(code="#A-T", pharmacy=self.pharmacy, address="1 Test St", eta_text="10 min")
+        self.stamp(task, self.hour, self.now - timedelta(hours=1))
+        analytics.backfill()
+        backfilled = self.facts()
+
+        # Changed after the backfill moved the watermarks: a delivery, a cancellation, a finished
+        # task and a new order.
+        for name in ("pack", "deliver"):
+            self.assertTrue(ORDER_STATES.apply(Order.objects.get(pk=orders[0].pk), name).ok)
+        self.assertTrue(ORDER_STATES.apply(Order.objects.get(pk=orders[1].pk), "cancel").ok)
+        DeliveryTask.objects.filter(pk=task.pk).update(status=DeliveryTask.Status.DONE, updated_at=timezone.now())
+        make_order(self.pharmacy, "#A-4")
+        with override_settings(ANALYTICS_SETTLE_SECONDS=0):
+            self.assertGreaterEqual(analytics.refresh(), 4)
+        refreshed = self.facts()
+        self.assertNotEqual(refreshed, backfilled)
+
+        HourlyPharmacyFact.objects.all().delete()
+        DailyPharmacyFact.objects.all().delete()
+        earliest = min(model.objects.aggregate(first=Min("created_at"))["first"] for model in analytics.SOURCES.values())
+        analytics.recompute(earliest, timezone.now())
+        self.assertEqual(refreshed, self.facts())
+
+
+@override_settings(REQUEST_METRICS=STRICT_METRICS)
+class IdempotentOrderCreationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.pharmacy = Pharmacy.objects.create(name="Test pharmacy")
+        cls.customer = make_user("+998 90 123 45 67", Profile.Role.CUSTOMER)
+
+    def setUp(self):
+        self.client.force_login(self.customer)
+
+    def _create(self, key, pharmacy=None, items="Aspirin"):
+        return self.client.post(
+            "/dashboard/customer/orders/create/",
+            {"pharmacy": pharmacy or self.pharmacy.pk, "items": items},
+            headers={"Accept": "application/json", "Idempotency-Key": key},
+        )
+
+    def _orders(self):
+        return Order.objects.filter(pharmacy=self.pharmacy).count()
+
+    def test_replay_returns_the_stored_response(self):
+        first = self._create("retry-key-1")
+        second = self._create("retry-key-1")
+        self.assertEqual((first.status_code, second.status_code), (201, 200))
+        self.assertEqual(second.json(), {"order": first.json()["order"], "replayed": True})
+        self.assertEqual(self._orders(), 1)
+
+    def test_same_key_with_another_payload_conflicts(self):
+        self._create("retry-key-1")
+        response = self._create("retry-key-1", items="Ibuprofen")
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(self._orders(), 1)
+
+    def test_expired_key_runs_again(self):
+        self._create("retry-key-1")
+        IdempotencyKey.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        response = self._create("retry-key-1")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self._orders(), 2)
+        self.assertEqual(IdempotencyKey.objects.count(), 1)
+
+    def test_failed_request_stores_no_key(self):
+        response = self._create("retry-key-1", pharmacy=self.pharmacy.pk + 100)
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(IdempotencyKey.objects.exists())
+        self.assertEqual(self._create("retry-key-1").status_code, 201)
+
+
+class OrderCodeTests(TestCase):
+    def test_codes_are_unique_across_blocks_and_widths(self):
+        allocator = codes.BlockAllocator("test-codes", block_size=3)
+        values = []
+        for _ in range(10):
+            # Each draw commits, so the allocator keeps the rest of its block and crosses block boundaries.
+            with self.captureOnCommitCallbacks(execute=True):
+                values.append(allocator.next_value())
+        self.assertEqual(values, list(range(values[0], values[0] + 10)))
+        boundary = 32**codes.MIN_WIDTH
+        values += range(boundary - 500, boundary + 500)
+        issued = [codes.format_code(value) for value in values]
+        self.assertEqual(len(set(issued)), len(issued))
+        self.assertTrue(all(codes.is_valid(code) for code in issued))
+
+    def test_typos_and_transpositions_are_rejected(self):
+        prefix = codes.ORDER_PREFIX
+        for value in (0, 1, 12345, 32**6 + 7):
+            code = codes.format_code(value)
+            payload = code[len(prefix) :]
+            for position, original in enumerate(payload):
+                for typo in codes.ALPHABET:
+                    if typo != original:
+                        changed = payload[:position] + typo + payload[position + 1 :]
+                        self.assertFalse(codes.is_valid(prefix + changed), f"{code} -> {changed}")
+            body = payload[:-1]
+            for position in range(len(body) - 1):
+                if body[position] != body[position + 1]:
+                    swapped = body[:position] + body[position + 1] + body[position] + body[position + 2 :]
+                    self.assertFalse(codes.is_valid(prefix + swapped + payload[-1]), f"{code} -> {swapped}")
+
+    def test_block_abandoned_on_rollback_is_not_reissued(self):
+        allocator = codes.BlockAllocator("test-rollback", block_size=5)
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            first = allocator.next_value()
+            raise RuntimeError
+        # The rollback gave the whole block back to the sequence, and another worker claims it.
+        self.assertEqual(codes.reserve_block("test-rollback", 5), range(first, first + 5))
+        self.assertEqual(allocator.next_value(), first + 5)
+
+
+@override_settings(REQUEST_METRICS=STRICT_METRICS)
+class FragmentInvalidationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = make_user("fragments@example.com", Profile.Role.CUSTOMER)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.customer)
+
+    def _connectors(self):
+        response = self.client.get("/dashboard/customer/")
+        self.assertEqual(response.status_code, 200)
+        # Only the cached "customer-payments" section; the card form lists providers uncached.
+        page = response.content.decode()
+        start = page.index("<h3>Payment connectors</h3>")
+        return page[start : page.index("</table>", start)]
+
+    def test_write_rerenders_the_cached_section(self):
+        self.assertNotIn("Fresh provider", self._connectors())
+        # bulk_create skips the signals, so the cached section is served as it was.
+        PaymentProvider.objects.bulk_create([PaymentProvider(name="Fresh provider")])
+        self.assertNotIn("Fresh provider", self._connectors())
+        PaymentProvider.objects.create(name="Fresher provider")
+        connectors = self._connectors()
+        self.assertIn("Fresh provider", connectors)
+        self.assertIn("Fresher provider", connectors)
+
+    def test_generations_outlive_the_per_process_cache(self):
+        before = get_generations(["core.PaymentProvider"])
+        # Another worker's memory holds none of this one's entries; the counters must not live there.
+        cache.clear()
+        self.assertEqual(get_generations(["core.PaymentProvider"]), before)
+
+    def test_process_local_generations_are_reported(self):
+        self.assertEqual(check_fragment_generations(None), [])
+        with override_settings(FRAGMENT_GENERATION_CACHE="default"):
+            self.assertEqual([warning.id for warning in check_fragment_generations(None)], ["core.W001"])
+
+
+@override_settings(REQUEST_METRICS=STRICT_METRICS)
+class PagerLinkTests(TestCase):
+    """Pager links are cached with their fragment, so they must not carry one viewer's query string."""
+
+    @classmethod
+    def setUpTestData(cls):
+        provider = PaymentProvider.objects.create(name="Test provider")
+        PaymentCard.objects.bulk_create(
+            PaymentCard(owner_name="Test owner", provider=provider, last4=f"{n:04}")
+            for n in range(views.DASHBOARD_PAGE_SIZE + 1)
+        )
+        cls.customers = [make_user(f"pager-{n}@example.com", Profile.Role.CUSTOMER) for n in range(2)]
+
+    def setUp(self):
+        cache.clear()
+
+    def _card_links(self, user, query=""):
+        self.client.force_login(user)
+        response = self.client.get(f"/dashboard/customer/{query}")
+        self.assertEqual(response.status_code, 200)
+        return re.findall(r'href="([^"]*\bcards=[^"]*)"', response.content.decode())
+
+    def test_second_customer_does_not_get_the_first_ones_query_string(self):
+        first = self._card_links(self.customers[0], "?lat=41.3312&lng=69.2845&inbox=stale&tasks=x")
+        second = self._card_links(self.customers[1])
+        self.assertEqual(len(first), 1)
+        self.assertEqual(second, first)
+        self.assertRegex(first[0], r"^/dashboard/customer/\?cards=[^&]+#payments$")
+
+    def test_links_keep_only_the_cursor_and_listed_parameters(self):
+        request = RequestFactory().get("/dashboard/pharmacy-store/", {"expires": "30", "lat": "41.3", "after": "x"})
+        page = page_from_request(request, PaymentCard.objects.all(), NEWEST_FIRST, per_page=5, keep=("expires",))
+        self.assertRegex(page.next_url, r"^/dashboard/pharmacy-store/\?expires=30&after=[^&]+$")
+        self.assertIsNone(page.first_url)
+
+
+@override_settings(INBOX_FANOUT_IN_PROCESS=False)
+class InboxTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [make_user(f"distributor-{number}@example.com", Profile.Role.DISTRIBUTOR) for number in range(5)]
+        cls.recipients = Profile.objects.filter(role=Profile.Role.DISTRIBUTOR).count()
+
+    def _notify(self, message):
+        notification = Notification.objects.create(audience=Profile.Role.DISTRIBUTOR, message=message)
+        with self.captureOnCommitCallbacks(execute=True):
+            delivered = inbox.fan_out(notification, batch_size=2)
+        return notification, delivered
+
+    def _unread(self, user):
+        return inbox.inbox_state(user).unread_count
+
+    def test_fan_out_runs_in_batches_and_resumes(self):
+        notification, delivered = self._notify("Route changed")
+        self.assertEqual(delivered, self.recipients)
+        notification.refresh_from_db()
+        self.assertIsNotNone(notification.fanned_out_at)
+        self.assertEqual(notification.fanout_cursor, self.users[-1].pk)
+        # Resuming a finished fan-out delivers nothing twice.
+        self.assertEqual(inbox.fan_out(notification, batch_size=2), 0)
+        self.assertEqual(InboxItem.objects.filter(notification=notification).count(), self.recipients)
+        self.assertEqual([self._unread(user) for user in self.users], [1] * 5)
+
+    def test_interrupted_fan_out_continues_after_its_cursor(self):
+        notification = Notification.objects.create(audience=Profile.Role.DISTRIBUTOR, message="Route changed")
+        Notification.objects.filter(pk=notification.pk).update(fanout_cursor=self.users[2].pk)
+        notification.refresh_from_db()
+        inbox.fan_out(notification, batch_size=2)
+        self.assertEqual(
+            set(InboxItem.objects.filter(notification=notification).values_list("user_id", flat=True)),
+            {user.pk for user in self.users[3:]},
+        )
+
+    def test_read_cursor_and_unread_counter(self):
+        reader, other = self.users[:2]
+        self._notify("First")
+        self._notify("Second")
+        self.assertEqual(self._unread(reader), 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            inbox.mark_read(reader)
+        self.assertEqual(self._unread(reader), 0)
+        self.assertEqual(self._unread(other), 2)
+        notification, _ = self._notify("Third")
+        self.assertEqual(self._unread(reader), 1)
+        state = InboxState.objects.get(user=reader)
+        unread = [state.is_unread(item) for item in InboxItem.objects.filter(user=reader).order_by("created_at", "id")]
+        self.assertEqual(unread, [False, False, True])
+        self.assertGreater(notification.created_at, state.read_through)
+
+    def test_marking_read_only_invalidates_the_reader(self):
+        reader, other = self.users[:2]
+        labels = [inbox.generation(reader.pk), inbox.generation(other.pk)]
+        before = get_generations(labels)
+        with self.captureOnCommitCallbacks(execute=True):
+            inbox.mark_read(reader)
+        after = get_generations(labels)
+        self.assertNotEqual(after[0], before[0])
+        self.assertEqual(after[1], before[1])
+
+
+@override_settings(REQUEST_METRICS=STRICT_METRICS)
+class ChatCursorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = make_user("+998 90 123 45 67", Profile.Role.CUSTOMER)
+        cls.thread = chat.start_thread(cls.customer, "Dosage question")
+        for number in range(8):
+            chat.post_message(cls.thread, cls.customer, ChatMessage.Sender.CUSTOMER, f"Message {number}")
+        # Messages sent within the same instant are ordered by id.
+        tied = list(cls.thread.messages.order_by("id").values_list("id", flat=True)[2:6])
+        ChatMessage.objects.filter(pk__in=tied).update(created_at=timezone.now())
+        cls.ordered = list(cls.thread.messages.order_by("created_at", "id").values_list("id", flat=True))
+
+    def test_paging_forward_visits_every_message_once(self):
+        seen, cursor = [], ""
+        while True:
+            payload = chat.messages_since(self.thread, cursor, limit=3)
+            seen += [message["id"] for message in payload["messages"]]
+            cursor = payload["cursor"]
+            if not payload["has_more"]:
+                break
+        self.assertEqual(seen, self.ordered)
+        self.assertEqual(chat.messages_since(self.thread, cursor, limit=3)["messages"], [])
+
+    def test_paging_backward_visits_every_message_once(self):
+        pages, before = [], None
+        while True:
+            payload = chat.history(self.thread, before, limit=3)
+            pages.insert(0, [message["id"] for message in payload["messages"]])
+            before = payload["before"]
+            if not before:
+                break
+        self.assertEqual([pk for page in pages for pk in page], self.ordered)
+
+    def test_thread_view_resumes_after_the_newest_message(self):
+        self.client.force_login(self.customer)
+        url = f"/dashboard/customer/chats/{self.thread.pk}/messages/"
+        history = self.client.get(url).json()
+        self.assertEqual([message["id"] for message in history["messages"]], self.ordered)
+        response = self.client.post(url, {"body": "Thanks"}, headers={"Accept": "application/json"})
+        self.assertEqual(response.status_code, 201)
+        newer = self.client.get(url, {"after": history["cursor"]}).json()
+        self.assertEqual([message["body"] for message in newer["messages"]], ["Thanks"])
+        self.assertEqual(self.client.get(url, {"after": newer["cursor"]}).json()["messages"], [])
+        self.assertEqual(self.client.get(url, {"after": "garbage"}).status_code, 400)
+
+
+class RequestBudgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = make_user("+998 90 123 45 67", Profile.Role.CUSTOMER)
+        cls.pharmacy = Pharmacy.objects.create(name="Test pharmacy")
+        cls.thread = chat.start_thread(cls.customer, "Dosage question")
+
+    def _budget(self, url_name, queries):
+        return override_settings(REQUEST_METRICS={**STRICT_METRICS, "BUDGETS": {url_name: {"queries": queries}}})
+
+    def test_view_over_its_query_budget_raises(self):
+        self.client.force_login(self.customer)
+        url = f"/dashboard/customer/pharmacies/{self.pharmacy.pk}/"
+        with self._budget("pharmacy_detail", 1), self.assertRaisesMessage(QueryBudgetExceeded, "pharmacy_detail"):
+            self.client.get(url)
+        with self._budget("pharmacy_detail", 100):
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+    async def test_async_view_is_measured_without_a_sync_adapter(self):
+        await self.async_client.aforce_login(self.customer)
+        url = f"/dashboard/customer/chats/{self.thread.pk}/messages/"
+        with self._budget("chat_messages", 1), self.assertRaisesMessage(QueryBudgetExceeded, "chat_messages"):
+            await self.async_client.get(url)
+        with self._budget("chat_messages", 100):
+            response = await self.async_client.get(url)
+        self.assertIn("queries", response["Server-Timing"])
+        self.assertTrue(iscoroutinefunction(RequestMetricsMiddleware(views.chat_messages)))
+
+
+@override_settings(REQUEST_METRICS=STRICT_METRICS)
+class AsyncDashboardTests(TransactionTestCase):
+    """Sections load on worker threads with their own connections, so the data must be committed."""
+
+    DASHBOARDS = {
+        Profile.Role.ADMIN: ("/dashboard/admin/", "admin_dashboard", views._admin_sections),
+        Profile.Role.CUSTOMER: ("/dashboard/customer/", "customer_dashboard", views._customer_sections),
+        Profile.Role.PHARMACY: ("/dashboard/pharmacy-store/", "pharmacy_store_dashboard", views._store_sections),
+        Profile.Role.DISTRIBUTOR: ("/dashboard/distributor/", "distributor_dashboard", views._distributor_sections),
+    }
+
+    def setUp(self):
+        bootstrap.ensure_seeded()
+        self.users = {role: make_user(f"async-{role}@example.com", role) for role in self.DASHBOARDS}
+
+    def _sync_get(self, user, url):
+        cache.clear()
+        self.client.force_login(user)
+        return self.client.get(url)
+
+    async def _async_get(self, user, url):
+        await sync_to_async(cache.clear)()
+        await self.async_client.aforce_login(user)
+        with override_settings(ROOT_URLCONF=__name__):
+            response = await self.async_client.get(url)
+            # resolver_match is lazy; resolve it while the async URLconf is active.
+            self.assertTrue(iscoroutinefunction(response.resolver_match.func))
+        return response
+
+    def test_async_dashboards_match_the_sync_ones_within_budget(self):
+        for role, (url, url_name, build) in self.DASHBOARDS.items():
+            with self.subTest(dashboard=url_name):
+                user = self.users[role]
+                request = RequestFactory().get(url)
+                request.user, request.session = user, {}
+                names = set(build(request)[1])
+                expected = self._sync_get(user, url)
+                response = async_to_sync(self._async_get)(user, url)
+                self.assertEqual(response.status_code, 200)
+                for name in names:
+                    self.assertEqual(response.context[name], expected.context[name], name)
+                queries = int(re.search(r'desc="(\d+) queries"', response["Server-Timing"]).group(1))
+                self.assertLessEqual(queries, settings.REQUEST_METRICS["BUDGETS"][url_name]["queries"])
+                self.assertGreater(queries, 0)
+
+
+@override_settings(DATABASE_REPLICAS=[LAGGING_REPLICA], REPLICA_STICKY_SECONDS=5, REQUEST_METRICS=STRICT_METRICS)
+class ReplicaReadTests(TransactionTestCase):
+    """
+    The replica never receives the primary's writes, like one that has fallen behind, so each
+    response shows which database it was read from.
+    """
+
+    databases = {DEFAULT_DB_ALIAS, LAGGING_REPLICA}
+
+    def setUp(self):
+        self.customer = make_user("+998 90 123 45 67", Profile.Role.CUSTOMER)
+        self.thread = chat.start_thread(self.customer, "Dosage question")
+        chat.post_message(self.thread, self.customer, ChatMessage.Sender.CUSTOMER, "Replicated")
+        # Copy what the primary has so far; later writes stay on the primary only.
+        for model in (get_user_model(), Profile, ChatThread, ChatMessage):
+            model.objects.using(LAGGING_REPLICA).bulk_create(model.objects.all())
+        self.url = f"/dashboard/customer/chats/{self.thread.pk}/messages/"
+
+    def _bodies(self, response):
+        self.assertEqual(response.status_code, 200)
+        return [message["body"] for message in response.json()["messages"]]
+
+    def test_get_reads_from_the_replica(self):
+        ChatMessage.objects.create(
+            thread=self.thread, user=self.customer, sender=ChatMessage.Sender.CUSTOMER, author="x", body="Not yet"
+        )
+        self.client.force_login(self.customer)
+        self.assertEqual(self._bodies(self.client.get(self.url)), ["Replicated"])
+
+    async def test_async_get_reads_from_the_replica(self):
+        await ChatMessage.objects.acreate(
+            thread=self.thread, user=self.customer, sender=ChatMessage.Sender.CUSTOMER, author="x", body="Not yet"
+        )
+        await self.async_client.aforce_login(self.customer)
+        self.assertEqual(self._bodies(await self.async_client.get(self.url)), ["Replicated"])
+
+    def test_sticky_cookie_reads_own_write_from_the_primary(self):
+        self.client.force_login(self.customer)
+        response = self.client.post(self.url, {"body": "Mine"}, headers={"Accept": "application/json"})
+        self.assertEqual(response.status_code, 201)
+        self.assertIn(STICKY_COOKIE, response.cookies)
+        self.assertEqual(self._bodies(self.client.get(self.url)), ["Replicated", "Mine"])
+        # Once the pin expires, reads go back to the (lagging) replica.
+        del self.client.cookies[STICKY_COOKIE]
+        self.assertEqual(self._bodies(self.client.get(self.url)), ["Replicated"])
+
+
+class SeedAfterMigrateTests(TransactionTestCase):
+    """The seed is written through the current models, so only a migrate that reaches them seeds."""
+
+    def tearDown(self):
+        call_command("migrate", verbosity=0)
+
+    def test_partial_migrate_leaves_seeding_to_the_full_one(self):
+        call_command("migrate", "core", "0004", verbosity=0)
+        # 0005 adds the seed marker, but pharmacies have no location columns until 0006.
+        call_command("migrate", "core", "0005", verbosity=0)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) FROM core_seedstate")
+            self.assertEqual(cursor.fetchone(), (0,))
+        call_command("migrate", verbosity=0)
+        self.assertEqual(SeedState.objects.get(key=bootstrap.SEED_KEY).version, data.SEED_VERSION)
+
+
+class KpiRollupMigrationTests(TransactionTestCase):
+    def tearDown(self):
+        call_command("migrate", verbosity=0)
+
+    def _rollups(self):
+        return set(KpiRollup.objects.values_list("day", "metric", "value"))
+
+    def test_upgrade_counts_the_orders_placed_before_it(self):
+        call_command("migrate", "core", "0015", verbosity=0)
+        self.assertTrue(Order.objects.filter(status=Order.Status.DELIVERED).exists())
+        call_command("migrate", "core", "0016", verbosity=0)
+        migrated = self._rollups()
+        self.assertIn(kpis.DELIVERIES, {metric for _, metric, _ in migrated})
+        kpis.rebuild()
+        self.assertEqual(migrated, self._rollups())
+
+
+class InboxMigrationTests(TransactionTestCase):
+    def tearDown(self):
+        call_command("migrate", verbosity=0)
+
+    def test_upgrade_delivers_the_notifications_sent_before_it(self):
+        call_command("migrate", "core", "0013", verbosity=0)
+        self.assertTrue(Notification.objects.exists())
+        call_command("migrate", "core", "0014", verbosity=0)
+        self.assertFalse(Notification.objects.filter(fanned_out_at__isnull=True).exists())
+        # Only the columns that exist at 0014; later migrations add fields to Profile.
+        profiles = list(Profile.objects.values_list("user_id", "role"))
+        for notification in Notification.objects.all():
+            audience = {user_id for user_id, role in profiles if role == notification.audience}
+            self.assertEqual(set(notification.inbox_items.values_list("user_id", flat=True)), audience)
+        unread = dict(InboxState.objects.values_list("user_id", "unread_count"))
+        for user_id, role in profiles:
+            self.assertEqual(unread.get(user_id, 0), Notification.objects.filter(audience=role).count())
+
+
+class StatusOptionMigrationTests(TransactionTestCase):
+    def tearDown(self):
+        call_command("migrate", verbosity=0)
+
+    def test_upgrade_collects_the_labels_already_on_the_board(self):
+        call_command("migrate", "core", "0009", verbosity=0)
+        # bulk_create: the post_save hook would write to the table this migration creates.
+        DistributorStatus.objects.bulk_create(
+            [
+                DistributorStatus(order_code="PG-1", pharmacy="UzMed", status="Returned"),
+                DistributorStatus(order_code="PG-2", pharmacy="UzMed", status=" Returned "),
+                DistributorStatus(order_code="PG-3", pharmacy="UzMed", status="Delivered"),
+                DistributorStatus(order_code="PG-4", pharmacy="UzMed", status="   "),
+                DistributorStatus(order_code="PG-5", pharmacy="UzMed", status="At depot"),
+            ]
+        )
+        call_command("migrate", "core", "0010", verbosity=0)
+        options = list(StatusOption.objects.values_list("label", "position"))
+        presets = data.DISTRIBUTOR_STATUS_PRESETS
+        self.assertEqual(options[: len(presets)], [(label, position) for position, label in enumerate(presets)])
+        discovered = [label for label, _ in options[len(presets):]]
+        self.assertTrue({"Returned", "At depot"} <= set(discovered))
+        self.assertEqual(len(set(discovered)), len(discovered))
+        self.assertFalse(set(discovered) & {"", "Delivered"})
@@ -0,0 +1,223 @@
+from collections import defaultdict
+from dataclasses import dataclass, field
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from . import kpis, streams
+from .fragments import bump_generation
+from .models import DeliveryTask, Order
+
+# Most orders one bulk action may move; the admin applies larger selections in chunks of this size.
+BULK_ORDER_LIMIT = 500
+
+
+@dataclass(frozen=True)
+class Transition:
+    name: str
+    sources: tuple
+    target: str
+    changes: dict = field(default_factory=dict)
+    verb: str = ""
+    # Datetime field set to the transition time, e.g. ``delivered_at``.
+    stamp: str = ""
+
+
+@dataclass
+class TransitionResult:
+    pk: int
+    code: str | None
+    ok: bool
+    status: str | None = None
+    reason: str = ""
+
+    def as_dict(self):
+        return {"id": self.pk, "code": self.code, "ok": self.ok, "status": self.status, "reason": self.reason}
+
+
+class StateMachine:
+    """
+    Declarative ``status`` transitions for a model with an integer ``version`` column.
+
+    Every transition is a conditional ``UPDATE ... WHERE status=<expected> AND version=<n>``, so
+    concurrent writers never overwrite each other and no row locks are taken.
+    """
+
+    def __init__(self, model, *transitions, topic=None, on_applied=None):
+        self.model = model
+        self.topic = topic
+        # Called as ``on_applied(transition, pks)`` inside the transaction that moved the rows.
+        self.on_applied = on_applied
+        self.transitions = {transition.name: transition for transition in transitions}
+
+    def __contains__(self, name):
+        return name in self.transitions
+
+    def available(self, status):
+        return [name for name, transition in self.transitions.items() if status in transition.sources]
+
+    def _refusal(self, transition, status):
+        verb = transition.verb or transition.name
+        return f"Cannot {verb}: {self.model._meta.verbose_name} is {self.model.Status(status).label.lower()}."
+
+    def _changes(self, transition):
+        # .update() skips auto_now and the save signals, so both are handled here.
+        now = timezone.now()
+        changes = {
+            **transition.changes,
+            "status": transition.target,
+            "version": F("version") + 1,
+            "updated_at": now,
+        }
+        if transition.stamp:
+            changes[transition.stamp] = now
+        return changes
+
+    def _event(self, pk, code, transition, version):
+        return {
+            "id": pk,
+            "code": code,
+            "status": transition.target,
+            "status_label": self.model.Status(transition.target).label,
+            "version": version,
+            **transition.changes,
+        }
+
+    def _after_commit(self, events):
+        def notify():
+            bump_generation(self.model)
+            if self.topic:
+                for event in events:
+                    streams.publish(self.topic, event)
+
+        transaction.on_commit(notify)
+
+    def apply(self, instance, name, expected_version=None):
+        """Move ``instance`` through ``name``; costs one UPDATE, or nothing when the move is not allowed."""
+        transition = self.transitions[name]
+        if instance.status not in transition.sources:
+            reason = self._refusal(transition, instance.status)
+            return TransitionResult(instance.pk, instance.code, False, instance.status, reason)
+        version = instance.version if expected_version is None else expected_version
+        changes = self._changes(transition)
+        with transaction.atomic():
+            updated = self.model.objects.filter(pk=instance.pk, status=instance.status, version=version).update(
+                **changes
+            )
+            if not updated:
+                reason = "Changed by someone else meanwhile; reload and try again."
+                return TransitionResult(instance.pk, instance.code, False, instance.status, reason)
+            if self.on_applied:
+                self.on_applied(transition, [instance.pk])
+            self._after_commit([self._event(instance.pk, instance.code, transition, version + 1)])
+        for attr, value in transition.changes.items():
+            setattr(instance, attr, value)
+        if transition.stamp:
+            setattr(instance, transition.stamp, changes[transition.stamp])
+        instance.status = transition.target
+        instance.version = version + 1
+        return TransitionResult(instance.pk, instance.code, True, transition.target)
+
+    def _current(self, pks):
+        rows = self.model.objects.filter(pk__in=pks).values_list("pk", "code", "status", "version")
+        return {pk: (code, status, version) for pk, code, status, version in rows}
+
+    def apply_many(self, pks, name):
+        """
+        Apply ``name`` to every row in ``pks`` with one guarded UPDATE; returns a result per requested id.
+        If a concurrent writer got to some of the rows first, falls back to one guarded UPDATE per row.
+        """
+        transition = self.transitions[name]
+        pks = list(dict.fromkeys(int(pk) for pk in pks))
+        with transaction.atomic():
+            current = self._current(pks)
+            by_version = defaultdict(list)
+            for pk, (_, status, version) in current.items():
+                if status in transition.sources:
+                    by_version[version].append(pk)
+            eligible = [pk for pks_at_version in by_version.values() for pk in pks_at_version]
+            moved = set()
+            if eligible:
+                changes = self._changes(transition)
+                # Each row is guarded by the version it was read at, so a concurrent writer makes it drop out.
+                guard = reduce(or_, (Q(pk__in=ids, version=version) for version, ids in by_version.items()))
+                savepoint = transaction.savepoint()
+                updated = self.model.objects.filter(guard, status__in=transition.sources).update(**changes)
+                if updated == len(eligible):
+                    transaction.savepoint_commit(savepoint)
+                    moved = set(eligible)
+                else:
+                    # A row the other writer moved through the same transition looks exactly like one moved
+                    # here, so redo the move row by row and trust each row count instead.
+                    transaction.savepoint_rollback(savepoint)
+                    moved = {
+                        pk
+                        for pk in eligible
+                        if self.model.objects.filter(pk=pk, status=current[pk][1], version=current[pk][2]).update(
+                            **changes
+                        )
+                    }
+                if moved and self.on_applied:
+                    self.on_applied(transition, sorted(moved))
+                if moved:
+                    self._after_commit(
+                        [self._event(pk, current[pk][0], transition, current[pk][2] + 1) for pk in moved]
+                    )
+        missing = f"{self.model._meta.verbose_name.capitalize()} not found."
+        results = []
+        for pk in pks:
+            if pk not in current:
+                results.append(TransitionResult(pk, None, False, reason=missing))
+                continue
+            code, status, _ = current[pk]
+            if pk in moved:
+                results.append(TransitionResult(pk, code, True, transition.target))
+            elif status not in transition.sources:
+                results.append(TransitionResult(pk, code, False, status, self._refusal(transition, status)))
+            else:
+                results.append(TransitionResult(pk, code, False, status, "Changed by someone else meanwhile."))
+        return results
+
+
+ORDER_STATES = StateMachine(
+    Order,
+    Transition("pack", (Order.Status.PENDING,), Order.Status.PACKED, {"progress": "Packed", "eta_text": "30 min"}),
+    Transition(
+        "out",
+        (Order.Status.PENDING, Order.Status.PACKED),
+        Order.Status.OUT,
+        {"progress": "Out for delivery", "eta_text": "15 min"},
+        verb="send out",
+    ),
+    Transition(
+        "deliver",
+        (Order.Status.PACKED, Order.Status.OUT),
+        Order.Status.DELIVERED,
+        {"progress": "Delivered", "eta_text": "Completed"},
+        stamp="delivered_at",
+    ),
+    Transition(
+        "cancel",
+        (Order.Status.PENDING, Order.Status.PACKED, Order.Status.OUT),
+        Order.Status.CANCELLED,
+        {"progress": "Cancelled", "eta_text": "—"},
+    ),
+    topic=streams.ORDER_TOPIC,
+    on_applied=kpis.record_transition,
+)
+
+DELIVERY_STATES = StateMachine(
+    DeliveryTask,
+    Transition("accept", (DeliveryTask.Status.AWAITING,), DeliveryTask.Status.IN_PROGRESS),
+    Transition("complete", (DeliveryTask.Status.IN_PROGRESS,), DeliveryTask.Status.DONE),
+    # Rejecting hands the task back to the pool; it is allowed before or after accepting.
+    Transition(
+        "reject",
+        (DeliveryTask.Status.AWAITING, DeliveryTask.Status.IN_PROGRESS),
+        DeliveryTask.Status.AWAITING,
+    ),
+    topic=streams.DELIVERY_TOPIC,
+)
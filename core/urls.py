@@ -1,20 +1,35 @@
+from django.conf import settings
 from django.urls import path
 
 from . import views
 
+
+def dashboard(name):
+    # Async dashboards load their sections concurrently; worthwhile when served through ASGI.
+    return getattr(views, f'{name}_async' if settings.ASYNC_DASHBOARDS else name)
+
+
 urlpatterns = [
     path('', views.login_view, name='login'),
     path('signup/', views.signup_view, name='signup'),
     path('forgot-password/', views.forgot_password_view, name='forgot_password'),
     path('logout/', views.logout_view, name='logout'),
-    path('dashboard/admin/', views.admin_dashboard, name='admin_dashboard'),
+    path('dashboard/admin/', dashboard('admin_dashboard'), name='admin_dashboard'),
+    path('dashboard/admin/users/<slug:segment>/', views.admin_user_segment, name='admin_user_segment'),
+    path('dashboard/admin/analytics/', views.admin_analytics, name='admin_analytics'),
+    path('dashboard/admin/orders/bulk/', views.bulk_order_action, name='bulk_order_action'),
     path('dashboard/admin/orders/<int:pk>/<str:action>/', views.order_action, name='order_action'),
     path('dashboard/admin/applications/<int:pk>/<str:action>/', views.application_action, name='application_action'),
-    path('dashboard/customer/', views.customer_dashboard, name='customer_dashboard'),
+    path('dashboard/customer/', dashboard('customer_dashboard'), name='customer_dashboard'),
     path('dashboard/customer/orders/create/', views.create_customer_order, name='create_customer_order'),
+    path('dashboard/customer/orders/stream/', views.order_stream, name='order_stream'),
+    path('dashboard/customer/chats/', views.start_chat, name='start_chat'),
+    path('dashboard/customer/chats/<int:pk>/messages/', views.chat_messages, name='chat_messages'),
+    path('dashboard/customer/pharmacies/nearby/', views.nearby_pharmacies, name='nearby_pharmacies'),
+    path('dashboard/customer/pharmacies/search/', views.search_pharmacies, name='search_pharmacies'),
     path('dashboard/customer/pharmacies/<int:pk>/', views.pharmacy_detail, name='pharmacy_detail'),
-    path('dashboard/pharmacy-store/', views.pharmacy_store_dashboard, name='pharmacy_store_dashboard'),
-    path('dashboard/distributor/', views.distributor_dashboard, name='distributor_dashboard'),
+    path('dashboard/pharmacy-store/', dashboard('pharmacy_store_dashboard'), name='pharmacy_store_dashboard'),
+    path('dashboard/distributor/', dashboard('distributor_dashboard'), name='distributor_dashboard'),
     path('dashboard/distributor/tasks/<int:pk>/<str:action>/', views.delivery_task_action, name='delivery_task_action'),
     path('dashboard/distributor/status/<int:pk>/complete/', views.distributor_status_action, name='distributor_status_action'),
     path('dashboard/distributor/status/<int:pk>/update/', views.distributor_status_update, name='distributor_status_update'),
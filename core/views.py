@@ -1,25 +1,40 @@
-from functools import wraps
+import asyncio
+import uuid
+from datetime import timedelta
+from functools import lru_cache, wraps
 
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import login, logout
 from django.contrib.auth.decorators import login_required
-from django.shortcuts import get_object_or_404, redirect, render
-from django.urls import reverse
-from django.utils.crypto import get_random_string
-
-from . import data
-from .bootstrap import ensure_seed_records
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.db.models import Count, Q
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, redirect
+from django.urls import get_script_prefix, reverse
+from django.utils import timezone
+
+from . import analytics, chat, codes, data, geo, idempotency, inbox, kpis, search, streams, transitions
+from .bootstrap import ensure_seeded
 from .forms import IdentifierAuthenticationForm, PaymentCardForm, SignUpForm, StockItemForm
+from .metrics import render
+from .pagination import NEWEST_FIRST, OLDEST_FIRST, RECENTLY_UPDATED, page_from_request
+from .sections import Section, gather_sections, lazy_sections
 from .models import (
+    ChatMessage,
+    ChatThread,
     DeliveryTask,
     DistributorStatus,
-    Notification,
+    InboxItem,
     Order,
     PaymentCard,
     PaymentProvider,
     Pharmacy,
     PharmacyApplication,
     Profile,
+    StatusOption,
     StockItem,
     TimelineEvent,
 )
@@ -32,6 +47,29 @@ ROLE_TO_URL = {
     Profile.Role.PHARMACY: "pharmacy_store_dashboard",
 }
 
+USER_SEGMENTS = {
+    "customers": (Profile.Role.CUSTOMER, "Customers"),
+    "stores": (Profile.Role.PHARMACY, "Pharmacy stores"),
+    "distributors": (Profile.Role.DISTRIBUTOR, "Distributors"),
+}
+SEGMENT_PREVIEW_SIZE = 5
+SEGMENT_PAGE_SIZE = 50
+SEGMENT_ORDERING = NEWEST_FIRST
+NEARBY_PHARMACY_LIMIT = 12
+NEARBY_PHARMACY_MAX_LIMIT = 50
+SEARCH_RESULT_LIMIT = 8
+SEARCH_RESULT_MAX_LIMIT = 20
+EXPIRY_BUCKETS = ((10, "10 days"), (30, "30 days"), (90, "3 months"))
+STOCK_PAGE_SIZE = 50
+STOCK_ORDERING = ("expires_on", "id")
+DASHBOARD_PAGE_SIZE = 20
+STREAM_ORDER_LIMIT = 50
+STREAM_KEEPALIVE_SECONDS = 15
+STREAM_MAX_SECONDS = 300
+STREAM_RETRY_MS = 3000
+CHAT_POLL_MAX_SECONDS = 25
+CHAT_DEFAULT_SUBJECT = "Question for a doctor"
+
 
 def _context(request=None, **extra):
     if request and request.user.is_authenticated:
@@ -65,6 +103,22 @@ def _redirect_for_role(user):
 
 def role_required(role):
     def decorator(view_func):
+        if iscoroutinefunction(view_func):
+
+            @wraps(view_func)
+            async def _async_wrapped(request, *args, **kwargs):
+                user = await request.auser()
+                # Share the loaded user (and its cached profile) with sync code such as rendering.
+                request.user = user
+                if not user.is_authenticated:
+                    return redirect("login")
+                profile = await sync_to_async(_get_profile)(user)
+                if profile.role != role:
+                    return redirect(await sync_to_async(_redirect_for_role)(user))
+                return await view_func(request, *args, **kwargs)
+
+            return _async_wrapped
+
         @wraps(view_func)
         def _wrapped(request, *args, **kwargs):
             if not request.user.is_authenticated:
@@ -83,7 +137,7 @@ def login_view(request):
     if request.user.is_authenticated:
         return redirect(_redirect_for_role(request.user))
 
-    ensure_seed_records()
+    ensure_seeded()
     form = IdentifierAuthenticationForm(request, data=request.POST or None)
     if request.method == "POST" and form.is_valid():
         login(request, form.get_user())
@@ -93,7 +147,6 @@ def login_view(request):
         request,
         page_title="Access",
         roles=data.AUTH_ROLES,
-        pharmacies=Pharmacy.objects.all(),
         form=form,
     )
     return render(request, "core/login.html", context)
@@ -134,31 +187,134 @@ def logout_view(request):
     return redirect("login")
 
 
+def _render_dashboard(request, template_name, extra, sections):
+    return render(request, template_name, _context(request, **extra, **sections))
+
+
+async def _render_dashboard_async(request, role, template_name, build, *args):
+    """Shared async path: prepare in one sync hop, fan the sections out concurrently, render."""
+
+    def prepare():
+        ensure_seeded()
+        return build(request, *args)
+
+    extra, sections = await sync_to_async(prepare)()
+    loaded = await gather_sections(role, sections, getattr(request, "metrics", None))
+    return await sync_to_async(_render_dashboard)(request, template_name, extra, loaded)
+
+
+def _admin_sections(request):
+    extra = {"page_title": "Admin control", "admin_change_url": _admin_change_url}
+    sections = {
+        "admin_kpis": Section(kpis.admin_kpis),
+        "orders": Section(
+            lambda: Order.objects.select_related("pharmacy").order_by("-created_at")[:5],
+            (("admin-orders", ("core.Order", "core.Pharmacy"), ()),),
+        ),
+        "user_segments": Section(
+            lambda: {
+                slug: _segment_rows(_segment_queryset(role)[:SEGMENT_PREVIEW_SIZE])
+                for slug, (role, _) in USER_SEGMENTS.items()
+            },
+            (("admin-users", ("core.Profile",), ()),),
+        ),
+        "approvals": Section(
+            lambda: PharmacyApplication.objects.order_by("-created_at")[:5],
+            (("admin-approvals", ("core.PharmacyApplication",), ()),),
+        ),
+    }
+    return extra, sections
+
+
 @role_required(Profile.Role.ADMIN)
 def admin_dashboard(request):
-    ensure_seed_records()
-    orders = Order.objects.select_related("pharmacy").order_by("-created_at")[:5]
-    applications = PharmacyApplication.objects.order_by("-created_at")[:5]
-    user_segments = {
-        "customers": _segment_profiles(Profile.Role.CUSTOMER)[:5],
-        "stores": _segment_profiles(Profile.Role.PHARMACY)[:5],
-        "distributors": _segment_profiles(Profile.Role.DISTRIBUTOR)[:5],
+    ensure_seeded()
+    extra, sections = _admin_sections(request)
+    return _render_dashboard(request, "core/admin_dashboard.html", extra, lazy_sections(sections))
+
+
+@role_required(Profile.Role.ADMIN)
+async def admin_dashboard_async(request):
+    return await _render_dashboard_async(request, Profile.Role.ADMIN, "core/admin_dashboard.html", _admin_sections)
+
+
+def _customer_sections(request, card_form=None):
+    latitude, longitude = _viewer_location(request)
+    viewer_location = f"{latitude:.3f},{longitude:.3f}"
+    cards_cursor = request.GET.get("cards", "")
+    inbox_cursor = request.GET.get("inbox", "")
+    extra = {
+        "page_title": "Customer journey",
+        "viewer_location": viewer_location,
+        "order_idempotency_key": uuid.uuid4().hex,
+        "cards_cursor": cards_cursor,
+        "inbox_cursor": inbox_cursor,
+        "inbox_generation": inbox.generation(request.user.pk),
+        "card_form": card_form or PaymentCardForm(),
     }
-    context = _context(
+    sections = {
+        "pharmacies": Section(
+            lambda: Pharmacy.objects.nearest(latitude, longitude, limit=NEARBY_PHARMACY_LIMIT),
+            (
+                ("customer-pharmacies", ("core.Pharmacy",), (viewer_location,)),
+                ("customer-pharmacy-options", ("core.Pharmacy",), (viewer_location,)),
+            ),
+        ),
+        "orders": Section(
+            lambda: Order.objects.order_by("-created_at")[:4],
+            (("customer-orders", ("core.Order",), ()),),
+        ),
+        "payments": Section(
+            lambda: PaymentProvider.objects.all(),
+            (("customer-payments", ("core.PaymentProvider",), ()),),
+        ),
+        "cards": Section(
+            lambda: page_from_request(
+                request, PaymentCard.objects.select_related("provider"), NEWEST_FIRST, "cards", DASHBOARD_PAGE_SIZE
+            ),
+            (("customer-cards", ("core.PaymentCard", "core.PaymentProvider"), (cards_cursor,)),),
+        ),
+        "chat": Section(
+            lambda: _chat(request),
+            (("customer-chat", ("core.ChatThread", "core.ChatMessage"), (request.user.pk,)),),
+        ),
+        "inbox": Section(
+            lambda: _inbox(request),
+            (
+                (
+                    "customer-notifications",
+                    ("core.Notification", inbox.generation(request.user.pk)),
+                    (request.user.pk, inbox_cursor),
+                ),
+            ),
+        ),
+    }
+    return extra, sections
+
+
+def _chat(request):
+    thread = chat.latest_thread(request.user)
+    messages, older = chat.recent_messages(thread) if thread else ([], None)
+    return {"thread": thread, "messages": messages, "before": older, "cursor": chat.resume_cursor(messages)}
+
+
+def _inbox(request):
+    state = inbox.inbox_state(request.user)
+    page = page_from_request(
         request,
-        page_title="Admin control",
-        admin_kpis=data.ADMIN_KPIS,
-        orders=orders,
-        user_segments=user_segments,
-        approvals=applications,
-        admin_change_url=_admin_change_url,
+        InboxItem.objects.filter(user=request.user).select_related("notification"),
+        NEWEST_FIRST,
+        "inbox",
+        DASHBOARD_PAGE_SIZE,
     )
-    return render(request, "core/admin_dashboard.html", context)
+    for item in page:
+        item.unread = state.is_unread(item)
+    return {"page": page, "unread_count": state.unread_count}
 
 
 @role_required(Profile.Role.CUSTOMER)
 def customer_dashboard(request):
-    ensure_seed_records()
+    ensure_seeded()
     card_form = PaymentCardForm()
     if request.method == "POST" and request.POST.get("form") == "payment-card":
         card_form = PaymentCardForm(request.POST)
@@ -167,23 +323,123 @@ def customer_dashboard(request):
             messages.success(request, "New payment card added to your wallet.")
             return redirect("customer_dashboard")
         messages.error(request, "Please fix the errors below and resubmit the card form.")
+    if request.method == "POST" and request.POST.get("form") == "inbox-read":
+        inbox.mark_read(request.user)
+        return redirect(f"{reverse('customer_dashboard')}#notifications")
 
-    context = _context(
-        request,
-        page_title="Customer journey",
-        pharmacies=Pharmacy.objects.all(),
-        orders=Order.objects.order_by("-created_at")[:4],
-        payments=PaymentProvider.objects.all(),
-        cards=PaymentCard.objects.select_related("provider").all(),
-        notifications=Notification.objects.filter(audience=Profile.Role.CUSTOMER).order_by("-created_at")[:5],
-        card_form=card_form,
+    extra, sections = _customer_sections(request, card_form)
+    return _render_dashboard(request, "core/customer_dashboard.html", extra, lazy_sections(sections))
+
+
+@role_required(Profile.Role.CUSTOMER)
+async def customer_dashboard_async(request):
+    if request.method == "POST":
+        return await sync_to_async(customer_dashboard.__wrapped__)(request)
+    return await _render_dashboard_async(
+        request, Profile.Role.CUSTOMER, "core/customer_dashboard.html", _customer_sections
     )
-    return render(request, "core/customer_dashboard.html", context)
+
+
+def _viewer_location(request):
+    point = geo.parse_point(request.GET.get("lat"), request.GET.get("lng"))
+    if point:
+        request.session["viewer_location"] = point
+        return point
+    stored = request.session.get("viewer_location")
+    return tuple(stored) if stored else tuple(settings.DEFAULT_MAP_CENTER)
+
+
+def _pharmacy_payload(pharmacy):
+    payload = {
+        "id": pharmacy.pk,
+        "name": pharmacy.name,
+        "address": pharmacy.address,
+        "rating": float(pharmacy.rating),
+        "latitude": pharmacy.latitude,
+        "longitude": pharmacy.longitude,
+        "url": reverse("pharmacy_detail", args=[pharmacy.pk]),
+    }
+    if hasattr(pharmacy, "distance"):
+        payload["distance_km"] = round(pharmacy.distance, 2)
+    return payload
+
+
+@role_required(Profile.Role.CUSTOMER)
+def nearby_pharmacies(request):
+    point = geo.parse_point(request.GET.get("lat"), request.GET.get("lng"))
+    if point is None:
+        return JsonResponse({"error": "Provide valid lat and lng query parameters."}, status=400)
+    try:
+        limit = int(request.GET.get("k", NEARBY_PHARMACY_LIMIT))
+    except ValueError:
+        return JsonResponse({"error": "k must be an integer."}, status=400)
+    limit = min(max(limit, 1), NEARBY_PHARMACY_MAX_LIMIT)
+    results = Pharmacy.objects.nearest(*point, limit=limit)
+    return JsonResponse({"results": [_pharmacy_payload(pharmacy) for pharmacy in results]})
+
+
+@role_required(Profile.Role.CUSTOMER)
+def search_pharmacies(request):
+    query = request.GET.get("q", "").strip()
+    try:
+        limit = int(request.GET.get("limit", SEARCH_RESULT_LIMIT))
+    except ValueError:
+        return JsonResponse({"error": "limit must be an integer."}, status=400)
+    limit = min(max(limit, 1), SEARCH_RESULT_MAX_LIMIT)
+    results = search.search_pharmacies(query[:100], limit=limit)
+    return JsonResponse({"query": query, "results": [_pharmacy_payload(pharmacy) for pharmacy in results]})
+
+
+def _expiry_options(today):
+    # One pass over the widest window on the expiry index; narrower buckets are filtered counts.
+    widest = max(days for days, _ in EXPIRY_BUCKETS)
+    counts = StockItem.objects.filter(expires_on__lte=today + timedelta(days=widest)).aggregate(
+        **{
+            f"within_{days}": Count("id", filter=Q(expires_on__lte=today + timedelta(days=days)))
+            for days, _ in EXPIRY_BUCKETS
+        }
+    )
+    return [
+        {"value": days, "label": label, "count": counts[f"within_{days}"]}
+        for days, label in EXPIRY_BUCKETS
+    ]
+
+
+def _store_sections(request, stock_form=None):
+    today = timezone.localdate()
+    expiry_threshold = None
+    stock = StockItem.objects.all()
+    try:
+        expiry_threshold = int(request.GET.get("expires", ""))
+        stock = stock.filter(expires_on__lte=today + timedelta(days=expiry_threshold))
+    except (ValueError, OverflowError):
+        expiry_threshold = None
+    stock_cursor = request.GET.get("after", "")
+    extra = {
+        "page_title": "Pharmacy store inventory",
+        "stock_form": stock_form or StockItemForm(),
+        "expiry_threshold": expiry_threshold,
+        "stock_cursor": stock_cursor,
+        "today": today,
+    }
+    sections = {
+        "expiry_options": Section(
+            lambda: _expiry_options(today),
+            (("store-expiry-buckets", ("core.StockItem",), (today, expiry_threshold)),),
+        ),
+        "stock_page": Section(
+            lambda: page_from_request(
+                request, stock, STOCK_ORDERING, per_page=STOCK_PAGE_SIZE, keep=("expires",)
+            ),
+            (("store-stock", ("core.StockItem",), (today, expiry_threshold, stock_cursor)),),
+        ),
+    }
+    return extra, sections
 
 
 @role_required(Profile.Role.PHARMACY)
 def pharmacy_store_dashboard(request):
-    ensure_seed_records()
+    ensure_seeded()
     stock_form = StockItemForm()
     if request.method == "POST" and request.POST.get("form") == "stock-item":
         stock_form = StockItemForm(request.POST)
@@ -193,54 +449,73 @@ def pharmacy_store_dashboard(request):
             return redirect("pharmacy_store_dashboard")
         messages.error(request, "Please fix the stock form errors.")
 
-    expires_param = request.GET.get("expires")
-    expiry_threshold = None
-    filtered_stock = StockItem.objects.all().order_by("expires_in_days", "name")
-    if expires_param:
-        try:
-            expiry_threshold = int(expires_param)
-            filtered_stock = filtered_stock.filter(expires_in_days__lte=expiry_threshold)
-        except ValueError:
-            expiry_threshold = None
-    expiry_options = [
-        {"value": 30, "label": "30 days"},
-        {"value": 10, "label": "10 days"},
-        {"value": 90, "label": "3 months"},
-    ]
+    extra, sections = _store_sections(request, stock_form)
+    return _render_dashboard(request, "core/pharmacy_store_dashboard.html", extra, lazy_sections(sections))
 
-    context = _context(
-        request,
-        page_title="Pharmacy store inventory",
-        stock=StockItem.objects.order_by("-updated_at"),
-        stock_form=stock_form,
-        expiry_options=expiry_options,
-        expiry_threshold=expiry_threshold,
-        filtered_stock=filtered_stock,
+
+@role_required(Profile.Role.PHARMACY)
+async def pharmacy_store_dashboard_async(request):
+    if request.method == "POST":
+        return await sync_to_async(pharmacy_store_dashboard.__wrapped__)(request)
+    return await _render_dashboard_async(
+        request, Profile.Role.PHARMACY, "core/pharmacy_store_dashboard.html", _store_sections
+    )
+
+
+def _distributor_sections(request):
+    tasks_cursor = request.GET.get("tasks", "")
+    status_cursors = (request.GET.get("timeline", ""), request.GET.get("statuses", ""))
+    status_fragment = (
+        "distributor-status",
+        ("core.TimelineEvent", "core.DistributorStatus", "core.StatusOption"),
+        (status_cursors,),
     )
-    return render(request, "core/pharmacy_store_dashboard.html", context)
+    extra = {"page_title": "Distributor ops", "tasks_cursor": tasks_cursor, "status_cursors": status_cursors}
+    sections = {
+        "tasks": Section(
+            lambda: page_from_request(
+                request, DeliveryTask.objects.select_related("pharmacy"), NEWEST_FIRST, "tasks", DASHBOARD_PAGE_SIZE
+            ),
+            (("distributor-tasks", ("core.DeliveryTask", "core.Pharmacy"), (tasks_cursor,)),),
+        ),
+        "timeline": Section(
+            lambda: page_from_request(
+                request, TimelineEvent.objects.all(), OLDEST_FIRST, "timeline", DASHBOARD_PAGE_SIZE, ("statuses",)
+            ),
+            (status_fragment,),
+        ),
+        "status_board": Section(
+            lambda: page_from_request(
+                request,
+                DistributorStatus.objects.all(),
+                RECENTLY_UPDATED,
+                "statuses",
+                DASHBOARD_PAGE_SIZE,
+                ("timeline",),
+            ),
+            (status_fragment,),
+        ),
+        "status_options": Section(_distributor_status_options, (status_fragment,)),
+    }
+    return extra, sections
 
 
 @role_required(Profile.Role.DISTRIBUTOR)
 def distributor_dashboard(request):
-    ensure_seed_records()
-    status_options = []
-    seen = set()
-    preset_statuses = ["Awaiting pickup", "In progress", "Delivered", "Delayed"]
-    for label in preset_statuses + list(DistributorStatus.objects.values_list("status", flat=True)):
-        normalized = (label or "").strip()
-        if normalized and normalized not in seen:
-            seen.add(normalized)
-            status_options.append(normalized)
+    ensure_seeded()
+    extra, sections = _distributor_sections(request)
+    return _render_dashboard(request, "core/distributor_dashboard.html", extra, lazy_sections(sections))
 
-    context = _context(
-        request,
-        page_title="Distributor ops",
-        tasks=DeliveryTask.objects.select_related("pharmacy").all(),
-        timeline=TimelineEvent.objects.order_by("created_at"),
-        status_board=DistributorStatus.objects.all(),
-        status_options=status_options,
+
+@role_required(Profile.Role.DISTRIBUTOR)
+async def distributor_dashboard_async(request):
+    return await _render_dashboard_async(
+        request, Profile.Role.DISTRIBUTOR, "core/distributor_dashboard.html", _distributor_sections
     )
-    return render(request, "core/distributor_dashboard.html", context)
+
+
+def _distributor_status_options():
+    return list(StatusOption.objects.values_list("label", flat=True))
 
 
 def _admin_change_url(obj):
@@ -248,22 +523,93 @@ def _admin_change_url(obj):
     return reverse(f"admin:{opts.app_label}_{opts.model_name}_change", args=[obj.pk])
 
 
-def _segment_profiles(role):
-    qs = Profile.objects.filter(role=role).select_related("user").order_by("-created_at")
+@lru_cache(maxsize=32)
+def _admin_change_url_pattern(model_label, script_prefix):
+    app_label, model_name = model_label.split(".")
+    return reverse(f"admin:{app_label}_{model_name}_change", args=["__pk__"])
+
+
+def _segment_queryset(role):
+    return (
+        Profile.objects.filter(role=role)
+        .select_related("user")
+        .only(
+            "role",
+            "phone",
+            "organization",
+            "created_at",
+            "user__username",
+            "user__first_name",
+            "user__last_name",
+            "user__email",
+        )
+        .order_by(*SEGMENT_ORDERING)
+    )
+
+
+def _segment_rows(profiles):
+    # Resolve the admin route once per page instead of once per row.
+    url_pattern = _admin_change_url_pattern(Profile._meta.label_lower, get_script_prefix())
     formatted = []
-    for profile in qs:
+    for profile in profiles:
         formatted.append(
             {
                 "profile": profile,
                 "name": profile.user.get_full_name() or profile.user.username,
                 "contact": profile.phone or profile.user.email or "—",
                 "meta": profile.organization or profile.get_role_display(),
-                "admin_url": _admin_change_url(profile),
+                "admin_url": url_pattern.replace("__pk__", str(profile.pk)),
             }
         )
     return formatted
 
 
+@role_required(Profile.Role.ADMIN)
+def admin_user_segment(request, segment):
+    if segment not in USER_SEGMENTS:
+        raise Http404("Unknown user segment.")
+    role, label = USER_SEGMENTS[segment]
+    page = page_from_request(request, _segment_queryset(role), SEGMENT_ORDERING, per_page=SEGMENT_PAGE_SIZE)
+    context = _context(
+        request,
+        page_title=f"{label} · Users",
+        segment_label=label,
+        page=page,
+        rows=_segment_rows(page.items),
+    )
+    return render(request, "core/admin_user_segment.html", context)
+
+
+@role_required(Profile.Role.ADMIN)
+def admin_analytics(request):
+    # Reads only the pre-aggregated fact tables; raw orders are never scanned here.
+    context = _context(
+        request,
+        page_title="Order analytics",
+        daily=analytics.daily_totals(),
+        top_pharmacies=analytics.top_pharmacies(),
+        hourly=analytics.hourly_totals(),
+    )
+    return render(request, "core/admin_analytics.html", context)
+
+
+def _apply_transition(request, machine, instance, action, success_message=None):
+    if action not in machine:
+        messages.error(request, "Unknown action.")
+        return False
+    version = request.POST.get("version", "")
+    result = machine.apply(instance, action, int(version) if version.isdigit() else None)
+    if not result.ok:
+        messages.error(request, f"{instance.code}: {result.reason}")
+    elif success_message:
+        messages.success(request, success_message)
+    return result.ok
+
+
+def _wants_json(request):
+    return "application/json" in request.headers.get("Accept", "")
+
+
 def _redirect_back(request, fallback_name):
     fallback = reverse(fallback_name)
     return redirect(request.META.get("HTTP_REFERER") or fallback)
@@ -273,20 +619,40 @@ def _redirect_back(request, fallback_name):
 def order_action(request, pk, action):
     order = get_object_or_404(Order, pk=pk)
     if request.method == "POST":
-        if action == "deliver":
-            order.status = Order.Status.DELIVERED
-            order.progress = "Delivered"
-            order.eta_text = "Completed"
-        elif action == "out":
-            order.status = Order.Status.OUT
-            order.progress = "Out for delivery"
-            order.eta_text = "15 min"
-        elif action == "cancel":
-            order.status = Order.Status.CANCELLED
-            order.progress = "Cancelled"
-            order.eta_text = "—"
-        order.save()
-        messages.success(request, f"Order {order.code} updated.")
+        _apply_transition(request, transitions.ORDER_STATES, order, action, f"Order {order.code} updated.")
+    return _redirect_back(request, "admin_dashboard")
+
+
+@role_required(Profile.Role.ADMIN)
+def bulk_order_action(request):
+    if request.method != "POST":
+        return redirect("admin_dashboard")
+    wants_json = _wants_json(request)
+    action = request.POST.get("action", "")
+    pks = request.POST.getlist("orders")
+    error = None
+    if action not in transitions.ORDER_STATES:
+        error = "Choose a valid order action."
+    elif not pks:
+        error = "Select at least one order."
+    elif len(pks) > transitions.BULK_ORDER_LIMIT:
+        error = f"Select at most {transitions.BULK_ORDER_LIMIT} orders at a time."
+    elif not all(pk.isdigit() for pk in pks):
+        error = "Order ids must be integers."
+    if error:
+        if wants_json:
+            return JsonResponse({"error": error}, status=400)
+        messages.error(request, error)
+        return _redirect_back(request, "admin_dashboard")
+
+    results = transitions.ORDER_STATES.apply_many(pks, action)
+    updated = sum(result.ok for result in results)
+    if wants_json:
+        return JsonResponse({"action": action, "updated": updated, "results": [result.as_dict() for result in results]})
+    messages.success(request, f"{updated} of {len(results)} orders updated.")
+    for result in results:
+        if not result.ok:
+            messages.warning(request, f"{result.code or f'Order {result.pk}'}: {result.reason}")
     return _redirect_back(request, "admin_dashboard")
 
 
@@ -307,14 +673,8 @@ def application_action(request, pk, action):
 def delivery_task_action(request, pk, action):
     task = get_object_or_404(DeliveryTask, pk=pk)
     if request.method == "POST":
-        if action == "accept":
-            task.status = DeliveryTask.Status.IN_PROGRESS
-        elif action == "complete":
-            task.status = DeliveryTask.Status.DONE
-        elif action == "reject":
-            task.status = DeliveryTask.Status.AWAITING
-        task.save()
-        messages.success(request, f"{task.code} set to {task.get_status_display()}.")
+        if _apply_transition(request, transitions.DELIVERY_STATES, task, action):
+            messages.success(request, f"{task.code} set to {task.get_status_display()}.")
     return _redirect_back(request, "distributor_dashboard")
 
 
@@ -323,34 +683,201 @@ def distributor_status_action(request, pk):
     status_entry = get_object_or_404(DistributorStatus, pk=pk)
     if request.method == "POST":
         status_entry.status = "Delivered"
-        status_entry.save()
+        status_entry.save(update_fields=["status", "updated_at"])
         messages.success(request, f"{status_entry.order_code} marked delivered.")
     return _redirect_back(request, "distributor_dashboard")
 
 
 @role_required(Profile.Role.CUSTOMER)
 def create_customer_order(request):
-    if request.method == "POST":
-        pharmacy_id = request.POST.get("pharmacy")
-        items = request.POST.get("items", "").strip()
-        pharmacy = get_object_or_404(Pharmacy, pk=pharmacy_id)
-        generated_code = f"#PG-{get_random_string(4).upper()}"
-        Order.objects.create(
-            code=request.POST.get("order_code") or generated_code,
+    if request.method != "POST":
+        return _redirect_back(request, "customer_dashboard")
+    pharmacy_id = request.POST.get("pharmacy", "")
+    items = request.POST.get("items", "").strip() or "Custom selection"
+
+    def place_order():
+        order = Order.objects.create(
+            code=codes.next_order_code(),
             customer_name=request.user.get_full_name() or request.user.username,
-            pharmacy=pharmacy,
-            items=items or "Custom selection",
+            pharmacy=get_object_or_404(Pharmacy, pk=pharmacy_id),
+            items=items,
             progress="Requested",
             status=Order.Status.PENDING,
             eta_text="TBD",
         )
+        return {"id": order.pk, "code": order.code, "status": order.status}
+
+    try:
+        order, replayed = idempotency.run_once(
+            request.user,
+            "order:create",
+            idempotency.key_from_request(request),
+            idempotency.fingerprint(pharmacy_id, items),
+            place_order,
+        )
+    except (idempotency.InvalidIdempotencyKey, idempotency.IdempotencyConflict) as exc:
+        if _wants_json(request):
+            return JsonResponse({"error": str(exc)}, status=422)
+        messages.error(request, str(exc))
+        return _redirect_back(request, "customer_dashboard")
+    if _wants_json(request):
+        return JsonResponse({"order": order, "replayed": replayed}, status=200 if replayed else 201)
+    if replayed:
+        messages.info(request, f"Order {order['code']} was already placed.")
+    else:
         messages.success(request, "New delivery request created.")
     return _redirect_back(request, "customer_dashboard")
 
 
+def _order_snapshot(order):
+    return {
+        "id": order["pk"],
+        "code": order["code"],
+        "status": order["status"],
+        "status_label": Order.Status(order["status"]).label,
+        "version": order["version"],
+        "progress": order["progress"],
+        "eta_text": order["eta_text"],
+    }
+
+
+@role_required(Profile.Role.CUSTOMER)
+async def order_stream(request):
+    """
+    Server-Sent Events for order status changes: a snapshot of the watched orders, then one event per
+    transition. ``?orders=1,2`` narrows the stream; without it every order change is sent.
+    """
+    raw_ids = [part for part in request.GET.get("orders", "").split(",") if part.strip()]
+    if not all(part.strip().isdigit() for part in raw_ids) or len(raw_ids) > STREAM_ORDER_LIMIT:
+        return JsonResponse({"error": f"orders must be up to {STREAM_ORDER_LIMIT} comma-separated ids."}, status=400)
+    watched = {int(part) for part in raw_ids}
+    snapshot = Order.objects.values("pk", "code", "status", "version", "progress", "eta_text")
+    if watched:
+        snapshot = snapshot.filter(pk__in=watched)
+    else:
+        snapshot = snapshot.order_by("-created_at")[:STREAM_ORDER_LIMIT]
+    retry = f"retry: {STREAM_RETRY_MS}\n\n"
+
+    if not isinstance(request, ASGIRequest):
+        # Under WSGI an open response ties up a worker, so send the snapshot and let EventSource
+        # reconnect after the retry delay: it degrades to polling instead of hanging.
+        body = [retry] + [streams.sse_message(_order_snapshot(order), event="order") async for order in snapshot]
+        return _event_stream(body)
+
+    async def events():
+        yield retry
+        # Subscribe before reading the snapshot so no transition can fall between the two.
+        async with streams.get_broker().subscribe(streams.ORDER_TOPIC) as queue:
+            async for order in snapshot:
+                yield streams.sse_message(_order_snapshot(order), event="order")
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + STREAM_MAX_SECONDS
+            while (remaining := deadline - loop.time()) > 0:
+                try:
+                    event = await asyncio.wait_for(queue.get(), min(STREAM_KEEPALIVE_SECONDS, remaining))
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if not watched or event["data"]["id"] in watched:
+                    yield streams.sse_message(event["data"], event="order", event_id=event["id"])
+
+    return _event_stream(events())
+
+
+def _chat_error(request, message, status=422):
+    if _wants_json(request):
+        return JsonResponse({"error": message}, status=status)
+    messages.error(request, message)
+    return redirect(f"{reverse('customer_dashboard')}#chat")
+
+
+def _chat_body(request):
+    body = request.POST.get("body", "").strip()
+    if not body:
+        return None, "Write a message first."
+    if len(body) > chat.MAX_MESSAGE_LENGTH:
+        return None, f"Messages are limited to {chat.MAX_MESSAGE_LENGTH} characters."
+    return body, None
+
+
+def _send_chat_message(request, thread):
+    body, error = _chat_body(request)
+    if error:
+        return _chat_error(request, error)
+    message = chat.post_message(thread, request.user, ChatMessage.Sender.CUSTOMER, body)
+    if _wants_json(request):
+        return JsonResponse({"thread": thread.pk, "message": chat.message_payload(message)}, status=201)
+    return redirect(f"{reverse('customer_dashboard')}#chat")
+
+
+@role_required(Profile.Role.CUSTOMER)
+def start_chat(request):
+    if request.method != "POST":
+        return redirect("customer_dashboard")
+    body, error = _chat_body(request)
+    if error:
+        return _chat_error(request, error)
+    subject = request.POST.get("subject", "").strip()[:255] or CHAT_DEFAULT_SUBJECT
+    with transaction.atomic():
+        thread = chat.start_thread(request.user, subject)
+        return _send_chat_message(request, thread)
+
+
+def _chat_poll_seconds(request):
+    try:
+        wait = int(request.GET.get("wait", 0))
+    except ValueError:
+        return None
+    if not isinstance(request, ASGIRequest):
+        # Under WSGI a held request ties up a worker, so answer at once and let the client poll.
+        return 0
+    return min(max(wait, 0), CHAT_POLL_MAX_SECONDS)
+
+
+@role_required(Profile.Role.CUSTOMER)
+async def chat_messages(request, pk):
+    """
+    GET with ``?after=<cursor>`` returns only messages newer than the cursor, waiting up to ``wait``
+    seconds for one to arrive (long-poll). Without ``after`` it returns the newest page of history;
+    ``?before=<cursor>`` pages further back. POST sends ``body`` to the thread.
+    """
+    thread = await sync_to_async(get_object_or_404)(ChatThread, pk=pk, customer=request.user)
+    if request.method == "POST":
+        return await sync_to_async(_send_chat_message)(request, thread)
+    try:
+        if "after" not in request.GET:
+            return JsonResponse(await sync_to_async(chat.history)(thread, request.GET.get("before") or None))
+        wait = _chat_poll_seconds(request)
+        if wait is None:
+            return JsonResponse({"error": "wait must be an integer."}, status=400)
+        fetch = sync_to_async(chat.messages_since)
+        after = request.GET["after"]
+        if not wait:
+            return JsonResponse(await fetch(thread, after))
+        # Subscribe before reading so a message sent in between still wakes this request.
+        async with streams.get_broker().subscribe(chat.topic(thread.pk)) as queue:
+            payload = await fetch(thread, after)
+            if payload["messages"]:
+                return JsonResponse(payload)
+            try:
+                await asyncio.wait_for(queue.get(), wait)
+            except asyncio.TimeoutError:
+                return JsonResponse(payload)
+        return JsonResponse(await fetch(thread, after))
+    except chat.InvalidCursor:
+        return JsonResponse({"error": "Unknown or expired cursor."}, status=400)
+
+
+def _event_stream(content):
+    response = StreamingHttpResponse(content, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
 @role_required(Profile.Role.CUSTOMER)
 def pharmacy_detail(request, pk):
-    ensure_seed_records()
+    ensure_seeded()
     pharmacy = get_object_or_404(Pharmacy, pk=pk)
     context = _context(
         request,
@@ -363,7 +890,7 @@ def pharmacy_detail(request, pk):
 
 @role_required(Profile.Role.DISTRIBUTOR)
 def delivery_detail(request, pk):
-    ensure_seed_records()
+    ensure_seeded()
     task = get_object_or_404(DeliveryTask.objects.select_related("pharmacy"), pk=pk)
     context = _context(
         request,
@@ -380,7 +907,7 @@ def distributor_status_update(request, pk):
         new_status = request.POST.get("status", "").strip()
         if new_status:
             status_entry.status = new_status
-            status_entry.save()
+            status_entry.save(update_fields=["status", "updated_at"])
             messages.success(request, f"{status_entry.order_code} updated to {new_status}.")
         else:
             messages.error(request, "Select a valid status option.")
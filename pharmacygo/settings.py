@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
+import tempfile
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -41,8 +43,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'core.routers.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -73,14 +77,127 @@ WSGI_APPLICATION = 'pharmacygo.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
+# SQLite by default, tuned for several workers: WAL lets dashboards read while one writer
+# commits, busy_timeout waits for the write lock instead of failing, and IMMEDIATE transactions
+# take that lock up front so two read-then-write transactions never deadlock into
+# "database is locked". Connections are kept for DB_CONN_MAX_AGE seconds and checked before reuse.
+# DATABASE_ENGINE=postgres switches to Postgres (POSTGRES_DB/USER/PASSWORD/HOST/PORT) with a
+# psycopg connection pool of POSTGRES_POOL_MIN_SIZE..POSTGRES_POOL_MAX_SIZE connections per
+# process; POSTGRES_POOL=0 uses persistent connections instead (e.g. behind PgBouncer).
+# `python manage.py bench_db_writes` compares the SQLite settings under write contention.
+
+DATABASE_ENGINE = os.environ.get('DATABASE_ENGINE', 'sqlite')
+DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', '60'))
+
+SQLITE_OPTIONS = {
+    'init_command': (
+        'PRAGMA journal_mode=WAL;'
+        'PRAGMA synchronous=NORMAL;'
+        'PRAGMA busy_timeout=5000;'
+        'PRAGMA mmap_size=134217728;'
+        'PRAGMA cache_size=-16000;'
+        'PRAGMA temp_store=MEMORY'
+    ),
+    'transaction_mode': 'IMMEDIATE',
+}
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+if DATABASE_ENGINE == 'postgres':
+    POSTGRES_POOL = os.environ.get('POSTGRES_POOL', '1') == '1'
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('POSTGRES_DB', 'pharmacygo'),
+            'USER': os.environ.get('POSTGRES_USER', 'pharmacygo'),
+            'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+            'HOST': os.environ.get('POSTGRES_HOST', 'localhost'),
+            'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+            # Django rejects persistent connections alongside its pool; the pool does the reuse.
+            'CONN_MAX_AGE': 0 if POSTGRES_POOL else DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'pool': {
+                    'min_size': int(os.environ.get('POSTGRES_POOL_MIN_SIZE', '2')),
+                    'max_size': int(os.environ.get('POSTGRES_POOL_MAX_SIZE', '10')),
+                    'timeout': 10,
+                },
+            } if POSTGRES_POOL else {},
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': SQLITE_OPTIONS,
+        }
+    }
+
+# Read replicas
+# REPLICA_DATABASES lists replica SQLite files, or Postgres hosts when DATABASE_ENGINE=postgres,
+# comma-separated. Safe (GET/HEAD) requests read from one of them (core.routers); writes and
+# everything outside a request use the primary. A client that just sent a POST reads from the
+# primary for REPLICA_STICKY_SECONDS so it sees its own writes; dashboard fragments rendered from
+# a replica are cached for at most REPLICA_FRAGMENT_TIMEOUT seconds. Replication itself is external.
+
+DATABASE_REPLICAS = []
+for index, location in enumerate(filter(None, os.environ.get('REPLICA_DATABASES', '').split(',')), start=1):
+    alias = f'replica_{index}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        ('HOST' if DATABASE_ENGINE == 'postgres' else 'NAME'): location.strip(),
+        # Tests run against the primary's test database only.
+        'TEST': {'MIRROR': 'default'},
     }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['core.routers.PrimaryReplicaRouter']
+REPLICA_STICKY_SECONDS = 5
+REPLICA_FRAGMENT_TIMEOUT = 30
+
+
+# Cache
+# Dashboard sections are cached per role in each process and invalidated by per-model generation
+# counters (core.fragments). The counters live in FRAGMENT_GENERATION_CACHE, which every worker
+# must share so a write in one invalidates the sections cached by the others: by default files
+# under FRAGMENT_GENERATIONS_DIR, which covers the workers of one host. Point it at Redis or
+# Memcached when serving from several hosts; check warns (core.W001) if it is process-local.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'pharmacygo',
+    },
+    'generations': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get(
+            'FRAGMENT_GENERATIONS_DIR', str(Path(tempfile.gettempdir()) / 'pharmacygo-generations')
+        ),
+        'TIMEOUT': None,
+        'OPTIONS': {'MAX_ENTRIES': 100_000},
+    },
 }
 
+FRAGMENT_GENERATION_CACHE = 'generations'
+
+DASHBOARD_FRAGMENT_TIMEOUT = 300
+
+# Route the role dashboards to their async variants (core.views.*_async), which load
+# uncached sections concurrently. Enable when serving pharmacygo.asgi; compare with
+# `python manage.py bench_dashboards`.
+
+ASYNC_DASHBOARDS = False
+
+
+# Maps
+# Fallback (lat, lng) for nearby-pharmacy lookups until the customer shares a location.
+
+DEFAULT_MAP_CENTER = (41.2995, 69.2401)
+
+
+# Sign in with a username, email or phone number (see core/backends.py).
+AUTHENTICATION_BACKENDS = ['core.backends.IdentifierBackend']
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -131,3 +248,74 @@ STATICFILES_FINDERS = [
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Demo fixtures
+# core.bootstrap seeds after `migrate` and records the applied data.SEED_VERSION.
+
+SEED_ON_MIGRATE = True
+
+# Orders
+# Codes come from per-process blocks of CodeSequence values (core.codes). Idempotency keys
+# sent with order creation are kept for IDEMPOTENCY_KEY_TTL seconds (core.idempotency).
+# Status transitions are pushed to /dashboard/customer/orders/stream/ through
+# ORDER_STREAM_BROKER; the default only reaches subscribers in the same process.
+
+ORDER_CODE_BLOCK_SIZE = 50
+IDEMPOTENCY_KEY_TTL = 60 * 60 * 24
+ORDER_STREAM_BROKER = 'core.streams.LocalBroker'
+
+
+# Notifications
+# Each new Notification is copied into its audience's inboxes (core.inbox), INBOX_FANOUT_BATCH_SIZE
+# users per transaction, on a background thread of the process that created it. Set
+# INBOX_FANOUT_IN_PROCESS = False when a separate `python manage.py fanout_notifications --loop`
+# worker does this instead.
+
+INBOX_FANOUT_BATCH_SIZE = 1000
+INBOX_FANOUT_IN_PROCESS = True
+
+
+# Analytics
+# `refresh_analytics` recomputes hourly/daily facts for orders and tasks changed since its
+# watermark, staying ANALYTICS_SETTLE_SECONDS behind the clock; reads stream ANALYTICS_CHUNK_SIZE rows.
+
+ANALYTICS_SETTLE_SECONDS = 60
+ANALYTICS_CHUNK_SIZE = 2000
+
+
+# Request instrumentation
+# core.middleware.RequestMetricsMiddleware adds Server-Timing headers, logs one JSON line
+# per request to the "core.metrics" logger and checks the per-URL-name budgets below
+# (keys: queries, db_ms, template_ms, total_ms). BUDGET_MODE is 'warn', 'raise' or 'off';
+# core/tests.py overrides it to 'raise'.
+
+REQUEST_METRICS = {
+    'SERVER_TIMING': True,
+    'LOG': True,
+    'BUDGET_MODE': 'warn',
+    'BUDGETS': {
+        'login': {'queries': 5},
+        'admin_dashboard': {'queries': 10},
+        'admin_analytics': {'queries': 6},
+        'customer_dashboard': {'queries': 16},
+        'pharmacy_store_dashboard': {'queries': 8},
+        'distributor_dashboard': {'queries': 8},
+        'pharmacy_detail': {'queries': 6},
+        'delivery_detail': {'queries': 6},
+    },
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'core.metrics': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}